@@ -1,13 +1,53 @@
 # Logic.py
 import os
+import math
 import shutil
-import laspy
+import struct
+import zlib
+import copy
+import functools
+import hashlib
+import json
+import uuid
+from collections import OrderedDict
+import metrics
+from lazy_import import LazyModule
 
+# Ciężkie moduły wczytywane dopiero przy pierwszym użyciu (szybszy start API / GUI)
+laspy = LazyModule("laspy")
+np = LazyModule("numpy")
 
-def process_file(input_path: str, output_path: str, settings: dict):
+
+# Powyżej tej liczby punktów KD-tree budowane jest osobno dla każdego kafla
+OUTLIER_TILE_POINTS = 2_000_000
+
+# Liczba punktów przeliczanych jednym wywołaniem pyproj
+REPROJECT_BATCH_POINTS = 1_000_000
+
+# Wielkość paczki punktów przy strumieniowym czytaniu (merge / retile)
+STREAM_CHUNK_POINTS = 1_000_000
+
+# Maksymalna liczba jednocześnie otwartych plików kafli przy retile
+MAX_OPEN_TILE_WRITERS = 64
+
+# Dłuższy bok podglądu (px) i dozwolone tryby podglądu
+PREVIEW_SIZE = 512
+PREVIEW_MODES = ("height", "intensity")
+
+# Próbka punktów czytana przez inspect_file (w kilku równo rozłożonych paczkach)
+INSPECT_SAMPLE_POINTS = 100_000
+INSPECT_SAMPLE_BATCHES = 10
+
+def process_file(input_path: str, output_path: str, settings: dict, progress=None,
+                 working_set: str = None):
     """
     Główna funkcja backendu.
     Przetwarza plik LAS / CSV / TXT i zapisuje wynik pod output_path.
+    Opcjonalne progress(fraction, stage) jest wywoływane na początku
+    każdego etapu (read, filter, transform, write) i na końcu ("done").
+    working_set: katalog zbioru roboczego tego wejścia (patrz
+    _open_working_set), przypisany do zawartości pliku - kolejne zadania
+    z innym points_to_render nie czytają ani nie filtrują pliku od nowa.
     Zwraca (success, message).
     """
 
@@ -27,45 +67,108 @@ def process_file(input_path: str, output_path: str, settings: dict):
 
     try:
         if input_path.lower().endswith(".las"):
-            return _process_las_file(input_path, output_path, points_to_render)
+            return _process_las_file(input_path, output_path, points_to_render, settings, progress,
+                                     working_set)
         else:
             # Dla innych plików – po prostu kopiujemy
             shutil.copy2(input_path, output_path)
+            if progress:
+                progress(1.0, "done")
             return True, f"File copied successfully → {output_path}"
 
     except Exception as e:
         return False, f"Processing error: {str(e)}"
 
 
-def _process_las_file(input_path: str, output_path: str, points_to_render: float):
+def _process_las_file(input_path: str, output_path: str, points_to_render: float,
+                      settings: dict = None, progress=None, working_set: str = None):
     """
     Przetwarzanie LAS przy pomocy laspy.
     Możesz tutaj wkleić swoją logikę filtrowania, klasyfikacji, itd.
+    Z working_set pierwsze zadanie zapisuje indeks wysokości, a kolejne z tymi
+    samymi filtrami mapują punkty wejścia w pamięci i wybierają je z indeksu
+    (bez dekodowania i filtrowania całego pliku).
     """
 
+    settings = settings or {}
+    progress = progress or (lambda fraction, stage: None)
+
     try:
-        las = laspy.read(input_path)
+        progress(0.0, "read")
+        with metrics.timed("read"):
+            cached = _open_working_set(working_set, input_path, settings) if working_set else None
+            if cached is None:
+                las = laspy.read(input_path)
+                header, points = las.header, las.points
+            else:
+                header, points, z_sorted, order = cached
+        if working_set:
+            metrics.CACHE_REQUESTS.inc(cache="working_set", result="hit" if cached else "miss")
+        metrics.POINTS_PROCESSED.inc(len(points), direction="in")
 
-        # -----------------------------------------------
-        # 👉 PRZYKŁADOWE PRZETWARZANIE
-        # (zmień to na własny algorytm)
-        # -----------------------------------------------
+        progress(0.3, "filter")
+        with metrics.timed("filter"):
+            if cached is None:
+                # Filtry atrybutów (klasy, echa, intensywność, flagi) - jedna maska
+                mask = _build_filter_mask(las.points, settings)
+                if not mask.any():
+                    return False, "LAS processing error: no points left after filtering."
 
-        # Przykładowy filtr wysokości
-        min_z = las.z.min()
-        max_z = las.z.max()
-        threshold = min_z + (max_z - min_z) * (points_to_render / 100.0)
+                # Usuwanie odstających punktów (ptaki, wielotorowość) przed progiem wysokości
+                if settings.get("remove_outliers"):
+                    indices = np.flatnonzero(mask)
+                    keep = _statistical_outlier_mask(
+                        np.asarray(las.x)[indices],
+                        np.asarray(las.y)[indices],
+                        np.asarray(las.z)[indices],
+                        k=int(settings.get("outlier_neighbors", 8)),
+                        sigma=float(settings.get("outlier_sigma", 2.0))
+                    )
+                    mask[indices[~keep]] = False
 
-        mask = las.z >= threshold
-        filtered_points = las.points[mask]
+            # -----------------------------------------------
+            # 👉 PRZYKŁADOWE PRZETWARZANIE
+            # (zmień to na własny algorytm)
+            # -----------------------------------------------
 
-        new_las = laspy.create(point_format=las.header.point_format)
+            # Przykładowy filtr wysokości (liczony tylko na punktach po filtrach)
+            if working_set:
+                if cached is None:
+                    z_sorted, order = _save_working_set(working_set, las, mask, settings)
+                mask = _height_mask(z_sorted, order, len(points), header, points_to_render)
+            else:
+                z = las.z
+                min_z = z[mask].min()
+                max_z = z[mask].max()
+                threshold = min_z + (max_z - min_z) * (points_to_render / 100.0)
+
+                mask &= z >= threshold
+            filtered_points = points[mask]
+
+        new_las = laspy.create(point_format=header.point_format)
         new_las.points = filtered_points
 
-        new_las.header.offsets = las.header.offsets
-        new_las.header.scales = las.header.scales
+        new_las.header.offsets = header.offsets
+        new_las.header.scales = header.scales
+
+        progress(0.6, "transform")
+        with metrics.timed("transform"):
+            # Mniejszy format punktu / usunięcie dodatkowych wymiarów
+            if settings.get("drop_extra_dims"):
+                _drop_extra_dims(new_las, settings["drop_extra_dims"])
+            output_point_format = settings.get("output_point_format")
+            if output_point_format not in (None, "", "keep"):
+                new_las = _convert_point_format(new_las, output_point_format)
+
+            # Opcjonalna zmiana układu współrzędnych
+            if settings.get("target_crs"):
+                _reproject_las(new_las, header, settings)
 
-        new_las.write(output_path)
+        progress(0.7, "write")
+        with metrics.timed("write"):
+            new_las.write(output_path)
+        metrics.POINTS_PROCESSED.inc(len(new_las.points), direction="out")
+        progress(1.0, "done")
 
         return True, f"LAS processed successfully → {output_path}"
 
@@ -73,6 +176,862 @@ def _process_las_file(input_path: str, output_path: str, points_to_render: float
         return False, f"LAS processing error: {str(e)}"
 
 
+def _filter_key(settings: dict) -> str:
+    """
+    Klucz ustawień, od których zależy maska punktów przed progiem wysokości
+    (filtry atrybutów i usuwanie odstających). Zadania z tym samym kluczem
+    dzielą indeks wysokości w zbiorze roboczym niezależnie od points_to_render.
+    """
+
+    key = {
+        "exclude_classes": sorted(parse_class_list(settings.get("exclude_classes"))),
+        "include_classes": sorted(parse_class_list(settings.get("include_classes"))),
+        "return_filter": settings.get("return_filter") or "all",
+        "intensity_min": settings.get("intensity_min"),
+        "intensity_max": settings.get("intensity_max"),
+        "drop_withheld": bool(settings.get("drop_withheld")),
+        "drop_synthetic": bool(settings.get("drop_synthetic")),
+        "remove_outliers": bool(settings.get("remove_outliers")),
+    }
+    if key["remove_outliers"]:
+        key["outlier_neighbors"] = int(settings.get("outlier_neighbors", 8))
+        key["outlier_sigma"] = float(settings.get("outlier_sigma", 2.0))
+    return hashlib.sha256(json.dumps(key, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def _open_working_set(working_set: str, input_path: str, settings: dict):
+    """
+    Otwiera zbiór roboczy wejścia, jeśli jest już zbudowany dla filtrów z settings.
+    Katalog zawiera tylko indeks wysokości (kilka bajtów na punkt):
+      - <klucz>.z.npy: surowe Z punktów po filtrach, posortowane rosnąco,
+      - <klucz>.order.npy: indeksy tych punktów w tej samej kolejności.
+    Rekordy punktów są mapowane w pamięci prosto z input_path (bez
+    dekodowania i bez kopii pliku), więc katalog musi należeć do wejścia
+    o tej samej zawartości. Skompresowanych punktów nie da się mapować.
+    Zwraca (header, points, z_sorted, order) albo None.
+    """
+
+    key = _filter_key(settings)
+    z_path = os.path.join(working_set, f"{key}.z.npy")
+    order_path = os.path.join(working_set, f"{key}.order.npy")
+    if not (os.path.exists(z_path) and os.path.exists(order_path)):
+        return None
+
+    with laspy.open(input_path) as reader:
+        header = reader.header
+    if header.are_points_compressed:
+        return None
+    data = np.memmap(
+        input_path,
+        dtype=header.point_format.dtype(),
+        mode="r",
+        offset=header.offset_to_point_data,
+        shape=(header.point_count,)
+    )
+    points = laspy.PackedPointRecord(data, header.point_format)
+    return header, points, np.load(z_path, mmap_mode="r"), np.load(order_path, mmap_mode="r")
+
+
+def _save_working_set(working_set: str, las, mask, settings: dict):
+    """
+    Zapisuje indeks wysokości zbioru roboczego (patrz _open_working_set) dla punktów z maski.
+    Pliki powstają pod tymczasowymi nazwami i są podmieniane atomowo, więc
+    równoległe zadania na tym samym wejściu widzą tylko kompletne pliki.
+    Dla skompresowanych punktów nic nie jest zapisywane.
+    Zwraca (z_sorted, order).
+    """
+
+    indices = np.flatnonzero(mask)
+    raw_z = np.asarray(las.points.array["Z"])[indices]
+    low = int(raw_z.min())
+    if len(mask) <= np.iinfo(np.uint32).max and int(raw_z.max()) - low < 2 ** 31:
+        # Pary (Z, indeks) spakowane w int64 i jedno sortowanie - ok. 3x szybciej niż argsort
+        packed = ((raw_z.astype(np.int64) - low) << 32) | indices
+        packed.sort()
+        z_sorted = ((packed >> 32) + low).astype(raw_z.dtype)
+        order = (packed & 0xFFFFFFFF).astype(np.uint32)
+    else:
+        sort = np.argsort(raw_z)
+        z_sorted = raw_z[sort]
+        order = indices[sort]
+
+    if las.header.are_points_compressed:
+        return z_sorted, order
+
+    os.makedirs(working_set, exist_ok=True)
+    key = _filter_key(settings)
+    for name, array in ((f"{key}.z.npy", z_sorted), (f"{key}.order.npy", order)):
+        _replace_atomically(os.path.join(working_set, name), lambda f, a=array: np.save(f, a))
+
+    return z_sorted, order
+
+
+def _replace_atomically(path: str, write):
+    """write(plik) do pliku tymczasowego, potem podmiana na path"""
+
+    partial_path = f"{path}.{uuid.uuid4().hex}.partial"
+    try:
+        with open(partial_path, "wb") as f:
+            write(f)
+        os.replace(partial_path, path)
+    finally:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+
+
+def _height_mask(z_sorted, order, point_count: int, header, points_to_render: float):
+    """
+    Maska punktów na lub powyżej progu wysokości, ze zbioru roboczego:
+    próg to wyszukiwanie binarne w posortowanym surowym Z, a wybrane punkty
+    to końcówka permutacji. Wynik jest taki sam jak las.z >= threshold na
+    punktach po filtrach (min/max i porównanie z progiem liczone tak samo jak w laspy).
+    """
+
+    scale = np.float64(header.scales[2])
+    offset = np.float64(header.offsets[2])
+    min_z = z_sorted[0] * scale + offset
+    max_z = z_sorted[-1] * scale + offset
+    threshold = min_z + (max_z - min_z) * (points_to_render / 100.0)
+
+    # laspy porównuje w surowych jednostkach: raw >= round((threshold - offset) / scale)
+    raw = np.round((threshold - offset) / scale)
+    start = np.searchsorted(z_sorted, raw, side="left")
+
+    mask = np.zeros(point_count, dtype=bool)
+    mask[order[start:]] = True
+    return mask
+
+
+def inspect_file(input_path: str, sample_points: int = INSPECT_SAMPLE_POINTS,
+                 settings: dict = None):
+    """
+    Szybki podgląd metadanych pliku LAS/LAZ bez czytania całej chmury.
+    Czyta nagłówek i VLR-y, a opcjonalnie małą próbkę punktów (histogram klas,
+    percentyle Z). Działa także na obciętym pliku (np. tylko początek pliku
+    wysłany przez GUI) - wtedy próbka pochodzi z dostępnej części.
+    Jeśli podano settings, szacuje rozmiar wyniku dla tych ustawień
+    (patrz estimate_output).
+    Zwraca (success, info) albo (False, message).
+    """
+
+    if not os.path.exists(input_path):
+        return False, "Input file does not exist."
+
+    if not input_path.lower().endswith((".las", ".laz")):
+        return False, "Only LAS/LAZ files can be inspected."
+
+    try:
+        with open(input_path, "rb") as f, metrics.timed("inspect_header"):
+            header = laspy.LasHeader.read_from(f)
+
+        point_format = header.point_format
+        info = {
+            "point_count": int(header.point_count),
+            "point_format": point_format.id,
+            "point_size": point_format.size,
+            "version": str(header.version),
+            "compressed": bool(header.are_points_compressed),
+            "header_size": int(header.offset_to_point_data),
+            "mins": [float(v) for v in header.mins],
+            "maxs": [float(v) for v in header.maxs],
+            "scales": [float(v) for v in header.scales],
+            "offsets": [float(v) for v in header.offsets],
+            "extra_dimensions": list(point_format.extra_dimension_names),
+            "crs": _describe_crs(header),
+            "vlrs": [vlr.__class__.__name__ for vlr in header.vlrs],
+            "generating_software": header.generating_software,
+            "creation_date": header.creation_date.isoformat() if header.creation_date else None,
+            "file_size": os.path.getsize(input_path)
+        }
+
+        sample = _read_point_sample(input_path, header, sample_points)
+        if sample is not None:
+            classification = np.asarray(sample.classification)
+            z = np.asarray(sample.z)
+            counts = np.bincount(classification)
+            info["sample_size"] = int(len(z))
+            info["classification_histogram"] = {
+                str(c): int(n) for c, n in enumerate(counts) if n
+            }
+            info["z_percentiles"] = [float(v) for v in np.percentile(z, np.arange(101))]
+
+        if settings is not None:
+            try:
+                info.update(estimate_output(header, sample, settings))
+            except ValueError as e:
+                # Ustawienia niepasujące do pliku (np. format punktu) - metadane i tak się przydadzą
+                info["estimate_error"] = str(e)
+
+        return True, info
+
+    except Exception as e:
+        return False, f"Inspect error: {str(e)}"
+
+
+def estimate_output(header, sample, settings: dict) -> dict:
+    """
+    Szacuje liczbę punktów i rozmiar wyniku _process_las_file dla ustawień
+    na podstawie próbki z inspect_file: filtry atrybutów (klasy, echa,
+    intensywność, flagi), próg wysokości liczony na punktach po filtrach,
+    format punktu i usuwane extra bytes. Bez próbki zakłada rozkład
+    jednostajny wysokości i brak odfiltrowanych punktów. Usuwanie punktów
+    odstających nie jest uwzględniane.
+    """
+
+    points_to_render = float(settings.get("points_to_render", 10.0))
+
+    if sample is None:
+        fraction = max(1.0 - points_to_render / 100.0, 0.0)
+    else:
+        mask = _build_filter_mask(sample, settings)
+        z = np.asarray(sample.z)[mask]
+        if len(z) == 0:
+            fraction = 0.0
+        else:
+            # Bez filtrów zakres Z całego pliku jest w nagłówku, z filtrami - z próbki
+            if mask.all():
+                min_z, max_z = header.mins[2], header.maxs[2]
+            else:
+                min_z, max_z = z.min(), z.max()
+            threshold = min_z + (max_z - min_z) * (points_to_render / 100.0)
+            fraction = np.count_nonzero(z >= threshold) / len(mask)
+
+    points = int(round(header.point_count * fraction))
+    return {
+        "estimated_output_points": points,
+        "estimated_output_bytes": int(
+            header.offset_to_point_data + points * _output_point_size(header.point_format, settings)
+        )
+    }
+
+
+def _output_point_size(point_format, settings: dict) -> int:
+    """Rozmiar rekordu punktu wyniku (po output_point_format i drop_extra_dims)."""
+
+    output_point_format = settings.get("output_point_format")
+    if output_point_format in (None, "", "keep"):
+        size = point_format.num_standard_bytes
+    else:
+        target_id = check_point_format_conversion(point_format.id, output_point_format)
+        size = laspy.PointFormat(target_id).num_standard_bytes
+
+    names = _extra_dims_to_drop(point_format, settings.get("drop_extra_dims") or [])
+    return size + sum(dim.num_bytes for dim in point_format.extra_dimensions if dim.name not in names)
+
+
+def _describe_crs(header):
+    """Zwraca opis układu współrzędnych z VLR-ów (None jeśli brak lub brak pyproj)."""
+
+    try:
+        crs = header.parse_crs()
+    except Exception:
+        crs = None
+
+    if crs is None:
+        return None
+
+    return {
+        "name": crs.name,
+        "epsg": crs.to_epsg(),
+        "is_geographic": crs.is_geographic
+    }
+
+
+def _read_point_sample(input_path: str, header, sample_points: int):
+    """
+    Czyta do sample_points punktów w INSPECT_SAMPLE_BATCHES paczkach
+    rozłożonych równo po pliku. Dla obciętego, nieskompresowanego pliku
+    ogranicza się do punktów, które faktycznie są w pliku.
+    Zwraca rekord punktów próbki (ScaleAwarePointRecord) albo None, jeśli
+    próbki nie da się odczytać.
+    """
+
+    if sample_points <= 0 or header.point_count == 0:
+        return None
+
+    available = header.point_count
+    if not header.are_points_compressed:
+        data_bytes = os.path.getsize(input_path) - header.offset_to_point_data
+        available = min(available, max(data_bytes, 0) // header.point_format.size)
+    if available == 0:
+        return None
+
+    batches = min(INSPECT_SAMPLE_BATCHES, available)
+    batch_size = max(min(sample_points, available) // batches, 1)
+    starts = np.linspace(0, available - batch_size, batches).astype(np.int64)
+
+    selection = (
+        laspy.DecompressionSelection.base()
+        | laspy.DecompressionSelection.Z
+        | laspy.DecompressionSelection.CLASSIFICATION
+        | laspy.DecompressionSelection.FLAGS
+        | laspy.DecompressionSelection.INTENSITY
+    )
+
+    records = []
+    try:
+        with laspy.open(input_path, read_evlrs=False, decompression_selection=selection) as reader:
+            for start in starts:
+                reader.seek(int(start))
+                records.append(reader.read_points(batch_size).array)
+    except Exception:
+        # np. obcięty plik LAZ - bez tablicy chunków nie da się czytać punktów
+        if not records:
+            return None
+
+    return laspy.ScaleAwarePointRecord(
+        np.concatenate(records), header.point_format, header.scales, header.offsets
+    )
+
+
+def render_preview(input_path: str, output_path: str, mode: str = "height",
+                   size: int = PREVIEW_SIZE):
+    """
+    Tworzy podgląd z góry (PNG) pliku LAS/LAZ w jednym strumieniowym przebiegu.
+    mode="height": maksymalna wysokość w komórce (np.maximum.at),
+    mode="intensity": średnia intensywność w komórce (np.bincount).
+    Dłuższy bok obrazu ma size pikseli, puste komórki są przezroczyste.
+    Zwraca (success, message).
+    """
+
+    if not os.path.exists(input_path):
+        return False, "Input file does not exist."
+
+    if not input_path.lower().endswith((".las", ".laz")):
+        return False, "Only LAS/LAZ files can be previewed."
+
+    if mode not in PREVIEW_MODES:
+        return False, f"Unknown preview mode: {mode}"
+
+    try:
+        selection = (
+            laspy.DecompressionSelection.base()
+            | laspy.DecompressionSelection.Z
+            | laspy.DecompressionSelection.INTENSITY
+        )
+        with laspy.open(input_path, decompression_selection=selection) as reader, \
+                metrics.timed("preview"):
+            header = reader.header
+            min_x, min_y = header.mins[0], header.mins[1]
+            max_x, max_y = header.maxs[0], header.maxs[1]
+            cell = max(max_x - min_x, max_y - min_y, 1e-9) / size
+            width = min(max(int(math.ceil((max_x - min_x) / cell)), 1), size)
+            height = min(max(int(math.ceil((max_y - min_y) / cell)), 1), size)
+
+            cells = width * height
+            if mode == "height":
+                values = np.full(cells, -np.inf)
+            else:
+                sums = np.zeros(cells)
+                counts = np.zeros(cells)
+
+            for points in reader.chunk_iterator(STREAM_CHUNK_POINTS):
+                cols = np.clip(((np.asarray(points.x) - min_x) / cell).astype(np.int64), 0, width - 1)
+                rows = np.clip(((max_y - np.asarray(points.y)) / cell).astype(np.int64), 0, height - 1)
+                index = rows * width + cols
+                if mode == "height":
+                    np.maximum.at(values, index, np.asarray(points.z))
+                else:
+                    sums += np.bincount(index, weights=np.asarray(points.intensity), minlength=cells)
+                    counts += np.bincount(index, minlength=cells)
+
+        if mode == "height":
+            filled = np.isfinite(values)
+        else:
+            filled = counts > 0
+            values = np.divide(sums, counts, out=np.zeros(cells), where=filled)
+
+        image = _colorize(values, filled, mode).reshape(height, width, 4)
+        _write_png(output_path, image)
+
+        return True, f"Preview rendered → {output_path}"
+
+    except Exception as e:
+        return False, f"Preview error: {str(e)}"
+
+
+def _colorize(values, filled, mode: str):
+    """
+    Zamienia wartości komórek na piksele RGBA (uint8).
+    Skala rozciągana między 1. a 99. percentylem wypełnionych komórek.
+    """
+
+    rgba = np.zeros((len(values), 4), dtype=np.uint8)
+    if not filled.any():
+        return rgba
+
+    low, high = np.percentile(values[filled], [1, 99])
+    scaled = np.clip((values[filled] - low) / max(high - low, 1e-9), 0.0, 1.0)
+
+    if mode == "height":
+        # niebieski → zielony → żółty → brązowy → biały
+        stops = np.array([0.0, 0.25, 0.5, 0.75, 1.0])
+        colors = np.array([
+            [30, 60, 160], [40, 160, 70], [230, 220, 80], [140, 90, 50], [250, 250, 250]
+        ], dtype=np.float64)
+        rgb = np.column_stack([np.interp(scaled, stops, colors[:, c]) for c in range(3)])
+    else:
+        rgb = np.repeat((scaled * 255.0)[:, None], 3, axis=1)
+
+    rgba[filled, :3] = rgb.astype(np.uint8)
+    rgba[filled, 3] = 255
+    return rgba
+
+
+def _write_png(output_path: str, image):
+    """Zapisuje tablicę (wys, szer, 4) uint8 jako PNG RGBA (bez dodatkowych bibliotek)."""
+
+    height, width, _ = image.shape
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return (
+            struct.pack(">I", len(data)) + kind + data
+            + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF)
+        )
+
+    # Każdy wiersz poprzedzony bajtem filtra 0 (None)
+    rows = np.zeros((height, width * 4 + 1), dtype=np.uint8)
+    rows[:, 1:] = image.reshape(height, width * 4)
+
+    with open(output_path, "wb") as f:
+        f.write(b"\x89PNG\r\n\x1a\n")
+        f.write(chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0)))
+        f.write(chunk(b"IDAT", zlib.compress(rows.tobytes(), 6)))
+        f.write(chunk(b"IEND", b""))
+
+
+def parse_class_list(value) -> list:
+    """
+    Zamienia listę klas ("7,18", [7, 18], None) na listę intów.
+    """
+
+    if value is None:
+        return []
+    if isinstance(value, str):
+        parts = [p.strip() for p in value.replace(";", ",").split(",")]
+        return [int(p) for p in parts if p]
+    return [int(v) for v in value]
+
+
+def _build_filter_mask(points, settings: dict):
+    """
+    Buduje jedną maskę boolowską z filtrów w ustawieniach.
+    Działa bezpośrednio na surowych polach rekordu punktów (bez skalowania).
+
+    Obsługiwane klucze:
+      - exclude_classes / include_classes: lista klas ASPRS
+      - return_filter: "all" | "first" | "last" | "single" | "not_last"
+      - intensity_min / intensity_max: zakres intensywności (włącznie)
+      - drop_withheld / drop_synthetic: odrzucenie punktów z flagą
+    """
+
+    mask = np.ones(len(points), dtype=bool)
+
+    exclude_classes = parse_class_list(settings.get("exclude_classes"))
+    include_classes = parse_class_list(settings.get("include_classes"))
+    if exclude_classes or include_classes:
+        classification = np.asarray(points["classification"])
+        if include_classes:
+            mask &= np.isin(classification, include_classes)
+        if exclude_classes:
+            mask &= ~np.isin(classification, exclude_classes)
+
+    return_filter = settings.get("return_filter") or "all"
+    if return_filter != "all":
+        return_number = np.asarray(points["return_number"])
+        number_of_returns = np.asarray(points["number_of_returns"])
+        if return_filter == "first":
+            mask &= return_number <= 1
+        elif return_filter == "last":
+            mask &= return_number >= number_of_returns
+        elif return_filter == "single":
+            mask &= number_of_returns <= 1
+        elif return_filter == "not_last":
+            mask &= return_number < number_of_returns
+        else:
+            raise ValueError(f"Unknown return_filter: {return_filter}")
+
+    intensity_min = settings.get("intensity_min")
+    intensity_max = settings.get("intensity_max")
+    if intensity_min is not None or intensity_max is not None:
+        intensity = np.asarray(points["intensity"])
+        if intensity_min is not None:
+            mask &= intensity >= intensity_min
+        if intensity_max is not None:
+            mask &= intensity <= intensity_max
+
+    if settings.get("drop_withheld"):
+        mask &= ~np.asarray(points["withheld"], dtype=bool)
+    if settings.get("drop_synthetic"):
+        mask &= ~np.asarray(points["synthetic"], dtype=bool)
+
+    return mask
+
+
+def _statistical_outlier_mask(x, y, z, k: int = 8, sigma: float = 2.0,
+                              tile_points: int = OUTLIER_TILE_POINTS):
+    """
+    Statystyczne usuwanie odstających punktów (SOR).
+    Dla każdego punktu liczy średnią odległość do k najbliższych sąsiadów
+    (scipy cKDTree) i odrzuca punkty powyżej średnia + sigma * odchylenie.
+    Duże chmury są dzielone na kafle XY z zakładką (halo), żeby punkty
+    przy krawędzi kafla miały komplet sąsiadów.
+    Zwraca maskę punktów do zachowania.
+    """
+
+    try:
+        from scipy.spatial import cKDTree
+    except ImportError:
+        raise RuntimeError("Outlier removal requires scipy (pip install scipy).")
+
+    n = len(x)
+    if n <= k:
+        return np.ones(n, dtype=bool)
+
+    xyz = np.column_stack((x, y, z))
+    mean_dist = np.empty(n, dtype=np.float64)
+
+    if n <= tile_points:
+        dist, _ = cKDTree(xyz).query(xyz, k=k + 1, workers=-1)
+        mean_dist[:] = dist[:, 1:].mean(axis=1)
+    else:
+        min_x, min_y = x.min(), y.min()
+        area = max(float((x.max() - min_x) * (y.max() - min_y)), 1e-9)
+
+        # Kafel ~tile_points punktów, halo ~3x spodziewany promień k sąsiadów
+        tile_size = math.sqrt(area * tile_points / n)
+        halo = min(3.0 * math.sqrt(k * area / (math.pi * n)), tile_size)
+
+        tile_x = ((x - min_x) // tile_size).astype(np.int64)
+        tile_y = ((y - min_y) // tile_size).astype(np.int64)
+        tiles_x = int(tile_x.max()) + 1
+        tile_id = tile_y * tiles_x + tile_x
+
+        order = np.argsort(tile_id, kind="stable")
+        ids, starts, counts = np.unique(tile_id[order], return_index=True, return_counts=True)
+        tiles = {int(t): order[s:s + c] for t, s, c in zip(ids, starts, counts)}
+
+        for t, core in tiles.items():
+            ty, tx = divmod(t, tiles_x)
+
+            # Kandydaci na sąsiadów: bieżący kafel + 8 sąsiednich, przycięte do halo
+            neighbours = [
+                tiles[(ty + dy) * tiles_x + tx + dx]
+                for dy in (-1, 0, 1)
+                for dx in (-1, 0, 1)
+                if 0 <= tx + dx < tiles_x and (ty + dy) * tiles_x + tx + dx in tiles
+            ]
+            candidates = np.concatenate(neighbours)
+            x0 = min_x + tx * tile_size - halo
+            y0 = min_y + ty * tile_size - halo
+            x1 = x0 + tile_size + 2 * halo
+            y1 = y0 + tile_size + 2 * halo
+            cx, cy = x[candidates], y[candidates]
+            candidates = candidates[(cx >= x0) & (cx < x1) & (cy >= y0) & (cy < y1)]
+
+            kk = min(k + 1, len(candidates))
+            dist, _ = cKDTree(xyz[candidates]).query(xyz[core], k=kk, workers=-1)
+            dist = dist.reshape(len(core), kk)
+            mean_dist[core] = dist[:, 1:].mean(axis=1) if kk > 1 else 0.0
+
+    limit = mean_dist.mean() + sigma * mean_dist.std()
+    return mean_dist <= limit
+
+
+def _drop_extra_dims(las, names):
+    """
+    Usuwa wymiary extra bytes z las.
+    names: lista nazw (lub napis "a,b"); "*" / "all" usuwa wszystkie.
+    """
+
+    names = _extra_dims_to_drop(las.point_format, names)
+    if names:
+        las.remove_extra_dims(names)
+
+
+def _extra_dims_to_drop(point_format, names) -> list:
+    """Nazwy wymiarów extra bytes do usunięcia (ValueError dla nieistniejących)."""
+
+    if isinstance(names, str):
+        names = [n.strip() for n in names.split(",") if n.strip()]
+
+    existing = list(point_format.extra_dimension_names)
+    if any(name in ("*", "all") for name in names):
+        return existing
+
+    missing = [name for name in names if name not in existing]
+    if missing:
+        raise ValueError(f"Unknown extra dimensions: {', '.join(missing)}")
+    return names
+
+
+# Wymiary formatów 6+ bez odpowiednika danych w formatach 0-5 (kąt skanowania ma inną nazwę)
+_EQUIVALENT_DIMENSIONS = {"scan_angle", "scan_angle_rank", "overlap", "scanner_channel"}
+
+
+def resolve_point_format(source_id: int, point_format) -> int:
+    """Numer docelowego formatu punktu dla output_point_format ("compact" albo numer)."""
+
+    if point_format == "compact":
+        has_rgb = "red" in laspy.PointFormat(source_id).dimension_names
+        return 2 if has_rgb else 0
+    return int(point_format)
+
+
+def check_point_format_conversion(source_id: int, point_format):
+    """
+    Sprawdza, czy konwersja formatu punktu source_id → point_format jest
+    zmniejszeniem: format docelowy nie dodaje wymiarów (czas GPS, RGB, NIR,
+    fale) i nie ma większego rekordu. Rzuca ValueError, jeśli nie.
+    """
+
+    target_id = resolve_point_format(source_id, point_format)
+    source = laspy.PointFormat(source_id)
+    target = laspy.PointFormat(target_id)
+    added = (set(target.standard_dimension_names) - set(source.standard_dimension_names)
+             - _EQUIVALENT_DIMENSIONS)
+    if added or target.num_standard_bytes > source.num_standard_bytes:
+        detail = f"adds {', '.join(sorted(added))}" if added else "has larger records"
+        raise ValueError(
+            f"Point format {target_id} {detail} compared to the input format {source_id}, "
+            f"only conversion to a smaller format is supported."
+        )
+    return target_id
+
+
+def _convert_point_format(las, point_format):
+    """
+    Konwertuje las do mniejszego formatu punktu.
+    point_format: numer formatu albo "compact" (XYZ + RGB jeśli jest, czyli 2 lub 0).
+    Format, który dodałby wymiary albo powiększył rekord, to ValueError
+    (patrz check_point_format_conversion).
+    Wersja pliku jest obniżana do najniższej obsługującej format (np. 1.4 → 1.2).
+    Przy przejściu z formatów 6+ na starsze klasy > 31 zamieniane są na 1
+    (nieklasyfikowane), a numery ech > 7 przycinane do 7.
+    """
+
+    from laspy.point.dims import preferred_file_version_for_point_format
+
+    point_format = check_point_format_conversion(las.point_format.id, point_format)
+
+    if point_format < 6 <= las.point_format.id:
+        classification = np.asarray(las.classification)
+        las.classification = np.where(classification > 31, 1, classification)
+        las.return_number = np.minimum(np.asarray(las.return_number), 7)
+        las.number_of_returns = np.minimum(np.asarray(las.number_of_returns), 7)
+
+    return laspy.convert(
+        las,
+        point_format_id=point_format,
+        file_version=preferred_file_version_for_point_format(point_format)
+    )
+
+
+@functools.lru_cache(maxsize=16)
+def _get_transformer(source_wkt: str, target_wkt: str):
+    """Zwraca (zbuforowany) pyproj.Transformer dla pary układów."""
+
+    import pyproj
+
+    return pyproj.Transformer.from_crs(
+        pyproj.CRS.from_wkt(source_wkt),
+        pyproj.CRS.from_wkt(target_wkt),
+        always_xy=True
+    )
+
+
+def _reproject_las(las, source_header, settings: dict):
+    """
+    Przelicza X/Y/Z punktów las do settings["target_crs"] (np. "EPSG:2180").
+    Układ źródłowy czytany jest z VLR pliku wejściowego, chyba że podano
+    settings["source_crs"]. Transformacja idzie paczkami po
+    REPROJECT_BATCH_POINTS punktów, po czym przeliczane są offsety i skale
+    oraz zapisywany jest VLR nowego układu.
+    """
+
+    try:
+        import pyproj
+    except ImportError:
+        raise RuntimeError("Reprojection requires pyproj (pip install pyproj).")
+
+    if settings.get("source_crs"):
+        source_crs = pyproj.CRS.from_user_input(settings["source_crs"])
+    else:
+        source_crs = source_header.parse_crs()
+    if source_crs is None:
+        raise ValueError("Input file has no CRS VLR, set source_crs explicitly.")
+
+    target_crs = pyproj.CRS.from_user_input(settings["target_crs"])
+    transformer = _get_transformer(source_crs.to_wkt(), target_crs.to_wkt())
+
+    count = len(las.points)
+    x = np.empty(count, dtype=np.float64)
+    y = np.empty(count, dtype=np.float64)
+    z = np.empty(count, dtype=np.float64)
+
+    for start in range(0, count, REPROJECT_BATCH_POINTS):
+        batch = slice(start, start + REPROJECT_BATCH_POINTS)
+        x[batch], y[batch], z[batch] = transformer.transform(
+            np.asarray(las.x[batch]),
+            np.asarray(las.y[batch]),
+            np.asarray(las.z[batch])
+        )
+
+    # Skale: stopnie wymagają dużo drobniejszej siatki niż metry
+    scales = np.array(source_header.scales, dtype=np.float64)
+    if target_crs.is_geographic:
+        scales[:2] = 1e-7
+    elif source_crs.is_geographic:
+        scales[:2] = 0.001
+
+    offsets = np.array(source_header.offsets, dtype=np.float64)
+    if count:
+        offsets[0] = math.floor(x.min())
+        offsets[1] = math.floor(y.min())
+        offsets[2] = math.floor(z.min())
+
+    las.header.offsets = offsets
+    las.header.scales = scales
+    las.x = x
+    las.y = y
+    las.z = z
+
+    las.header.add_crs(target_crs)
+
+
+def merge_files(input_paths: list, output_path: str):
+    """
+    Łączy kilka plików LAS/LAZ w jeden (strumieniowo, paczkami punktów).
+    Wszystkie pliki muszą mieć ten sam format punktu.
+    Granice w nagłówku wyniku są przeliczane na nowo.
+    Zwraca (success, message).
+    """
+
+    if not input_paths:
+        return False, "No input files given."
+
+    for path in input_paths:
+        if not os.path.exists(path):
+            return False, f"Input file does not exist: {path}"
+        if not path.lower().endswith((".las", ".laz")):
+            return False, f"Only LAS/LAZ files can be merged: {path}"
+
+    output_dir = os.path.dirname(output_path)
+    if output_dir and not os.path.exists(output_dir):
+        return False, "Output folder does not exist."
+
+    try:
+        headers = []
+        for path in input_paths:
+            with laspy.open(path) as reader:
+                headers.append(reader.header)
+
+        point_format = headers[0].point_format
+        for path, header in zip(input_paths, headers):
+            if header.point_format != point_format:
+                return False, (
+                    f"Point format mismatch: {os.path.basename(path)} has format "
+                    f"{header.point_format.id}, expected {point_format.id}"
+                )
+
+        # Nagłówek wyniku: VLR-y pierwszego pliku, najdrobniejsza skala, wspólny offset
+        header = copy.deepcopy(headers[0])
+        header.scales = np.min([h.scales for h in headers], axis=0)
+        header.offsets = np.floor(np.min([h.mins for h in headers], axis=0))
+
+        total = 0
+        with laspy.open(output_path, mode="w", header=header) as writer, metrics.timed("merge"):
+            for path in input_paths:
+                with laspy.open(path) as reader:
+                    for points in reader.chunk_iterator(STREAM_CHUNK_POINTS):
+                        writer.write_points(points)
+                        total += len(points)
+
+        metrics.POINTS_PROCESSED.inc(total, direction="in")
+        metrics.POINTS_PROCESSED.inc(total, direction="out")
+        return True, f"Merged {len(input_paths)} files ({total} points) → {output_path}"
+
+    except Exception as e:
+        return False, f"Merge error: {str(e)}"
+
+
+def retile_file(input_path: str, output_dir: str, tile_size: float,
+                max_open_writers: int = MAX_OPEN_TILE_WRITERS):
+    """
+    Dzieli plik LAS/LAZ na regularną siatkę kafli tile_size x tile_size.
+    Plik czytany jest strumieniowo, każdy kafel ma własny writer; otwartych
+    jest co najwyżej max_open_writers plików naraz (najdawniej używany jest
+    zamykany i w razie potrzeby otwierany ponownie w trybie dopisywania).
+    Kafle nazywane są {nazwa}_{ix}_{iy}{ext}, gdzie ix = floor(x / tile_size).
+    Zwraca (success, message).
+    """
+
+    if not os.path.exists(input_path):
+        return False, "Input file does not exist."
+
+    if not input_path.lower().endswith((".las", ".laz")):
+        return False, "Only LAS/LAZ files can be retiled."
+
+    if not os.path.isdir(output_dir):
+        return False, "Output folder does not exist."
+
+    if tile_size <= 0:
+        return False, "Tile size must be greater than 0."
+
+    stem, ext = os.path.splitext(os.path.basename(input_path))
+    writers = OrderedDict()
+    tile_paths = set()
+
+    def get_writer(tile, header):
+        if tile in writers:
+            writers.move_to_end(tile)
+            return writers[tile]
+
+        if len(writers) >= max_open_writers:
+            _, oldest = writers.popitem(last=False)
+            oldest.close()
+
+        path = os.path.join(output_dir, f"{stem}_{tile[0]}_{tile[1]}{ext}")
+        if path in tile_paths:
+            writer = laspy.open(path, mode="a")
+        else:
+            writer = laspy.open(path, mode="w", header=header)
+            tile_paths.add(path)
+        writers[tile] = writer
+        return writer
+
+    try:
+        with laspy.open(input_path) as reader, metrics.timed("retile"):
+            for points in reader.chunk_iterator(STREAM_CHUNK_POINTS):
+                tile_x = np.floor(np.asarray(points.x) / tile_size).astype(np.int64)
+                tile_y = np.floor(np.asarray(points.y) / tile_size).astype(np.int64)
+
+                # Grupowanie paczki po kaflach jednym sortowaniem
+                keys = np.stack((tile_x, tile_y), axis=1)
+                tiles, inverse = np.unique(keys, axis=0, return_inverse=True)
+                inverse = inverse.ravel()
+                order = np.argsort(inverse, kind="stable")
+                bounds = np.searchsorted(inverse[order], np.arange(len(tiles) + 1))
+
+                for i, (tx, ty) in enumerate(tiles):
+                    selection = order[bounds[i]:bounds[i + 1]]
+                    writer = get_writer((int(tx), int(ty)), reader.header)
+                    # LasAppender (ponownie otwarty kafel) ma append_points zamiast write_points
+                    write = getattr(writer, "append_points", None) or writer.write_points
+                    write(points[selection])
+
+        metrics.POINTS_PROCESSED.inc(reader.header.point_count, direction="in")
+        metrics.POINTS_PROCESSED.inc(reader.header.point_count, direction="out")
+        return True, f"Retiled into {len(tile_paths)} tiles → {output_dir}"
+
+    except Exception as e:
+        return False, f"Retile error: {str(e)}"
+
+    finally:
+        for writer in writers.values():
+            writer.close()
+
+
 def move_to_downloads(file_path):
     """Przenosi plik do folderu ~/Downloads"""
 
@@ -1,20 +1,61 @@
 """
 FastAPI server exposing Logic.py functions as REST API endpoints
 """
-from fastapi import FastAPI, HTTPException, UploadFile, File, Form
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi import FastAPI, HTTPException, UploadFile, File, Form, Depends, Request
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
-from typing import Optional
+from fastapi.concurrency import run_in_threadpool
+from starlette.background import BackgroundTask
+from pydantic import BaseModel, TypeAdapter, ValidationError
+from typing import Optional, List
 import os
+import inspect
+import json
 import tempfile
 import shutil
+import hashlib
+import re
+import uuid
+import time
+import asyncio
+import threading
+import anyio
+from contextlib import asynccontextmanager
 from pathlib import Path
 import Logic
+import metrics
+import profiling
+import storage
+import state
+import lazy_import
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Register this worker process and run the working directory janitor while the server is up"""
+    await run_in_threadpool(state_store.heartbeat)
+    heartbeat_task = asyncio.create_task(_heartbeat_loop())
+    janitor_task = asyncio.create_task(_janitor_loop())
+    # NumPy / laspy are imported lazily; load them in the background so /health
+    # answers right away and the first job does not wait for the imports
+    preload_task = None
+    if PRELOAD_MODULES:
+        preload_task = asyncio.create_task(
+            run_in_threadpool(lazy_import.preload, Logic.np, Logic.laspy)
+        )
+    yield
+    janitor_task.cancel()
+    heartbeat_task.cancel()
+    if preload_task:
+        preload_task.cancel()
+    await run_in_threadpool(state_store.unregister)
+
 
 app = FastAPI(
     title="LAS File Processing API",
     description="API for processing LAS files and other file operations",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Enable CORS for all origins (adjust in production)
@@ -29,8 +70,748 @@ app.add_middleware(
 # Create uploads and outputs directories if they don't exist
 UPLOAD_DIR = Path("uploads")
 OUTPUT_DIR = Path("outputs")
+PREVIEW_DIR = Path("previews")
+PROFILE_DIR = Path("profiles")
+RESULT_DIR = Path("results")
+WORKSET_DIR = Path("worksets")
 UPLOAD_DIR.mkdir(exist_ok=True)
 OUTPUT_DIR.mkdir(exist_ok=True)
+PREVIEW_DIR.mkdir(exist_ok=True)
+PROFILE_DIR.mkdir(exist_ok=True)
+RESULT_DIR.mkdir(exist_ok=True)
+WORKSET_DIR.mkdir(exist_ok=True)
+
+# Upload/hash buffer size
+COPY_BUFFER_SIZE = 1024 * 1024
+
+# Part of every result cache key, bump when Logic output for the same settings changes
+RESULT_CACHE_VERSION = 1
+
+# Maximum number of processing jobs running at once on this host (across all
+# server worker processes), further jobs wait in a queue
+MAX_WORKERS = int(os.environ.get("API_MAX_WORKERS", os.cpu_count() or 1))
+metrics.WORKERS.set(MAX_WORKERS)
+
+# State shared by the server worker processes (job registry, job slots, files in use)
+STATE_DB = Path(os.environ.get("API_STATE_DB", "state/api.sqlite3"))
+state_store = state.StateStore(STATE_DB)
+
+# How often a job checks whether its client has disconnected (seconds)
+DISCONNECT_POLL_INTERVAL = 0.5
+
+# How often a worker checks for free slots for its queued jobs / reports it is alive (seconds)
+SLOT_POLL_INTERVAL = 0.05
+HEARTBEAT_INTERVAL = 5
+
+# Import the processing libraries in the background after start-up (0 = on first job)
+PRELOAD_MODULES = os.environ.get("API_PRELOAD", "1").lower() not in ("0", "false", "no")
+
+# Unused job outputs, cached previews and profiles are removed after this many seconds
+OUTPUT_TTL = float(os.environ.get("API_OUTPUT_TTL", 24 * 60 * 60))
+
+# Working sets (sorted height index of an input, 8 bytes per point) are removed after this
+# many seconds without a job, re-runs with other settings within it skip reading and filtering
+WORKSET_TTL = float(os.environ.get("API_WORKSET_TTL", 10 * 60))
+
+# Total disk space for the working directories in MB (0 = no quota), least recently used entries go first
+DISK_QUOTA_MB = float(os.environ.get("API_DISK_QUOTA_MB", 10 * 1024))
+
+# Seconds between janitor sweeps (a sweep also runs shortly after every job)
+JANITOR_INTERVAL = float(os.environ.get("API_JANITOR_INTERVAL", 60))
+
+# Default for the delete_after_download form field
+DELETE_AFTER_DOWNLOAD = os.environ.get("API_DELETE_AFTER_DOWNLOAD", "").lower() in ("1", "true", "yes")
+
+janitor = storage.Janitor(
+    [UPLOAD_DIR, OUTPUT_DIR, PREVIEW_DIR, PROFILE_DIR, RESULT_DIR, WORKSET_DIR],
+    ttl=OUTPUT_TTL,
+    quota_bytes=int(DISK_QUOTA_MB * 1024 * 1024),
+    store=state_store,
+    ttls={WORKSET_DIR: WORKSET_TTL}
+)
+_sweep_requested = asyncio.Event()
+
+
+async def _heartbeat_loop():
+    """Keep this worker registered; also releases jobs and files of workers that died"""
+    while True:
+        await asyncio.sleep(HEARTBEAT_INTERVAL)
+        try:
+            await run_in_threadpool(state_store.heartbeat)
+        except Exception as e:
+            print(f"State heartbeat failed: {e}")
+
+
+async def _janitor_loop():
+    """Sweep the working directories every JANITOR_INTERVAL seconds or after a job"""
+    while True:
+        try:
+            await asyncio.wait_for(_sweep_requested.wait(), JANITOR_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
+        _sweep_requested.clear()
+        try:
+            # With several worker processes only one sweeps at a time
+            if await run_in_threadpool(state_store.try_lease, "janitor", 10 * 60):
+                try:
+                    await run_in_threadpool(janitor.sweep)
+                    await run_in_threadpool(state_store.prune_jobs, OUTPUT_TTL)
+                finally:
+                    await run_in_threadpool(state_store.release_lease, "janitor")
+        except Exception as e:
+            print(f"Janitor sweep failed: {e}")
+        # Under sustained load sweep at most once per second
+        await asyncio.sleep(1)
+
+
+async def _store_call(func, *args):
+    """
+    Run a blocking state store / janitor call on a worker thread (they are
+    SQLite writes shared by all workers). Shielded from cancellation, so a
+    cancelled request still releases its marks and finishes its job.
+    """
+    with anyio.CancelScope(shield=True):
+        return await run_in_threadpool(func, *args)
+
+
+@asynccontextmanager
+async def _in_use(*paths):
+    """janitor.in_use() for async code"""
+    await _store_call(janitor.acquire, *paths)
+    try:
+        yield
+    finally:
+        await _store_call(janitor.release, *paths)
+
+
+@asynccontextmanager
+async def _job_workspace():
+    """
+    Unique upload and output directories for one request, so concurrent
+    uploads with the same file name never share a path. The upload directory
+    is removed afterwards; outputs stay until downloaded (delete after
+    download) or removed by the janitor, and are discarded if the request fails.
+    """
+    job_id = uuid.uuid4().hex
+    upload_dir = UPLOAD_DIR / job_id
+    output_dir = OUTPUT_DIR / job_id
+    async with _in_use(upload_dir, output_dir):
+        upload_dir.mkdir(parents=True)
+        output_dir.mkdir(parents=True)
+        try:
+            yield upload_dir, output_dir
+        except BaseException:
+            shutil.rmtree(output_dir, ignore_errors=True)
+            raise
+        finally:
+            shutil.rmtree(upload_dir, ignore_errors=True)
+            try:
+                output_dir.rmdir()  # only if nothing was written
+            except OSError:
+                pass
+
+
+class RequestStartMiddleware:
+    """
+    Remember when the request started (request.state.started, used for upload
+    receive timing). A plain ASGI middleware: unlike @app.middleware("http")
+    it passes the receive channel through, so endpoints see client disconnects.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            scope.setdefault("state", {})["started"] = time.perf_counter()
+        await self.app(scope, receive, send)
+
+
+app.add_middleware(RequestStartMiddleware)
+
+
+class JobCancelled(Exception):
+    """Raised to stop a job whose client has gone away"""
+
+
+@asynccontextmanager
+async def _cancel_on_disconnect(request: Request):
+    """
+    Event that is set once the client disconnects while the block runs,
+    pass it to _run_job(cancel=...) so an abandoned job stops.
+    """
+    cancel = threading.Event()
+    
+    async def watch():
+        while not await request.is_disconnected():
+            await asyncio.sleep(DISCONNECT_POLL_INTERVAL)
+        cancel.set()
+    
+    watcher = asyncio.create_task(watch())
+    try:
+        yield cancel
+    finally:
+        watcher.cancel()
+
+
+def _stop_when(cancel: threading.Event):
+    """Logic progress callback that stops the job at its next stage once cancel is set"""
+    def progress(fraction, stage):
+        if cancel.is_set():
+            raise JobCancelled("client disconnected")
+    return progress
+
+
+class _SlotScheduler:
+    """
+    Starts the queued jobs of this worker process. One loop asks the shared
+    store which of them may start, in one transaction per tick on a worker
+    thread, instead of every queued job polling it from the event loop.
+    """
+    
+    def __init__(self):
+        self.loop = asyncio.get_running_loop()
+        self._waiting = {}
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+    
+    async def wait(self, job_id: str, cancel: Optional[threading.Event] = None):
+        """Wait until the queued job may run; raises JobCancelled once cancel is set"""
+        future = self.loop.create_future()
+        self._waiting[job_id] = (future, cancel)
+        self._wake.set()
+        try:
+            await future
+        finally:
+            self._waiting.pop(job_id, None)
+    
+    async def _run(self):
+        while True:
+            if not self._waiting:
+                self._wake.clear()
+                await self._wake.wait()
+            
+            for future, cancel in list(self._waiting.values()):
+                if cancel is not None and cancel.is_set() and not future.done():
+                    future.set_exception(JobCancelled("client disconnected"))
+            job_ids = [job_id for job_id, (future, _) in self._waiting.items() if not future.done()]
+            try:
+                started = await run_in_threadpool(state_store.start_jobs, job_ids, MAX_WORKERS)
+            except Exception as e:
+                print(f"Starting queued jobs failed: {e}")
+                started = []
+            for job_id in started:
+                future, _ = self._waiting.get(job_id, (None, None))
+                if future is not None and not future.done():
+                    future.set_result(True)
+            
+            await asyncio.sleep(SLOT_POLL_INTERVAL)
+
+
+_slot_scheduler_instance = None
+
+
+def _slot_scheduler() -> _SlotScheduler:
+    """Scheduler of this worker process (one per event loop)"""
+    global _slot_scheduler_instance
+    if _slot_scheduler_instance is None or _slot_scheduler_instance.loop is not asyncio.get_running_loop():
+        _slot_scheduler_instance = _SlotScheduler()
+    return _slot_scheduler_instance
+
+
+async def _run_job(kind: str, func, *args, job_id: Optional[str] = None,
+                   profile_to: Optional[str] = None, cancel: Optional[threading.Event] = None,
+                   **kwargs):
+    """
+    Run a blocking Logic function on a worker thread without blocking the event loop.
+    At most MAX_WORKERS jobs run at once across all server processes; the job
+    is registered under job_id (a new id if not given) in the shared job
+    registry, so any worker can report its status at /api/jobs/{job_id}.
+    Queue depth, active workers, peak RSS and job status are recorded in metrics.
+    With profile_to set, the job is profiled in its own worker process (see
+    profiling.profile_job) and the artifact saved there.
+    Once cancel is set, a queued job is dropped with JobCancelled.
+    """
+    job_id = job_id or uuid.uuid4().hex
+    await _store_call(state_store.add_job, job_id, kind)
+    success, message = False, "cancelled"
+    metrics.JOBS_QUEUED.inc()
+    queued = True
+    try:
+        try:
+            await _slot_scheduler().wait(job_id, cancel)
+        except JobCancelled:
+            message = "cancelled: client disconnected"
+            raise
+        metrics.JOBS_QUEUED.dec()
+        queued = False
+        metrics.JOBS_ACTIVE.inc()
+        try:
+            def job():
+                with metrics.track_peak_rss(kind), metrics.timed(f"job_{kind}"):
+                    if profile_to:
+                        return profiling.profile_job(profile_to, func, *args, **kwargs)
+                    return func(*args, **kwargs)
+            
+            result = await run_in_threadpool(job)
+        except Exception as e:
+            message = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            metrics.JOBS_ACTIVE.dec()
+        
+        success = result[0] if isinstance(result, tuple) else bool(result)
+        message = result[1] if isinstance(result, tuple) and isinstance(result[-1], str) else None
+    finally:
+        if queued:
+            metrics.JOBS_QUEUED.dec()
+        await _store_call(state_store.finish_job, job_id, success, message)
+    
+    metrics.JOBS_TOTAL.inc(kind=kind, status="success" if success else "error")
+    _sweep_requested.set()
+    return result
+
+
+class _ManagedFileResponse(FileResponse):
+    """FileResponse whose file is protected from the janitor until it has been sent"""
+    
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            await _store_call(janitor.release, self.path)
+
+
+async def _file_response(path, filename=None, media_type="application/octet-stream", headers=None, delete_after=None):
+    """
+    FileResponse that records send time and sent bytes once the body is delivered.
+    With delete_after set, that file or directory is removed after sending.
+    """
+    size = os.path.getsize(path)
+    started = time.perf_counter()
+    janitor.touch(path)
+    await _store_call(janitor.acquire, str(path))
+    
+    def sent():
+        metrics.STAGE_DURATION.observe(time.perf_counter() - started, stage="response_send")
+        metrics.BYTES_TRANSFERRED.inc(size, direction="out")
+        if delete_after is not None:
+            storage.remove_path(delete_after)
+            metrics.STORAGE_EVICTIONS.inc(reason="download")
+    
+    return _ManagedFileResponse(
+        path=str(path),
+        filename=filename,
+        media_type=media_type,
+        headers=headers,
+        background=BackgroundTask(sent)
+    )
+
+
+def _save_upload(file: UploadFile, path: Path, request: Request = None) -> str:
+    """
+    Save an uploaded file to path, returns the sha256 of its content.
+    Blocking (copies and hashes the whole file), call it through run_in_threadpool.
+    With request given, upload receive time (request start until the file
+    is stored, including multipart parsing) is recorded in metrics.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    with open(path, "wb") as buffer:
+        while True:
+            block = file.file.read(COPY_BUFFER_SIZE)
+            if not block:
+                break
+            digest.update(block)
+            buffer.write(block)
+            size += len(block)
+    
+    metrics.BYTES_TRANSFERRED.inc(size, direction="in")
+    if request is not None:
+        metrics.STAGE_DURATION.observe(
+            time.perf_counter() - request.state.started,
+            stage="upload_receive"
+        )
+    return digest.hexdigest()
+
+
+def _file_hash(path: str) -> str:
+    """sha256 of a file's content"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while True:
+            block = f.read(COPY_BUFFER_SIZE)
+            if not block:
+                break
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _preview_path(content_hash: str, mode: str, size: int) -> Path:
+    """Location of a cached preview for the given file content and options"""
+    return PREVIEW_DIR / f"{content_hash}_{mode}_{size}.png"
+
+
+def _validate_preview_options(mode: str, size: int):
+    """Validate preview query/form options"""
+    if mode not in Logic.PREVIEW_MODES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid mode. Must be one of: {', '.join(Logic.PREVIEW_MODES)}"
+        )
+    if not 16 <= size <= 2048:
+        raise HTTPException(status_code=400, detail="size must be between 16 and 2048")
+
+
+async def _render_cached_preview(input_path: str, content_hash: str, mode: str, size: int) -> FileResponse:
+    """Render a preview unless it is already cached, and return it"""
+    preview_path = _preview_path(content_hash, mode, size)
+    
+    if preview_path.exists():
+        metrics.CACHE_REQUESTS.inc(cache="preview", result="hit")
+    else:
+        metrics.CACHE_REQUESTS.inc(cache="preview", result="miss")
+        # Render to a temporary name so concurrent requests never see a partial PNG
+        partial_path = preview_path.with_suffix(f".{uuid.uuid4().hex}.partial")
+        async with _in_use(partial_path):
+            success, message = await _run_job(
+                "preview", Logic.render_preview, input_path, str(partial_path), mode, size
+            )
+            if not success:
+                storage.remove_path(partial_path)
+                raise HTTPException(status_code=400, detail=message)
+            os.replace(partial_path, preview_path)
+    
+    return await _file_response(
+        preview_path,
+        media_type="image/png",
+        headers={"X-Content-Hash": content_hash}
+    )
+
+
+def profile_requested(request: Request, profile: bool = Form(False)) -> bool:
+    """
+    Whether the job should be profiled: `profile` form field or `X-Profile: 1` header.
+    """
+    return profile or request.headers.get("X-Profile", "").lower() in ("1", "true", "yes")
+
+
+def _new_profile_path(enabled: bool):
+    """Returns (profile_id, artifact path) for a profiled job, (None, None) otherwise"""
+    if not enabled:
+        return None, None
+    profile_id = uuid.uuid4().hex
+    return profile_id, str(PROFILE_DIR / f"{profile_id}.zip")
+
+
+def delete_after_download_requested(delete_after_download: Optional[bool] = Form(None)) -> bool:
+    """
+    Whether the job output is removed as soon as it has been sent
+    (`delete_after_download` form field, default from API_DELETE_AFTER_DOWNLOAD).
+    """
+    return DELETE_AFTER_DOWNLOAD if delete_after_download is None else delete_after_download
+
+
+def _job_headers(job_id: Optional[str], profile_id: Optional[str] = None,
+                 preset: Optional[dict] = None) -> dict:
+    """
+    Response headers with the job id and, if set, the profile artifact of a
+    job and the preset version it used
+    """
+    headers = {}
+    if job_id is not None:
+        headers["X-Job-Id"] = job_id
+    if profile_id is not None:
+        headers["X-Profile-Id"] = profile_id
+        headers["X-Profile-Url"] = f"/api/profiles/{profile_id}"
+    if preset is not None:
+        headers["X-Preset"] = f"{preset['id']}@{preset['version']}"
+    return headers
+
+
+RETURN_FILTERS = ["all", "first", "last", "single", "not_last"]
+POINT_FORMATS = ["keep", "compact"] + [str(i) for i in range(11)]
+
+
+def processing_settings(
+    output_format: str = Form(".las"),
+    points_to_render: float = Form(10.0),
+    exclude_classes: str = Form(""),
+    include_classes: str = Form(""),
+    return_filter: str = Form("all"),
+    intensity_min: Optional[int] = Form(None),
+    intensity_max: Optional[int] = Form(None),
+    drop_withheld: bool = Form(False),
+    drop_synthetic: bool = Form(False),
+    remove_outliers: bool = Form(False),
+    outlier_neighbors: int = Form(8),
+    outlier_sigma: float = Form(2.0),
+    target_crs: str = Form(""),
+    source_crs: str = Form(""),
+    output_point_format: str = Form("keep"),
+    drop_extra_dims: str = Form("")
+) -> dict:
+    """
+    Validate processing form fields and convert them to Logic settings.
+    
+    - **output_format**: Output format (.las, .txt, .csv)
+    - **points_to_render**: Percentage of points to render (10.0-100.0)
+    - **exclude_classes** / **include_classes**: Comma separated ASPRS classes (e.g. "7,18")
+    - **return_filter**: all, first, last, single or not_last
+    - **intensity_min** / **intensity_max**: Inclusive intensity range
+    - **drop_withheld** / **drop_synthetic**: Drop points with these flags set
+    - **remove_outliers**: Statistical outlier removal before the height threshold
+    - **outlier_neighbors** / **outlier_sigma**: Neighbour count (k) and sigma limit for outlier removal
+    - **target_crs**: Reproject output to this CRS (e.g. "EPSG:2180"), empty keeps the input CRS
+    - **source_crs**: Override the input CRS when the file has no CRS VLR
+    - **output_point_format**: keep, compact (XYZ + RGB if present) or a point format id (0-10)
+      that is smaller than the input's (no added dimensions, no larger records); classes
+      above 31 become 1 when converting from formats 6-10 to 0-5
+    - **drop_extra_dims**: Comma separated extra bytes dimensions to drop, "*" drops all
+      (names and the point format are checked against the input file when the job is submitted)
+    """
+    # Validate output format
+    if output_format not in [".las", ".txt", ".csv"]:
+        raise HTTPException(
+            status_code=400,
+            detail="Invalid output_format. Must be .las, .txt, or .csv"
+        )
+    
+    # Validate points_to_render
+    if not 10.0 <= points_to_render <= 100.0:
+        raise HTTPException(
+            status_code=400,
+            detail="points_to_render must be between 10.0 and 100.0"
+        )
+    
+    # Validate point filters
+    try:
+        exclude = Logic.parse_class_list(exclude_classes)
+        include = Logic.parse_class_list(include_classes)
+    except ValueError:
+        raise HTTPException(
+            status_code=400,
+            detail="exclude_classes/include_classes must be comma separated integers"
+        )
+    
+    if return_filter not in RETURN_FILTERS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid return_filter. Must be one of: {', '.join(RETURN_FILTERS)}"
+        )
+    
+    if intensity_min is not None and intensity_max is not None and intensity_min > intensity_max:
+        raise HTTPException(
+            status_code=400,
+            detail="intensity_min must not be greater than intensity_max"
+        )
+    
+    # Validate outlier removal
+    if outlier_neighbors < 1 or outlier_sigma <= 0:
+        raise HTTPException(
+            status_code=400,
+            detail="outlier_neighbors must be >= 1 and outlier_sigma must be > 0"
+        )
+    
+    # Validate output point format
+    if output_point_format not in POINT_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid output_point_format. Must be one of: {', '.join(POINT_FORMATS)}"
+        )
+    
+    # Validate coordinate systems
+    for field, value in (("target_crs", target_crs), ("source_crs", source_crs)):
+        if value.strip():
+            _validate_crs(field, value.strip())
+    
+    return {
+        "output_format": output_format,
+        "points_to_render": points_to_render,
+        "exclude_classes": exclude,
+        "include_classes": include,
+        "return_filter": return_filter,
+        "intensity_min": intensity_min,
+        "intensity_max": intensity_max,
+        "drop_withheld": drop_withheld,
+        "drop_synthetic": drop_synthetic,
+        "remove_outliers": remove_outliers,
+        "outlier_neighbors": outlier_neighbors,
+        "outlier_sigma": outlier_sigma,
+        "target_crs": target_crs.strip(),
+        "source_crs": source_crs.strip(),
+        "output_point_format": output_point_format,
+        "drop_extra_dims": drop_extra_dims.strip()
+    }
+
+
+def _validate_crs(field: str, value: str):
+    """Raise 400 unless value is a CRS pyproj understands (e.g. "EPSG:2180")"""
+    try:
+        import pyproj
+    except ImportError:
+        raise HTTPException(
+            status_code=400,
+            detail=f"{field} requires reprojection, which is not available (pyproj is not installed)"
+        )
+    try:
+        pyproj.CRS.from_user_input(value)
+    except pyproj.exceptions.CRSError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid {field}: {e}")
+
+
+def _validate_for_input(input_path: str, settings: dict):
+    """
+    Raise 400 if the settings do not fit the input LAS file: drop_extra_dims
+    names a dimension it does not have, or output_point_format is not smaller
+    than its point format. Only the header is read; these can only be checked
+    once the input is known.
+    """
+    names = [name.strip() for name in settings.get("drop_extra_dims", "").split(",") if name.strip()]
+    check_names = names and not any(name in ("*", "all") for name in names)
+    check_format = settings.get("output_point_format", "keep") != "keep"
+    if not (check_names or check_format) or not input_path.lower().endswith(".las"):
+        return
+    try:
+        with Logic.laspy.open(input_path) as reader:
+            point_format = reader.header.point_format
+    except Exception:
+        # Unreadable input: the job reports it
+        return
+    
+    if check_names:
+        existing = set(point_format.extra_dimension_names)
+        missing = [name for name in names if name not in existing]
+        if missing:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown extra dimensions in drop_extra_dims: {', '.join(missing)}"
+            )
+    if check_format:
+        try:
+            Logic.check_point_format_conversion(point_format.id, settings["output_point_format"])
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid output_point_format: {e}")
+
+
+def _settings_from_fields(fields: dict):
+    """
+    Validate processing form fields given as a dict (e.g. preset settings),
+    missing fields take their form defaults.
+    Returns (normalized fields, Logic settings).
+    """
+    params = inspect.signature(processing_settings).parameters
+    unknown = sorted(set(fields) - set(params))
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown settings: {', '.join(unknown)}")
+    
+    normalized = {}
+    for name, param in params.items():
+        value = fields.get(name, param.default.default)
+        try:
+            normalized[name] = TypeAdapter(param.annotation).validate_python(value)
+        except ValidationError:
+            raise HTTPException(status_code=400, detail=f"Invalid value for {name}: {value!r}")
+    return normalized, processing_settings(**normalized)
+
+
+def _settings_digest(settings: dict) -> str:
+    """Digest of Logic settings; equal settings have equal digests, whoever sent them"""
+    canonical = json.dumps(settings, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def _parse_preset_reference(reference: str):
+    """Parse "<id>" (latest version) or "<id>@<version>", returns (id, version or None)"""
+    preset_id, _, version = reference.strip().partition("@")
+    if not re.fullmatch(r"[0-9a-f]{32}", preset_id) or (version and not version.isdigit()):
+        raise HTTPException(status_code=400, detail="Invalid preset reference, expected <id> or <id>@<version>")
+    return preset_id, int(version) if version else None
+
+
+def preset_requested(preset: Optional[str] = Form(None)) -> Optional[dict]:
+    """
+    Preset referenced by the `preset` form field ("<id>" for the latest
+    version, "<id>@<version>" for a fixed one), None without it.
+    """
+    if not preset:
+        return None
+    record = state_store.get_preset(*_parse_preset_reference(preset))
+    if record is None:
+        raise HTTPException(status_code=404, detail="Preset not found")
+    return record
+
+
+def job_settings(
+    preset: Optional[dict] = Depends(preset_requested),
+    settings: dict = Depends(processing_settings)
+) -> dict:
+    """
+    Logic settings of a job: those of the referenced preset if there is one
+    (the other processing fields are then ignored), otherwise from the form.
+    """
+    if preset is None:
+        return settings
+    return _settings_from_fields(preset["settings"])[1]
+
+
+def _result_path(content_hash: str, settings: dict) -> Path:
+    """Result cache entry for an input content and settings"""
+    key = hashlib.sha256(
+        f"{RESULT_CACHE_VERSION}:{content_hash}:{_settings_digest(settings)}".encode()
+    ).hexdigest()
+    return RESULT_DIR / f"{key}{settings['output_format']}"
+
+
+def _store_result(output_path: Path, result_path: Path):
+    """Add a job output to the result cache (hard link if possible, otherwise a copy)"""
+    partial_path = result_path.with_suffix(f".{uuid.uuid4().hex}.partial")
+    with janitor.in_use(partial_path):
+        try:
+            os.link(output_path, partial_path)
+        except OSError:
+            shutil.copyfile(output_path, partial_path)
+        os.replace(partial_path, result_path)
+
+
+def _working_set_path(content_hash: str) -> Path:
+    """Working set directory of an input content (see Logic.process_file)"""
+    return WORKSET_DIR / content_hash
+
+
+def _local_working_set_path(input_path: str) -> Optional[Path]:
+    """
+    Working set directory of a server-side file, keyed by its path, size and
+    modification time (hashing the content would cost as much as a re-run).
+    None if the file cannot be read.
+    """
+    try:
+        stat = os.stat(input_path)
+    except OSError:
+        return None
+    identity = f"{os.path.realpath(input_path)}:{stat.st_size}:{stat.st_mtime_ns}"
+    return _working_set_path(hashlib.sha256(identity.encode()).hexdigest())
+
+
+async def _run_process_job(input_path: str, output_path: str, settings: dict,
+                           working_set: Optional[Path], **kwargs):
+    """
+    Run Logic.process_file with the input's working set, which is protected from
+    the janitor while the job runs and stays for WORKSET_TTL after the last one.
+    With cancel=... the job also stops at its next stage once the event is set.
+    """
+    if kwargs.get("cancel") is not None:
+        kwargs["progress"] = _stop_when(kwargs["cancel"])
+    if working_set is None:
+        return await _run_job("process", Logic.process_file, input_path, output_path, settings, **kwargs)
+    async with _in_use(working_set):
+        try:
+            return await _run_job(
+                "process", Logic.process_file, input_path, output_path, settings,
+                working_set=str(working_set), **kwargs
+            )
+        finally:
+            janitor.touch(working_set)
 
 
 @app.get("/")
@@ -49,128 +830,558 @@ async def health():
     return {"status": "healthy"}
 
 
+@app.get("/metrics")
+async def get_metrics():
+    """Prometheus metrics (stage timings, throughput, queue depth, cache hits, memory)"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/api/jobs")
+async def list_jobs():
+    """Job counts across all server worker processes"""
+    counts = await run_in_threadpool(state_store.job_counts)
+    return {
+        "workers": await run_in_threadpool(state_store.worker_count),
+        "max_jobs": MAX_WORKERS,
+        "jobs": counts
+    }
+
+
+@app.get("/api/jobs/{job_id}")
+async def get_job(job_id: str):
+    """
+    Status of a job (queued, running, success, error), whichever worker process runs it.
+    The id is returned in the `X-Job-Id` header of processing responses.
+    """
+    if not re.fullmatch(r"[0-9a-f]{32}", job_id):
+        raise HTTPException(status_code=400, detail="Invalid job id")
+    
+    job = await run_in_threadpool(state_store.get_job, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+class PresetRequest(BaseModel):
+    """Body of preset create/update requests"""
+    name: str
+    settings: dict = {}
+
+
+def _preset_settings(request: PresetRequest):
+    """Validated preset fields and their digest"""
+    name = request.name.strip()
+    if not name:
+        raise HTTPException(status_code=400, detail="Preset name must not be empty")
+    fields, settings = _settings_from_fields(request.settings)
+    return name, fields, _settings_digest(settings)
+
+
+@app.post("/api/presets")
+async def create_preset(request: PresetRequest):
+    """
+    Store named processing settings as a preset (version 1).
+    
+    - **name**: Display name
+    - **settings**: Processing form fields (see `/api/process-file`), missing
+      fields take their defaults
+    
+    Jobs reference it with the `preset` form field. Presets are shared by all
+    clients; identical settings share cached results whichever preset they
+    come from (equal `digest`).
+    """
+    name, fields, digest = _preset_settings(request)
+    return await run_in_threadpool(state_store.add_preset_version, uuid.uuid4().hex, name, fields, digest)
+
+
+@app.put("/api/presets/{preset_id}")
+async def update_preset(preset_id: str, request: PresetRequest):
+    """
+    Store new settings for a preset as its next version; earlier versions stay
+    available as `<id>@<version>`. Sending unchanged settings returns the latest version.
+    """
+    if not re.fullmatch(r"[0-9a-f]{32}", preset_id):
+        raise HTTPException(status_code=400, detail="Invalid preset id")
+    name, fields, digest = _preset_settings(request)
+    if await run_in_threadpool(state_store.get_preset, preset_id) is None:
+        raise HTTPException(status_code=404, detail="Preset not found")
+    return await run_in_threadpool(state_store.add_preset_version, preset_id, name, fields, digest)
+
+
+@app.get("/api/presets")
+async def list_presets():
+    """Latest version of every preset"""
+    return await run_in_threadpool(state_store.list_presets)
+
+
+@app.get("/api/presets/{reference}")
+async def get_preset(reference: str):
+    """A preset by `<id>` (latest version) or `<id>@<version>`"""
+    preset = await run_in_threadpool(state_store.get_preset, *_parse_preset_reference(reference))
+    if preset is None:
+        raise HTTPException(status_code=404, detail="Preset not found")
+    return preset
+
+
 @app.post("/api/process-file")
 async def process_file(
+    request: Request,
     file: UploadFile = File(...),
-    output_format: str = Form(".las"),
-    points_to_render: float = Form(10.0)
+    settings: dict = Depends(job_settings),
+    preset: Optional[dict] = Depends(preset_requested),
+    profile: bool = Depends(profile_requested),
+    delete_after_download: bool = Depends(delete_after_download_requested)
 ):
     """
     Process a file (LAS, CSV, TXT) with specified settings.
+    Results are cached by input content and settings: the same file with the
+    same settings (or an identical preset) is answered from the cache
+    (`X-Result-Cache: hit`). A LAS file processed again with other settings
+    within `API_WORKSET_TTL` reuses its working set: only the height
+    threshold is recomputed, the file is not read and filtered again.
     
     - **file**: The input file to process
+    - **preset**: Use the settings of this preset (`<id>` or `<id>@<version>`,
+      see `/api/presets`) instead of the fields below; the version used is
+      returned in the `X-Preset` response header
     - **output_format**: Output format (.las, .txt, .csv)
     - **points_to_render**: Percentage of points to render (10.0-100.0)
+    - other processing options (point filters, ...): see `processing_settings`
+    - **profile**: Profile this job (or send `X-Profile: 1`); the artifact is
+      available at the URL in the `X-Profile-Url` response header. Profiled
+      jobs always run, even when the result is cached, each in its own worker
+      process so the memory figures cover that job only
+    - **delete_after_download**: Remove the job's own output from the server once it has
+      been sent; the result cache entry stays (until API_OUTPUT_TTL or the disk quota), so
+      the same file with the same settings is still a cache hit
     """
     try:
-        # Validate output format
-        if output_format not in [".las", ".txt", ".csv"]:
-            raise HTTPException(
-                status_code=400,
-                detail="Invalid output_format. Must be .las, .txt, or .csv"
-            )
-        
-        # Validate points_to_render
-        if not 10.0 <= points_to_render <= 100.0:
-            raise HTTPException(
-                status_code=400,
-                detail="points_to_render must be between 10.0 and 100.0"
-            )
-        
-        # Save uploaded file temporarily
-        input_path = UPLOAD_DIR / file.filename
-        with open(input_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-        
-        # Generate output filename
-        base_name = Path(file.filename).stem
-        output_filename = f"{base_name}_processed{output_format}"
-        output_path = OUTPUT_DIR / output_filename
-        
-        # Process the file
-        settings = {
-            "output_format": output_format,
-            "points_to_render": points_to_render
-        }
-        
-        success, message = Logic.process_file(
-            str(input_path),
-            str(output_path),
-            settings
-        )
-        
-        if not success:
-            # Clean up input file
-            if input_path.exists():
-                input_path.unlink()
-            raise HTTPException(status_code=500, detail=message)
-        
-        # Return the processed file
-        if output_path.exists():
-            return FileResponse(
-                path=str(output_path),
-                filename=output_filename,
-                media_type="application/octet-stream"
-            )
-        else:
-            raise HTTPException(
-                status_code=500,
-                detail="Processing completed but output file not found"
-            )
+        async with _job_workspace() as (upload_dir, output_dir):
+            # Save uploaded file in the job's own directory
+            input_path = upload_dir / Path(file.filename).name
+            content_hash = await run_in_threadpool(_save_upload, file, input_path, request)
+            await run_in_threadpool(_validate_for_input, str(input_path), settings)
+            
+            # Generate output filename
+            base_name = Path(file.filename).stem
+            output_filename = f"{base_name}_processed{settings['output_format']}"
+            output_path = output_dir / output_filename
+            
+            result_path = _result_path(content_hash, settings)
+            if not profile and result_path.exists():
+                metrics.CACHE_REQUESTS.inc(cache="result", result="hit")
+                return await _file_response(
+                    result_path,
+                    filename=output_filename,
+                    headers={"X-Result-Cache": "hit", **_job_headers(None, preset=preset)}
+                )
+            metrics.CACHE_REQUESTS.inc(cache="result", result="miss")
+            
+            # Process the file (re-runs of the same input reuse its working set),
+            # a job whose client disconnects is dropped or stopped at its next stage
+            profile_id, profile_path = _new_profile_path(profile)
+            async with _cancel_on_disconnect(request) as cancel:
+                success, message = await _run_process_job(
+                    str(input_path),
+                    str(output_path),
+                    settings,
+                    _working_set_path(content_hash),
+                    job_id=output_dir.name,
+                    profile_to=profile_path,
+                    cancel=cancel
+                )
+            
+            if not success:
+                raise HTTPException(status_code=500, detail=message)
+            
+            # Return the processed file (and keep it in the result cache;
+            # delete_after_download only removes the job's own copy)
+            if output_path.exists():
+                await run_in_threadpool(_store_result, output_path, result_path)
+                return await _file_response(
+                    output_path,
+                    filename=output_filename,
+                    headers={"X-Result-Cache": "miss", **_job_headers(output_dir.name, profile_id, preset)},
+                    delete_after=output_dir if delete_after_download else None
+                )
+            else:
+                raise HTTPException(
+                    status_code=500,
+                    detail="Processing completed but output file not found"
+                )
     
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
-    finally:
-        # Clean up input file after processing
-        if 'input_path' in locals() and input_path.exists():
-            try:
-                input_path.unlink()
-            except:
-                pass
 
 
 @app.post("/api/process-file-local")
 async def process_file_local(
+    request: Request,
     input_path: str = Form(...),
     output_path: str = Form(...),
-    output_format: str = Form(".las"),
-    points_to_render: float = Form(10.0)
+    settings: dict = Depends(job_settings),
+    preset: Optional[dict] = Depends(preset_requested),
+    profile: bool = Depends(profile_requested)
 ):
     """
     Process a file using local file paths (for server-side files).
     
     - **input_path**: Absolute path to input file on server
     - **output_path**: Absolute path where output should be saved
+    - **preset**: Use the settings of this preset (see `/api/process-file`)
     - **output_format**: Output format (.las, .txt, .csv)
     - **points_to_render**: Percentage of points to render (10.0-100.0)
+    - other processing options (point filters, ...): see `processing_settings`
+    - **profile**: Profile this job; the artifact is saved next to the output
+      as `<output>.profile.zip`
     """
     try:
-        # Validate output format
-        if output_format not in [".las", ".txt", ".csv"]:
-            raise HTTPException(
-                status_code=400,
-                detail="Invalid output_format. Must be .las, .txt, or .csv"
-            )
+        await run_in_threadpool(_validate_for_input, input_path, settings)
         
-        # Validate points_to_render
-        if not 10.0 <= points_to_render <= 100.0:
-            raise HTTPException(
-                status_code=400,
-                detail="points_to_render must be between 10.0 and 100.0"
+        # Process the file
+        profile_path = f"{os.path.splitext(output_path)[0]}.profile.zip" if profile else None
+        async with _cancel_on_disconnect(request) as cancel:
+            success, message = await _run_process_job(
+                input_path,
+                output_path,
+                settings,
+                _local_working_set_path(input_path),
+                profile_to=profile_path,
+                cancel=cancel
             )
         
-        # Process the file
-        settings = {
-            "output_format": output_format,
-            "points_to_render": points_to_render
+        if not success:
+            raise HTTPException(status_code=500, detail=message)
+        
+        return {
+            "success": True,
+            "message": message,
+            "output_path": output_path,
+            "profile_path": profile_path,
+            "preset": _job_headers(None, preset=preset).get("X-Preset")
         }
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+
+@app.post("/api/inspect")
+async def inspect_file(
+    request: Request,
+    file: UploadFile = File(...),
+    settings: dict = Depends(job_settings)
+):
+    """
+    Read LAS/LAZ metadata (header, VLRs, sampled classification histogram)
+    without processing the point data. The upload may be just the beginning
+    of the file - the header and VLRs are all that is required.
+    
+    - **file**: The input file (or its first bytes)
+    - **preset** / processing options: see `process-file`; the response has an
+      output size estimate for these settings (`estimated_output_points`,
+      `estimated_output_bytes`) computed on the point sample, or
+      `estimate_error` if they do not fit the file
+    """
+    try:
+        async with _job_workspace() as (upload_dir, _):
+            # Save uploaded file temporarily
+            input_path = upload_dir / Path(file.filename).name
+            await run_in_threadpool(_save_upload, file, input_path, request)
+            
+            success, result = await run_in_threadpool(
+                Logic.inspect_file, str(input_path), settings=settings
+            )
+            
+            if not success:
+                raise HTTPException(status_code=400, detail=result)
+            
+            return result
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+
+@app.get("/api/inspect")
+async def inspect_file_local(
+    input_path: str,
+    points_to_render: Optional[float] = None
+):
+    """
+    Read LAS/LAZ metadata using a local file path (for server-side files).
+    
+    - **input_path**: Absolute path to input file on server
+    - **points_to_render**: Optional, adds an output size estimate for this value
+      (other processing options at their defaults)
+    """
+    settings = None if points_to_render is None else {"points_to_render": points_to_render}
+    success, result = await run_in_threadpool(
+        Logic.inspect_file, input_path, settings=settings
+    )
+    
+    if not success:
+        raise HTTPException(status_code=400, detail=result)
+    
+    return result
+
+
+@app.post("/api/preview")
+async def preview_file(
+    request: Request,
+    file: UploadFile = File(...),
+    mode: str = Form("height"),
+    size: int = Form(Logic.PREVIEW_SIZE)
+):
+    """
+    Render a top-down PNG preview of a LAS/LAZ file.
+    Previews are cached by file content hash (returned in `X-Content-Hash`).
+    
+    - **file**: The input file
+    - **mode**: height (max Z per cell) or intensity (mean intensity per cell)
+    - **size**: Longer image side in pixels
+    """
+    _validate_preview_options(mode, size)
+    
+    try:
+        async with _job_workspace() as (upload_dir, _):
+            # Save uploaded file temporarily
+            input_path = upload_dir / Path(file.filename).name
+            content_hash = await run_in_threadpool(_save_upload, file, input_path, request)
+            
+            return await _render_cached_preview(str(input_path), content_hash, mode, size)
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+
+@app.get("/api/preview")
+async def preview_file_local(
+    input_path: str,
+    mode: str = "height",
+    size: int = Logic.PREVIEW_SIZE
+):
+    """
+    Render a preview using a local file path (for server-side files).
+    
+    - **input_path**: Absolute path to input file on server
+    - **mode**: height or intensity
+    - **size**: Longer image side in pixels
+    """
+    _validate_preview_options(mode, size)
+    
+    if not os.path.exists(input_path):
+        raise HTTPException(status_code=400, detail="Input file does not exist.")
+    
+    content_hash = await run_in_threadpool(_file_hash, input_path)
+    return await _render_cached_preview(input_path, content_hash, mode, size)
+
+
+@app.get("/api/preview/{content_hash}")
+async def cached_preview(
+    content_hash: str,
+    mode: str = "height",
+    size: int = Logic.PREVIEW_SIZE
+):
+    """
+    Return a cached preview without uploading the file again.
+    Responds with 404 when the preview for this content hash is not cached.
+    
+    - **content_hash**: sha256 of the file content
+    """
+    _validate_preview_options(mode, size)
+    
+    if not re.fullmatch(r"[0-9a-f]{64}", content_hash):
+        raise HTTPException(status_code=400, detail="content_hash must be a sha256 hex digest")
+    
+    preview_path = _preview_path(content_hash, mode, size)
+    if not preview_path.exists():
+        metrics.CACHE_REQUESTS.inc(cache="preview", result="miss")
+        raise HTTPException(status_code=404, detail="Preview not cached")
+    
+    metrics.CACHE_REQUESTS.inc(cache="preview", result="hit")
+    return await _file_response(
+        preview_path,
+        media_type="image/png",
+        headers={"X-Content-Hash": content_hash}
+    )
+
+
+@app.post("/api/merge-files")
+async def merge_files(
+    request: Request,
+    files: List[UploadFile] = File(...),
+    output_name: str = Form("merged.las"),
+    profile: bool = Depends(profile_requested),
+    delete_after_download: bool = Depends(delete_after_download_requested)
+):
+    """
+    Merge several LAS/LAZ files into one.
+    
+    - **files**: The input files (same point format)
+    - **output_name**: File name of the merged result
+    - **profile**: Profile this job (see `/api/process-file`)
+    - **delete_after_download**: Remove the output from the server once it has been sent
+    """
+    try:
+        async with _job_workspace() as (upload_dir, output_dir):
+            # Save uploaded files temporarily (index prefix keeps equal names apart)
+            input_paths = []
+            for index, file in enumerate(files):
+                input_path = upload_dir / f"{index}_{Path(file.filename).name}"
+                await run_in_threadpool(_save_upload, file, input_path, request)
+                input_paths.append(input_path)
+            
+            output_filename = Path(output_name).name
+            output_path = output_dir / output_filename
+            
+            profile_id, profile_path = _new_profile_path(profile)
+            success, message = await _run_job(
+                "merge",
+                Logic.merge_files,
+                [str(path) for path in input_paths],
+                str(output_path),
+                job_id=output_dir.name,
+                profile_to=profile_path
+            )
+            
+            if not success:
+                raise HTTPException(status_code=500, detail=message)
+            
+            return await _file_response(
+                output_path,
+                filename=output_filename,
+                headers=_job_headers(output_dir.name, profile_id),
+                delete_after=output_dir if delete_after_download else None
+            )
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+
+@app.post("/api/merge-files-local")
+async def merge_files_local(
+    input_paths: List[str] = Form(...),
+    output_path: str = Form(...),
+    profile: bool = Depends(profile_requested)
+):
+    """
+    Merge several LAS/LAZ files using local file paths (for server-side files).
+    
+    - **input_paths**: Absolute paths to input files on server (repeat the field)
+    - **output_path**: Absolute path where the merged file should be saved
+    - **profile**: Profile this job, saved as `<output>.profile.zip`
+    """
+    try:
+        profile_path = f"{os.path.splitext(output_path)[0]}.profile.zip" if profile else None
+        success, message = await _run_job(
+            "merge", Logic.merge_files, input_paths, output_path, profile_to=profile_path
+        )
+        
+        if not success:
+            raise HTTPException(status_code=500, detail=message)
         
-        success, message = Logic.process_file(
-            input_path,
-            output_path,
-            settings
+        return {
+            "success": True,
+            "message": message,
+            "output_path": output_path,
+            "profile_path": profile_path
+        }
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+
+@app.post("/api/retile-file")
+async def retile_file(
+    request: Request,
+    file: UploadFile = File(...),
+    tile_size: float = Form(...),
+    profile: bool = Depends(profile_requested),
+    delete_after_download: bool = Depends(delete_after_download_requested)
+):
+    """
+    Split a LAS/LAZ file into a regular grid of tiles.
+    Returns a ZIP archive with one file per tile.
+    
+    - **file**: The input file to retile
+    - **tile_size**: Tile edge length in file units (e.g. meters)
+    - **profile**: Profile this job (see `/api/process-file`)
+    - **delete_after_download**: Remove the archive from the server once it has been sent
+    """
+    if tile_size <= 0:
+        raise HTTPException(status_code=400, detail="tile_size must be greater than 0")
+    
+    try:
+        async with _job_workspace() as (upload_dir, output_dir):
+            # Save uploaded file temporarily
+            input_path = upload_dir / Path(file.filename).name
+            await run_in_threadpool(_save_upload, file, input_path, request)
+            
+            base_name = Path(file.filename).stem
+            tiles_dir = output_dir / f"{base_name}_tiles"
+            tiles_dir.mkdir()
+            
+            profile_id, profile_path = _new_profile_path(profile)
+            success, message = await _run_job(
+                "retile", Logic.retile_file, str(input_path), str(tiles_dir), tile_size,
+                job_id=output_dir.name, profile_to=profile_path
+            )
+            
+            if not success:
+                raise HTTPException(status_code=500, detail=message)
+            
+            archive_path = await run_in_threadpool(
+                shutil.make_archive, str(tiles_dir), "zip", root_dir=tiles_dir
+            )
+            shutil.rmtree(tiles_dir)
+            
+            return await _file_response(
+                archive_path,
+                filename=Path(archive_path).name,
+                media_type="application/zip",
+                headers=_job_headers(output_dir.name, profile_id),
+                delete_after=output_dir if delete_after_download else None
+            )
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+
+@app.post("/api/retile-file-local")
+async def retile_file_local(
+    input_path: str = Form(...),
+    output_dir: str = Form(...),
+    tile_size: float = Form(...),
+    profile: bool = Depends(profile_requested)
+):
+    """
+    Split a LAS/LAZ file into tiles using local file paths (for server-side files).
+    
+    - **input_path**: Absolute path to input file on server
+    - **output_dir**: Existing folder where tiles should be saved
+    - **tile_size**: Tile edge length in file units (e.g. meters)
+    - **profile**: Profile this job, saved in output_dir as `<input name>.profile.zip`
+    """
+    try:
+        profile_path = None
+        if profile:
+            profile_path = os.path.join(output_dir, f"{Path(input_path).stem}.profile.zip")
+        success, message = await _run_job(
+            "retile", Logic.retile_file, input_path, output_dir, tile_size,
+            profile_to=profile_path
         )
         
         if not success:
@@ -179,7 +1390,8 @@ async def process_file_local(
         return {
             "success": True,
             "message": message,
-            "output_path": output_path
+            "output_dir": output_dir,
+            "profile_path": profile_path
         }
     
     except HTTPException:
@@ -188,6 +1400,26 @@ async def process_file_local(
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
 
+@app.get("/api/profiles/{profile_id}")
+async def get_profile(profile_id: str):
+    """
+    Download the profiling artifact of a job run with `profile` enabled.
+    ZIP with profile.prof (cProfile, open with snakeviz/pstats), profile.txt and memory.txt.
+    """
+    if not re.fullmatch(r"[0-9a-f]{32}", profile_id):
+        raise HTTPException(status_code=400, detail="Invalid profile id")
+    
+    profile_path = PROFILE_DIR / f"{profile_id}.zip"
+    if not profile_path.exists():
+        raise HTTPException(status_code=404, detail="Profile not found")
+    
+    return await _file_response(
+        profile_path,
+        filename=f"profile_{profile_id}.zip",
+        media_type="application/zip"
+    )
+
+
 @app.post("/api/move-to-downloads")
 async def move_to_downloads(file_path: str = Form(...)):
     """
@@ -213,6 +1445,16 @@ async def move_to_downloads(file_path: str = Form(...)):
 
 
 if __name__ == "__main__":
+    import argparse
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    
+    parser = argparse.ArgumentParser(description="Run the LAS processing API")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("WEB_CONCURRENCY", 1)),
+                        help="Server worker processes (default: $WEB_CONCURRENCY or 1)")
+    args = parser.parse_args()
+    
+    # Several workers need the app as an import string
+    uvicorn.run("api:app", host=args.host, port=args.port, workers=args.workers, timeout_keep_alive=30)
 
@@ -0,0 +1,250 @@
+"""
+HTTP client for the LAS processing API used by the GUI.
+One pooled requests.Session (keep-alive) per API URL, with retries and timeouts.
+A request in flight on a background thread can be aborted from another thread
+(see abort_on_cancel), e.g. while it waits for the server to process a job.
+"""
+import os
+import socket
+import threading
+import uuid
+from contextlib import contextmanager
+
+from lazy_import import LazyModule
+
+# Imported when the first client is created (keeps GUI start-up fast)
+requests = LazyModule("requests")
+urllib3_retry = LazyModule("urllib3.util.retry")
+
+
+# Seconds to establish a connection / to wait for a response (per call override: timeout=)
+CONNECT_TIMEOUT = float(os.environ.get("API_CONNECT_TIMEOUT", 5))
+READ_TIMEOUT = float(os.environ.get("API_READ_TIMEOUT", 300))
+
+# Retries of failed connections and, for GET requests, of 502/503/504 responses and read errors
+RETRIES = int(os.environ.get("API_RETRIES", 3))
+RETRY_BACKOFF = 0.2
+
+# Keep-alive connections kept per host (GUI background threads run requests in parallel)
+POOL_SIZE = 8
+
+# Upload / download block size
+CHUNK_SIZE = 256 * 1024
+
+
+class MultipartFile:
+    """
+    multipart/form-data body with one file, read from disk while it is sent
+    (requests' files= would load the whole file into memory first).
+    progress(sent_bytes, total_bytes) is called after every block; an
+    exception raised by it aborts the upload.
+    """
+
+    def __init__(self, file_path, field="file", fields=None, progress=None, filename=None):
+        boundary = uuid.uuid4().hex
+        self.content_type = f"multipart/form-data; boundary={boundary}"
+        filename = (filename or os.path.basename(file_path)).replace('"', "%22")
+
+        head = []
+        for name, value in (fields or {}).items():
+            if value is None:
+                continue
+            head.append(
+                f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'
+            )
+        head.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+            f'Content-Type: application/octet-stream\r\n\r\n'
+        )
+        self._head = "".join(head).encode()
+        self._tail = f"\r\n--{boundary}--\r\n".encode()
+        self._file = open(file_path, "rb")
+        self._file_size = os.path.getsize(file_path)
+        self._total = len(self._head) + self._file_size + len(self._tail)
+        self._position = 0
+        self._progress = progress
+
+    def __len__(self):
+        return self._total
+
+    def __iter__(self):
+        while True:
+            block = self.read(CHUNK_SIZE)
+            if not block:
+                return
+            yield block
+
+    def tell(self):
+        return self._position
+
+    def seek(self, offset, whence=0):
+        if whence != 0:
+            raise OSError("MultipartFile only supports absolute seeks")
+        self._position = offset
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            size = self._total - self._position
+        file_end = len(self._head) + self._file_size
+        parts = []
+        while size > 0 and self._position < self._total:
+            if self._position < len(self._head):
+                part = self._head[self._position:self._position + size]
+            elif self._position < file_end:
+                self._file.seek(self._position - len(self._head))
+                part = self._file.read(min(size, file_end - self._position))
+            else:
+                start = self._position - file_end
+                part = self._tail[start:start + size]
+            if not part:
+                break
+            parts.append(part)
+            self._position += len(part)
+            size -= len(part)
+        if self._progress:
+            self._progress(self._position, self._total)
+        return b"".join(parts)
+
+    def close(self):
+        self._file.close()
+
+
+# Connection each thread is currently using ({thread id: urllib3 connection})
+_active_connections = {}
+_active_lock = threading.Lock()
+_tracked_pools = {}
+
+
+def _tracked_pool_class(base):
+    """Subclass of a urllib3 connection pool that records which thread holds which connection"""
+    if base not in _tracked_pools:
+        class TrackedPool(base):
+            def _get_conn(self, timeout=None):
+                conn = super()._get_conn(timeout)
+                with _active_lock:
+                    _active_connections[threading.get_ident()] = conn
+                return conn
+
+            def _put_conn(self, conn):
+                with _active_lock:
+                    thread_id = threading.get_ident()
+                    if conn is None or _active_connections.get(thread_id) is conn:
+                        _active_connections.pop(thread_id, None)
+                super()._put_conn(conn)
+
+        _tracked_pools[base] = TrackedPool
+    return _tracked_pools[base]
+
+
+def abort_requests(thread_id):
+    """
+    Abort the request the given thread has in flight: its socket is shut down,
+    so a blocked send / receive fails at once with a connection error.
+    """
+    with _active_lock:
+        conn = _active_connections.pop(thread_id, None)
+    sock = getattr(conn, "sock", None)
+    if sock is None:
+        return
+    try:
+        # Plain socket shutdown also for TLS, SSLSocket.shutdown() is not safe while another thread reads
+        socket.socket.shutdown(sock, socket.SHUT_RDWR)
+    except OSError:
+        pass
+
+
+@contextmanager
+def abort_on_cancel(task):
+    """
+    Abort the requests this thread makes inside the block as soon as the task
+    (a ui_dispatcher.Task) is cancelled.
+    """
+    thread_id = threading.get_ident()
+
+    def abort():
+        abort_requests(thread_id)
+
+    task.add_cancel_callback(abort)
+    try:
+        yield
+    finally:
+        task.remove_cancel_callback(abort)
+
+
+class ApiClient:
+    """
+    Thin wrapper around a shared requests.Session.
+    Paths are relative to the API URL, e.g. client.get("/health").
+    POST requests are only retried when the connection could not be
+    established, so uploads are never sent twice.
+    """
+
+    def __init__(self, base_url, connect_timeout=CONNECT_TIMEOUT, read_timeout=READ_TIMEOUT,
+                 retries=RETRIES, backoff_factor=RETRY_BACKOFF, pool_size=POOL_SIZE):
+        self.base_url = base_url.rstrip("/")
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+
+        retry = urllib3_retry.Retry(
+            total=retries,
+            connect=retries,
+            read=retries,
+            status=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=frozenset(["GET", "HEAD"]),
+            raise_on_status=False
+        )
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+        adapter.poolmanager.pool_classes_by_scheme = {
+            scheme: _tracked_pool_class(pool)
+            for scheme, pool in adapter.poolmanager.pool_classes_by_scheme.items()
+        }
+
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def request(self, method, path, timeout=None, **kwargs):
+        """
+        Send a request to base_url + path.
+        timeout is the read timeout in seconds (or a (connect, read) tuple).
+        """
+        if timeout is None:
+            timeout = self.read_timeout
+        if not isinstance(timeout, tuple):
+            timeout = (min(self.connect_timeout, timeout), timeout)
+        return self.session.request(method, f"{self.base_url}{path}", timeout=timeout, **kwargs)
+
+    def get(self, path, **kwargs):
+        return self.request("GET", path, **kwargs)
+
+    def post(self, path, **kwargs):
+        return self.request("POST", path, **kwargs)
+
+    def post_file(self, path, file_path, data=None, field="file", progress=None, **kwargs):
+        """
+        POST file_path as multipart/form-data, streamed from disk, with the form fields in data.
+        progress(sent_bytes, total_bytes) reports the upload (see MultipartFile).
+        """
+        body = MultipartFile(file_path, field, data, progress)
+        try:
+            return self.post(path, data=body, headers={"Content-Type": body.content_type}, **kwargs)
+        finally:
+            body.close()
+
+    def close(self):
+        self.session.close()
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(base_url) -> ApiClient:
+    """Shared client for an API URL (created on first use)"""
+    with _clients_lock:
+        client = _clients.get(base_url)
+        if client is None:
+            client = _clients[base_url] = ApiClient(base_url)
+        return client
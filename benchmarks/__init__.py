@@ -0,0 +1,3 @@
+"""
+Benchmarks for Logic.py (run from the repository root, e.g. `python -m benchmarks.run`)
+"""
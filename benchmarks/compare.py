@@ -0,0 +1,60 @@
+"""
+Compare two benchmark result files produced by benchmarks.run.
+
+    python -m benchmarks.compare results/base.json results/new.json --threshold 0.10
+
+Exits with status 1 when any case got slower (wall time) or used more
+memory (peak RSS) than the threshold allows, so it can gate CI.
+"""
+import argparse
+import json
+import sys
+
+
+def load(path):
+    """Load a results file as {case: entry}"""
+    with open(path) as f:
+        data = json.load(f)
+    return data.get("environment", {}), {entry["case"]: entry for entry in data["results"]}
+
+
+def main(argv=None):
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files")
+    parser.add_argument("base", help="Baseline results JSON")
+    parser.add_argument("new", help="New results JSON")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="Allowed relative slowdown / memory growth (default 0.10 = 10%%)")
+    args = parser.parse_args(argv)
+
+    base_env, base = load(args.base)
+    new_env, new = load(args.new)
+    print(f"base: {base_env.get('commit')}  new: {new_env.get('commit')}")
+    print(f"{'case':32s} {'base s':>9s} {'new s':>9s} {'time':>8s} {'base MB':>9s} {'new MB':>9s} {'rss':>8s}")
+
+    regressions = 0
+    for case in sorted(set(base) | set(new)):
+        old_entry, new_entry = base.get(case), new.get(case)
+        if not old_entry or not new_entry or not old_entry["success"] or not new_entry["success"]:
+            status = "missing" if not old_entry or not new_entry else "failed"
+            print(f"{case:32s} {status}")
+            continue
+
+        time_ratio = new_entry["wall_time_s"] / old_entry["wall_time_s"] - 1
+        rss_ratio = new_entry["peak_rss_bytes"] / old_entry["peak_rss_bytes"] - 1
+        flag = ""
+        if time_ratio > args.threshold or rss_ratio > args.threshold:
+            flag = "  REGRESSION"
+            regressions += 1
+
+        print(
+            f"{case:32s} {old_entry['wall_time_s']:9.3f} {new_entry['wall_time_s']:9.3f} {time_ratio:+8.1%} "
+            f"{old_entry['peak_rss_bytes'] / 2 ** 20:9.1f} {new_entry['peak_rss_bytes'] / 2 ** 20:9.1f} "
+            f"{rss_ratio:+8.1%}{flag}"
+        )
+
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
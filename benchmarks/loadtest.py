@@ -0,0 +1,340 @@
+"""
+End-to-end load test of the FastAPI server.
+
+Fires a configurable mix of concurrent requests while a separate probe keeps
+calling /health, then reports throughput, p50/p95/p99 latency and error rate
+per workload. A slow /health under load means the event loop is blocked.
+Workloads:
+
+    small / large  /api/process-file uploads, each one really processed
+    repeat         the same small upload with the same settings every time,
+                   answered from the result cache (a miss counts as an error)
+    preview        cached /api/preview/{hash} hits
+
+The app runs in-process (httpx ASGI transport, same event loop as the load
+generator) unless --url points at a running server or --uvicorn starts one:
+
+    python -m benchmarks.loadtest --concurrency 8 --duration 30
+    python -m benchmarks.loadtest --uvicorn --workers 4 --concurrency 16 --mix small=5,large=1,repeat=2,preview=2
+    python -m benchmarks.loadtest --url http://localhost:8000 --requests 200
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from benchmarks import synthetic
+from benchmarks.run import DEFAULT_DATA_DIR, environment_info
+
+
+WORKLOADS = ("small", "large", "repeat", "preview")
+DEFAULT_MIX = "small=5,large=1,repeat=2,preview=2"
+
+# Seconds to wait for a --uvicorn server to answer /health
+SERVER_START_TIMEOUT = 60
+
+PERCENTILES = (50, 95, 99)
+
+# Project GUID in the LAS header, not used by processing
+LAS_GUID_OFFSET = 8
+
+
+def parse_mix(value):
+    """Parse "small=5,large=1,repeat=2,preview=2" into {workload: weight}"""
+    mix = {}
+    for part in value.split(","):
+        if not part.strip():
+            continue
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in WORKLOADS:
+            raise ValueError(f"Unknown workload: {name}")
+        mix[name] = float(weight or 1)
+    if not mix or sum(mix.values()) <= 0:
+        raise ValueError("Workload mix is empty")
+    return mix
+
+
+def summarize(samples, elapsed):
+    """Latency / throughput summary for a list of (latency_s, ok, bytes) samples"""
+    latencies = np.array([latency for latency, _, _ in samples], dtype=float)
+    errors = sum(1 for _, ok, _ in samples if not ok)
+    summary = {
+        "requests": len(samples),
+        "errors": errors,
+        "error_rate": errors / len(samples) if samples else 0.0,
+        "throughput_rps": len(samples) / elapsed if elapsed else 0.0,
+        "bytes": sum(size for _, _, size in samples),
+    }
+    if len(latencies):
+        for percentile, value in zip(PERCENTILES, np.percentile(latencies, PERCENTILES)):
+            summary[f"p{percentile}_ms"] = value * 1000
+        summary["max_ms"] = latencies.max() * 1000
+    return summary
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_uvicorn(workers):
+    """Start `uvicorn api:app` in a subprocess, returns (process, base_url)"""
+    import httpx
+
+    port = _free_port()
+    process = subprocess.Popen([
+        sys.executable, "-m", "uvicorn", "api:app",
+        "--host", "127.0.0.1", "--port", str(port),
+        "--workers", str(workers), "--log-level", "warning"
+    ])
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + SERVER_START_TIMEOUT
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("uvicorn exited during startup")
+        try:
+            if httpx.get(url + "/health", timeout=1).status_code == 200:
+                return process, url
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("uvicorn did not become healthy in time")
+
+
+def prepare_inputs(data_dir, small_points, large_points, seed):
+    """Generate (once) the small and large upload files"""
+    os.makedirs(data_dir, exist_ok=True)
+    inputs = {}
+    for name, points in (("small", small_points), ("large", large_points)):
+        path = os.path.join(data_dir, f"loadtest_{name}_{points}_s{seed}.las")
+        if not os.path.exists(path):
+            print(f"  generating {os.path.basename(path)} ...", flush=True)
+            partial = path + ".partial.las"
+            synthetic.generate(partial, points, seed=seed)
+            os.replace(partial, path)
+        with open(path, "rb") as f:
+            inputs[name] = f.read()
+    return inputs
+
+
+async def _request(client, workload, inputs, counter, preview_hash, preview_size):
+    """Send one request of the given workload, returns (ok, response bytes)"""
+    if workload == "preview":
+        response = await client.get(f"/api/preview/{preview_hash}", params={"size": preview_size})
+    elif workload == "repeat":
+        response = await _process_repeated(client, inputs)
+        return response.headers.get("X-Result-Cache") == "hit", len(response.content)
+    else:
+        # Unique names so concurrent uploads never share a temporary path, and unique
+        # content (request number in the header's project GUID) so every upload is
+        # processed, not answered from the result cache or an input's working set
+        number = next(counter)
+        filename = f"loadtest_{workload}_{number}.las"
+        content = inputs[workload]
+        content = content[:LAS_GUID_OFFSET] + number.to_bytes(8, "little") + content[LAS_GUID_OFFSET + 8:]
+        response = await client.post(
+            "/api/process-file",
+            files={"file": (filename, content, "application/octet-stream")},
+            data={"output_format": ".las", "points_to_render": "10"},
+        )
+    return response.status_code == 200, len(response.content)
+
+
+async def _process_repeated(client, inputs):
+    """The "repeat" request: always the same upload and settings"""
+    return await client.post(
+        "/api/process-file",
+        files={"file": ("loadtest_repeat.las", inputs["small"], "application/octet-stream")},
+        data={"output_format": ".las", "points_to_render": "10"},
+    )
+
+
+async def _worker(client, mix, inputs, counter, preview_hash, preview_size, budget, deadline, results, rng):
+    """Send requests back to back until the request budget or the time runs out"""
+    names, weights = list(mix), list(mix.values())
+    while time.perf_counter() < deadline:
+        if budget is not None:
+            if budget[0] <= 0:
+                return
+            budget[0] -= 1
+        workload = rng.choices(names, weights)[0]
+        started = time.perf_counter()
+        try:
+            ok, size = await _request(client, workload, inputs, counter, preview_hash, preview_size)
+        except Exception:
+            ok, size = False, 0
+        results[workload].append((time.perf_counter() - started, ok, size))
+
+
+async def _health_probe(client, interval, stop, samples):
+    """Call /health every interval seconds until stopped"""
+    while not stop.is_set():
+        started = time.perf_counter()
+        try:
+            ok = (await client.get("/health")).status_code == 200
+        except Exception:
+            ok = False
+        samples.append((time.perf_counter() - started, ok, 0))
+        try:
+            await asyncio.wait_for(stop.wait(), interval)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def run_load(client, args, mix, inputs):
+    """Warm up, run the load and return the report dict"""
+    import itertools
+
+    preview_size = 256
+    preview_hash = None
+    if "repeat" in mix:
+        # The first one fills the result cache, the load only measures hits
+        (await _process_repeated(client, inputs)).raise_for_status()
+
+    if "preview" in mix:
+        response = await client.post(
+            "/api/preview",
+            files={"file": ("loadtest_preview.las", inputs["small"], "application/octet-stream")},
+            data={"size": str(preview_size)},
+        )
+        response.raise_for_status()
+        preview_hash = response.headers["X-Content-Hash"]
+
+    # Idle /health baseline
+    idle = []
+    for _ in range(20):
+        started = time.perf_counter()
+        ok = (await client.get("/health")).status_code == 200
+        idle.append((time.perf_counter() - started, ok, 0))
+
+    results = {name: [] for name in mix}
+    health = []
+    stop = asyncio.Event()
+    counter = itertools.count()
+    budget = [args.requests] if args.requests else None
+    rng = random.Random(args.seed)
+
+    started = time.perf_counter()
+    deadline = started + (args.duration if not args.requests else float("inf"))
+    probe = asyncio.create_task(_health_probe(client, args.health_interval, stop, health))
+    await asyncio.gather(*(
+        _worker(client, mix, inputs, counter, preview_hash, preview_size,
+                budget, deadline, results, rng)
+        for _ in range(args.concurrency)
+    ))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await probe
+
+    all_samples = [sample for samples in results.values() for sample in samples]
+    return {
+        "concurrency": args.concurrency,
+        "mix": mix,
+        "elapsed_s": elapsed,
+        "total": summarize(all_samples, elapsed),
+        "workloads": {name: summarize(samples, elapsed) for name, samples in results.items()},
+        "health_idle": summarize(idle, 0),
+        "health_under_load": summarize(health, elapsed),
+    }
+
+
+def print_report(report):
+    """Human readable report"""
+    print(f"\nconcurrency {report['concurrency']}, {report['elapsed_s']:.1f} s")
+    print(f"{'':20s} {'requests':>8s} {'errors':>7s} {'req/s':>8s} {'p50 ms':>9s} {'p95 ms':>9s} {'p99 ms':>9s} {'max ms':>9s}")
+    rows = [(name, summary) for name, summary in report["workloads"].items()]
+    rows += [("total", report["total"]), ("health (idle)", report["health_idle"]),
+             ("health (under load)", report["health_under_load"])]
+    for name, summary in rows:
+        if not summary["requests"]:
+            print(f"{name:20s} {0:8d}")
+            continue
+        print(
+            f"{name:20s} {summary['requests']:8d} {summary['errors']:7d} {summary['throughput_rps']:8.2f} "
+            f"{summary['p50_ms']:9.1f} {summary['p95_ms']:9.1f} {summary['p99_ms']:9.1f} {summary['max_ms']:9.1f}"
+        )
+
+
+async def _main_async(args, mix, inputs):
+    import httpx
+
+    timeout = httpx.Timeout(args.timeout)
+    server = None
+    if args.uvicorn:
+        server, url = start_uvicorn(args.workers)
+        client = httpx.AsyncClient(base_url=url, timeout=timeout,
+                                   limits=httpx.Limits(max_connections=args.concurrency + 1))
+    elif args.url:
+        client = httpx.AsyncClient(base_url=args.url.rstrip("/"), timeout=timeout,
+                                   limits=httpx.Limits(max_connections=args.concurrency + 1))
+    else:
+        import api
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=api.app),
+                                   base_url="http://loadtest", timeout=timeout)
+
+    try:
+        async with client:
+            return await run_load(client, args, mix, inputs)
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+
+
+def main(argv=None):
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Load test the LAS processing API")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--url", help="Test a running server instead of the in-process app")
+    target.add_argument("--uvicorn", action="store_true", help="Start `uvicorn api:app` for the test")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes (with --uvicorn)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent clients")
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds of load")
+    parser.add_argument("--requests", type=int, default=None, help="Stop after this many requests instead")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"Workload weights (default {DEFAULT_MIX})")
+    parser.add_argument("--small-points", default="100K")
+    parser.add_argument("--large-points", default="5M")
+    parser.add_argument("--health-interval", type=float, default=0.1, help="Seconds between /health probes")
+    parser.add_argument("--timeout", type=float, default=600.0, help="Per request timeout in seconds")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR, help="Where the upload files are kept")
+    parser.add_argument("--output", default=None, help="Also write the report as JSON")
+    args = parser.parse_args(argv)
+
+    try:
+        import httpx  # noqa: F401
+    except ImportError:
+        parser.error("the load test needs httpx (pip install httpx)")
+
+    try:
+        mix = parse_mix(args.mix)
+    except ValueError as e:
+        parser.error(str(e))
+
+    inputs = prepare_inputs(args.data_dir, synthetic.parse_count(args.small_points),
+                            synthetic.parse_count(args.large_points), args.seed)
+    report = asyncio.run(_main_async(args, mix, inputs))
+    report["target"] = args.url or ("uvicorn" if args.uvicorn else "in-process")
+    report["workers"] = args.workers if args.uvicorn else None
+    print_report(report)
+
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump({"environment": environment_info(), "report": report}, f, indent=2)
+        print(f"Report saved → {args.output}")
+    return 0 if report["total"]["errors"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
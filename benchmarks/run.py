@@ -0,0 +1,243 @@
+"""
+Benchmark Logic.process_file across point counts, input formats and processing modes.
+
+Every case runs in a fresh process (multiprocessing "spawn"), so peak RSS is
+measured per case. Inputs are generated once with benchmarks.synthetic and
+reused from the data directory. Results go to a JSON file that can be
+compared between commits with benchmarks.compare.
+
+    python -m benchmarks.run --sizes 1M,10M --modes height,filters
+    python -m benchmarks.run --sizes 100M,500M --modes height --repeat 1
+    python -m benchmarks.compare results/old.json results/new.json
+"""
+import argparse
+import datetime
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import time
+
+from benchmarks import synthetic
+
+
+# Processing settings per benchmark mode
+MODES = {
+    "height": {"points_to_render": 10.0},
+    "filters": {"points_to_render": 10.0, "exclude_classes": [7], "return_filter": "last"},
+    "outliers": {"points_to_render": 10.0, "remove_outliers": True},
+    "compact": {"points_to_render": 10.0, "output_point_format": "compact", "drop_extra_dims": "*"},
+    "reproject": {"points_to_render": 10.0, "target_crs": "EPSG:2177"},
+}
+
+# Input formats Logic.process_file processes (other files are only copied).
+# LAZ needs a laspy backend (lazrs / laszip), which is not a dependency.
+FORMATS = ("las",)
+
+DEFAULT_DATA_DIR = os.path.join("benchmarks", "data")
+DEFAULT_RESULTS_DIR = os.path.join("benchmarks", "results")
+
+
+def _peak_rss_bytes():
+    """Peak RSS of the current process in bytes"""
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _run_case(input_path, output_path, settings, profile_path, queue):
+    """Child process: run one Logic.process_file call and report the measurements"""
+    try:
+        import Logic
+        import profiling
+
+        # Only processed inputs go through the filter stage, a copied file would time a copy
+        stages = []
+        progress = lambda fraction, stage: stages.append(stage)
+
+        started = time.perf_counter()
+        if profile_path:
+            success, message = profiling.profile_call(
+                profile_path, Logic.process_file, input_path, output_path, settings, progress=progress
+            )
+        else:
+            success, message = Logic.process_file(input_path, output_path, settings, progress=progress)
+        wall_time = time.perf_counter() - started
+        if success and "filter" not in stages:
+            success, message = False, f"Input was not processed: {message}"
+
+        output_file = os.path.splitext(output_path)[0] + settings.get("output_format", ".las")
+        queue.put({
+            "success": success,
+            "message": message,
+            "wall_time_s": wall_time,
+            "peak_rss_bytes": _peak_rss_bytes(),
+            "output_bytes": os.path.getsize(output_file) if os.path.exists(output_file) else 0,
+        })
+    except Exception as e:
+        queue.put({"success": False, "message": f"{type(e).__name__}: {e}"})
+
+
+def run_case(input_path, output_path, settings, profile_path=None, timeout=None):
+    """Run one case in a fresh process, returns the measurement dict"""
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    process = context.Process(
+        target=_run_case,
+        args=(input_path, output_path, settings, profile_path, queue)
+    )
+    process.start()
+    try:
+        result = queue.get(timeout=timeout)
+    except Exception:
+        process.kill()
+        result = {"success": False, "message": "Benchmark case timed out or crashed"}
+    process.join()
+    return result
+
+
+def input_path_for(data_dir, points, fmt, point_format, distribution, seed):
+    """Generate (once) and return the synthetic input for a case"""
+    name = f"synthetic_{points}_{distribution}_pf{point_format}_s{seed}.{fmt}"
+    path = os.path.join(data_dir, name)
+    if not os.path.exists(path):
+        print(f"  generating {name} ...", flush=True)
+        partial = path + ".partial." + fmt
+        synthetic.generate(partial, points, point_format=point_format,
+                           distribution=distribution, seed=seed)
+        os.replace(partial, path)
+    return path
+
+
+def environment_info():
+    """Machine / software versions recorded with the results"""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = bool(subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"],
+            capture_output=True, text=True
+        ).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        commit, dirty = None, None
+
+    import numpy
+    import laspy
+    return {
+        "commit": commit,
+        "dirty": dirty,
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "numpy": numpy.__version__,
+        "laspy": laspy.__version__,
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def _median(values):
+    values = sorted(values)
+    middle = len(values) // 2
+    return values[middle] if len(values) % 2 else (values[middle - 1] + values[middle]) / 2
+
+
+def main(argv=None):
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Benchmark Logic.process_file on synthetic data")
+    parser.add_argument("--sizes", default="1M,10M", help="Comma separated point counts (e.g. 1M,10M,100M,500M)")
+    parser.add_argument("--formats", default="las", help=f"Comma separated input formats ({', '.join(FORMATS)})")
+    parser.add_argument("--modes", default="height,filters,compact",
+                        help=f"Comma separated modes ({', '.join(MODES)})")
+    parser.add_argument("--point-format", type=int, default=6)
+    parser.add_argument("--distribution", default="terrain", choices=synthetic.DISTRIBUTIONS)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per case, the median is reported")
+    parser.add_argument("--timeout", type=float, default=None, help="Seconds per run before giving up")
+    parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR, help="Where synthetic inputs are kept")
+    parser.add_argument("--output", default=None, help="Results JSON (default: benchmarks/results/<commit>.json)")
+    parser.add_argument("--profile", action="store_true",
+                        help="Profile the first run of every case (saved next to the results file)")
+    args = parser.parse_args(argv)
+
+    sizes = [synthetic.parse_count(size) for size in args.sizes.split(",") if size]
+    formats = [fmt.strip().lower() for fmt in args.formats.split(",") if fmt.strip()]
+    modes = [mode.strip() for mode in args.modes.split(",") if mode.strip()]
+    for fmt in formats:
+        if fmt not in FORMATS:
+            parser.error(f"Unknown format: {fmt}")
+    for mode in modes:
+        if mode not in MODES:
+            parser.error(f"Unknown mode: {mode}")
+
+    os.makedirs(args.data_dir, exist_ok=True)
+    environment = environment_info()
+    output = args.output or os.path.join(
+        DEFAULT_RESULTS_DIR, f"{(environment['commit'] or 'local')[:12]}.json"
+    )
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    scratch_dir = os.path.join(args.data_dir, "outputs")
+    os.makedirs(scratch_dir, exist_ok=True)
+
+    results = []
+    for points in sizes:
+        for fmt in formats:
+            input_path = input_path_for(args.data_dir, points, fmt, args.point_format,
+                                        args.distribution, args.seed)
+            for mode in modes:
+                case = f"{mode}/{fmt}/{points}"
+                settings = {"output_format": ".las", **MODES[mode]}
+                output_path = os.path.join(scratch_dir, f"out_{mode}_{fmt}_{points}.las")
+
+                runs = []
+                for attempt in range(args.repeat):
+                    profile_path = None
+                    if args.profile and attempt == 0:
+                        profile_path = os.path.splitext(output)[0] + f"_{mode}_{fmt}_{points}.profile.zip"
+                    runs.append(run_case(input_path, output_path, settings, profile_path, args.timeout))
+                    if not runs[-1]["success"]:
+                        break
+
+                if os.path.exists(output_path):
+                    os.remove(output_path)
+
+                failed = [run for run in runs if not run["success"]]
+                if failed:
+                    print(f"{case:32s} FAILED: {failed[0]['message']}", flush=True)
+                    results.append({"case": case, "mode": mode, "format": fmt, "points": points,
+                                    "success": False, "message": failed[0]["message"]})
+                    continue
+
+                wall_time = _median([run["wall_time_s"] for run in runs])
+                entry = {
+                    "case": case,
+                    "mode": mode,
+                    "format": fmt,
+                    "points": points,
+                    "success": True,
+                    "repeat": len(runs),
+                    "wall_time_s": wall_time,
+                    "wall_time_min_s": min(run["wall_time_s"] for run in runs),
+                    "points_per_s": points / wall_time if wall_time else None,
+                    "peak_rss_bytes": max(run["peak_rss_bytes"] for run in runs),
+                    "input_bytes": os.path.getsize(input_path),
+                    "output_bytes": runs[0]["output_bytes"],
+                }
+                results.append(entry)
+                print(
+                    f"{case:32s} {wall_time:9.3f} s  {entry['points_per_s'] / 1e6:8.2f} Mpts/s  "
+                    f"peak RSS {entry['peak_rss_bytes'] / 2 ** 20:8.1f} MB",
+                    flush=True
+                )
+
+    with open(output, "w") as f:
+        json.dump({"environment": environment, "results": results}, f, indent=2)
+    print(f"Results saved → {output}")
+    return 0 if all(result["success"] for result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
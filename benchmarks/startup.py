@@ -0,0 +1,213 @@
+"""
+Cold start benchmark: time to the first /health answer (API) and to the
+first drawn window (GUI), each measured from process launch in a fresh
+interpreter, checked against a start-up budget.
+
+    python -m benchmarks.startup                       # both, 5 runs each
+    python -m benchmarks.startup --target api --uvicorn
+    python -m benchmarks.startup --importtime          # also list the slowest imports
+
+Exits with status 1 when a median is over its budget or when a module that
+should be imported lazily (NumPy, laspy, requests, ...) was loaded during start-up.
+"""
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+
+
+# Start-up budgets in seconds (median from process launch, interpreter start included)
+API_BUDGET = 1.5
+GUI_BUDGET = 2.0
+
+# Modules that must not be imported before the first job / request
+DEFERRED_MODULES = ("numpy", "laspy", "scipy", "pyproj", "requests")
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Child script: import the API and answer one /health request through ASGI
+_API_SCRIPT = """
+import asyncio, json, sys
+import api
+
+async def health():
+    scope = {"type": "http", "method": "GET", "path": "/health", "raw_path": b"/health",
+             "query_string": b"", "headers": [], "http_version": "1.1", "scheme": "http",
+             "server": ("startup", 80), "client": ("startup", 1), "root_path": ""}
+    messages = []
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+    async def send(message):
+        messages.append(message)
+    await api.app(scope, receive, send)
+    return messages[0]["status"]
+
+status = asyncio.run(health())
+print(json.dumps({"status": status, "loaded": [m for m in %r if m in sys.modules]}), flush=True)
+""" % (DEFERRED_MODULES,)
+
+# Child script: create the main window and draw it once
+_GUI_SCRIPT = """
+import json, sys
+import gui_app
+
+app = gui_app.ModernGUIApp()
+app.update()
+print(json.dumps({"status": 200, "loaded": [m for m in %r if m in sys.modules]}), flush=True)
+app.destroy()
+""" % (DEFERRED_MODULES,)
+
+
+def _measure_script(script, importtime=False):
+    """Run a child script, returns (seconds until it printed its result, result dict, stderr)"""
+    command = [sys.executable]
+    if importtime:
+        command += ["-X", "importtime"]
+    command += ["-c", script]
+
+    started = time.perf_counter()
+    process = subprocess.Popen(command, cwd=REPO_ROOT, stdout=subprocess.PIPE,
+                               stderr=subprocess.PIPE, text=True)
+    line = process.stdout.readline()
+    elapsed = time.perf_counter() - started
+    _, stderr = process.communicate()
+    if process.returncode != 0 or not line:
+        raise RuntimeError(stderr.strip().splitlines()[-1] if stderr.strip() else "child process failed")
+    return elapsed, json.loads(line), stderr
+
+
+def _measure_uvicorn():
+    """Seconds from launching `uvicorn api:app` until /health answers 200"""
+    import urllib.request
+    import urllib.error
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "api:app", "--port", str(port), "--log-level", "warning"],
+        cwd=REPO_ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE
+    )
+    try:
+        while process.poll() is None:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - started, {"status": 200, "loaded": []}, ""
+            except (urllib.error.URLError, ConnectionError):
+                time.sleep(0.01)
+        raise RuntimeError("uvicorn exited: " + process.stderr.read().decode(errors="replace").strip())
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def slowest_imports(importtime_output, limit=10):
+    """Top cumulative import times from `python -X importtime` output"""
+    rows = []
+    for line in importtime_output.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # Nested imports are indented below their parent
+        if not name.startswith("  "):
+            rows.append((int(cumulative), name.strip()))
+    return sorted(rows, reverse=True)[:limit]
+
+
+def run_target(target, runs, uvicorn=False, importtime=False):
+    """Measure one target several times, returns the result dict"""
+    times = []
+    loaded = set()
+    error = None
+    for _ in range(runs):
+        try:
+            if target == "api" and uvicorn:
+                elapsed, result, _ = _measure_uvicorn()
+            else:
+                elapsed, result, _ = _measure_script(_API_SCRIPT if target == "api" else _GUI_SCRIPT)
+        except RuntimeError as e:
+            error = str(e)
+            break
+        if result["status"] != 200:
+            error = f"/health answered {result['status']}"
+            break
+        times.append(elapsed)
+        loaded.update(result["loaded"])
+
+    entry = {"target": target, "runs": len(times), "error": error}
+    if times:
+        times.sort()
+        entry.update({
+            "median_s": times[len(times) // 2],
+            "min_s": times[0],
+            "max_s": times[-1],
+            "deferred_modules_loaded": sorted(loaded),
+        })
+    if importtime and not error and not (target == "api" and uvicorn):
+        _, _, stderr = _measure_script(_API_SCRIPT if target == "api" else _GUI_SCRIPT, importtime=True)
+        entry["slowest_imports"] = [
+            {"module": name, "cumulative_ms": microseconds / 1000}
+            for microseconds, name in slowest_imports(stderr)
+        ]
+    return entry
+
+
+def main(argv=None):
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Measure API and GUI cold start time")
+    parser.add_argument("--target", choices=["api", "gui", "all"], default="all")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--uvicorn", action="store_true",
+                        help="Measure the API under a real uvicorn server (HTTP /health) instead of in-process ASGI")
+    parser.add_argument("--api-budget", type=float, default=API_BUDGET)
+    parser.add_argument("--gui-budget", type=float, default=GUI_BUDGET)
+    parser.add_argument("--importtime", action="store_true", help="List the slowest top-level imports")
+    parser.add_argument("--output", default=None, help="Also write the results as JSON")
+    args = parser.parse_args(argv)
+
+    baseline, _, _ = _measure_script('print(\'{"status": 200, "loaded": []}\', flush=True)')
+    print(f"python interpreter start: {baseline:.3f} s")
+
+    targets = ["api", "gui"] if args.target == "all" else [args.target]
+    budgets = {"api": args.api_budget, "gui": args.gui_budget}
+    labels = {"api": "time to first /health", "gui": "time to first window"}
+    results = []
+    failed = False
+
+    for target in targets:
+        entry = run_target(target, args.runs, uvicorn=args.uvicorn, importtime=args.importtime)
+        entry["budget_s"] = budgets[target]
+        results.append(entry)
+
+        if entry["error"]:
+            # No display / missing dependency: report, but only fail on real regressions
+            print(f"{target}: skipped ({entry['error']})")
+            continue
+
+        over = entry["median_s"] > entry["budget_s"]
+        failed |= over or bool(entry["deferred_modules_loaded"])
+        print(
+            f"{target}: {labels[target]} {entry['median_s']:.3f} s median "
+            f"(min {entry['min_s']:.3f}, max {entry['max_s']:.3f}, budget {entry['budget_s']:.1f} s)"
+            f"{'  OVER BUDGET' if over else ''}"
+        )
+        if entry["deferred_modules_loaded"]:
+            print(f"  deferred modules imported during start-up: {', '.join(entry['deferred_modules_loaded'])}")
+        for row in entry.get("slowest_imports", []):
+            print(f"  {row['cumulative_ms']:8.1f} ms  {row['module']}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"interpreter_start_s": baseline, "results": results}, f, indent=2)
+        print(f"Results saved → {args.output}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
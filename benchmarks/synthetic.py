@@ -0,0 +1,196 @@
+"""
+Synthetic point cloud generator (LAS / LAZ / CSV) for benchmarks.
+
+Points are generated and written in chunks, so files with hundreds of millions
+of points can be created without holding them in memory. Output is fully
+determined by the arguments (seeded), so the same file can be regenerated on
+any machine.
+
+    python -m benchmarks.synthetic out.las --points 10M --point-format 6 --distribution terrain
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+import laspy
+
+
+DISTRIBUTIONS = ("uniform", "terrain", "clustered")
+
+# Points generated per chunk
+CHUNK_POINTS = 2_000_000
+
+# CRS written into generated LAS/LAZ files (Poland CS92)
+DEFAULT_EPSG = 2180
+
+# Fraction of points generated as isolated noise (class 7) high above / below the surface
+NOISE_FRACTION = 0.002
+
+
+def parse_count(value):
+    """Parse a point count like 1000, 250K, 10M or 1.5G"""
+    value = str(value).strip().upper()
+    multipliers = {"K": 1_000, "M": 1_000_000, "G": 1_000_000_000}
+    if value and value[-1] in multipliers:
+        return int(float(value[:-1]) * multipliers[value[-1]])
+    return int(value)
+
+
+def _surface(x, y, extent):
+    """Smooth terrain height in meters for the given coordinates"""
+    u = x / extent * 2 * np.pi
+    v = y / extent * 2 * np.pi
+    return 100.0 + 25.0 * np.sin(u) * np.cos(v) + 8.0 * np.sin(3.1 * u + 1.3) + 4.0 * np.cos(5.3 * v)
+
+
+def generate_chunk(rng, count, distribution, extent, origin):
+    """
+    Generate one chunk of points.
+    Returns a dict of numpy arrays: x, y, z, intensity, classification,
+    return_number, number_of_returns, red, green, blue.
+    """
+    if distribution == "uniform":
+        x = rng.uniform(0, extent, count)
+        y = rng.uniform(0, extent, count)
+    elif distribution == "clustered":
+        # Points concentrated around a few dense "cities"
+        centers = np.random.default_rng(0).uniform(0.1 * extent, 0.9 * extent, size=(16, 2))
+        which = rng.integers(0, len(centers), count)
+        x = np.clip(centers[which, 0] + rng.normal(0, extent / 25, count), 0, extent)
+        y = np.clip(centers[which, 1] + rng.normal(0, extent / 25, count), 0, extent)
+    elif distribution == "terrain":
+        x = rng.uniform(0, extent, count)
+        y = rng.uniform(0, extent, count)
+    else:
+        raise ValueError(f"Unknown distribution: {distribution}")
+
+    ground = _surface(x, y, extent)
+    z = ground.copy()
+    classification = np.full(count, 2, dtype=np.uint8)
+    number_of_returns = np.ones(count, dtype=np.uint8)
+    return_number = np.ones(count, dtype=np.uint8)
+
+    if distribution != "uniform":
+        # ~35% vegetation with multiple returns, ~10% buildings
+        kind = rng.random(count)
+        vegetation = kind < 0.35
+        building = (kind >= 0.35) & (kind < 0.45)
+
+        returns = rng.integers(1, 5, vegetation.sum()).astype(np.uint8)
+        number_of_returns[vegetation] = returns
+        return_number[vegetation] = (rng.random(len(returns)) * returns).astype(np.uint8) + 1
+        z[vegetation] += rng.uniform(0.5, 25.0, vegetation.sum()) * (
+            1 - (return_number[vegetation] - 1) / number_of_returns[vegetation]
+        )
+        classification[vegetation] = 5
+
+        z[building] += rng.uniform(3.0, 30.0, building.sum())
+        classification[building] = 6
+    else:
+        z = rng.uniform(ground.min(), ground.max() + 30.0, count)
+        classification = rng.integers(1, 7, count).astype(np.uint8)
+
+    # Isolated noise: birds / multipath
+    noise = rng.random(count) < NOISE_FRACTION
+    z[noise] += rng.choice([-1.0, 1.0], noise.sum()) * rng.uniform(50.0, 400.0, noise.sum())
+    classification[noise] = 7
+
+    intensity = np.clip(rng.normal(1200, 400, count), 0, 65535).astype(np.uint16)
+    shade = ((z - 60.0) / 120.0).clip(0, 1)
+    red = (shade * 65535).astype(np.uint16)
+    green = ((1 - shade) * 50000).astype(np.uint16)
+    blue = np.full(count, 20000, dtype=np.uint16)
+
+    return {
+        "x": x + origin[0],
+        "y": y + origin[1],
+        "z": z,
+        "intensity": intensity,
+        "classification": classification,
+        "return_number": return_number,
+        "number_of_returns": number_of_returns,
+        "red": red,
+        "green": green,
+        "blue": blue,
+    }
+
+
+def generate(output_path, point_count, point_format=6, distribution="terrain",
+             seed=42, extent=None, origin=(500000.0, 400000.0), epsg=DEFAULT_EPSG,
+             chunk_points=CHUNK_POINTS):
+    """
+    Write a synthetic point cloud to output_path (.las, .laz or .csv/.txt).
+    The area grows with the point count (~10 points/m2) unless extent is given.
+    """
+    if distribution not in DISTRIBUTIONS:
+        raise ValueError(f"Unknown distribution: {distribution}")
+
+    if extent is None:
+        extent = max(np.sqrt(point_count / 10.0), 10.0)
+
+    rng = np.random.default_rng(seed)
+    ext = os.path.splitext(output_path)[1].lower()
+
+    if ext in (".csv", ".txt"):
+        with open(output_path, "w") as f:
+            f.write("x,y,z,intensity,classification\n")
+            for start in range(0, point_count, chunk_points):
+                chunk = generate_chunk(rng, min(chunk_points, point_count - start), distribution, extent, origin)
+                np.savetxt(
+                    f,
+                    np.column_stack((chunk["x"], chunk["y"], chunk["z"], chunk["intensity"], chunk["classification"])),
+                    fmt=["%.2f", "%.2f", "%.2f", "%d", "%d"],
+                    delimiter=","
+                )
+        return output_path
+
+    header = laspy.LasHeader(point_format=point_format)
+    header.scales = np.array([0.01, 0.01, 0.01])
+    header.offsets = np.array([origin[0], origin[1], 0.0])
+    if epsg:
+        try:
+            import pyproj
+            header.add_crs(pyproj.CRS.from_epsg(epsg))
+        except ImportError:
+            pass
+
+    dimensions = set(header.point_format.dimension_names)
+    with laspy.open(output_path, mode="w", header=header) as writer:
+        for start in range(0, point_count, chunk_points):
+            count = min(chunk_points, point_count - start)
+            chunk = generate_chunk(rng, count, distribution, extent, origin)
+            points = laspy.ScaleAwarePointRecord.zeros(count, header=header)
+            for name, values in chunk.items():
+                if name in ("x", "y", "z") or name in dimensions:
+                    points[name] = values
+            writer.write_points(points)
+
+    return output_path
+
+
+def main(argv=None):
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Generate a synthetic LAS/LAZ/CSV point cloud")
+    parser.add_argument("output_path", help="Output file (.las, .laz, .csv or .txt)")
+    parser.add_argument("--points", default="1M", help="Point count, e.g. 500K, 10M")
+    parser.add_argument("--point-format", type=int, default=6)
+    parser.add_argument("--distribution", default="terrain", choices=DISTRIBUTIONS)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--extent", type=float, default=None, help="Square side in meters")
+    args = parser.parse_args(argv)
+
+    generate(
+        args.output_path,
+        parse_count(args.points),
+        point_format=args.point_format,
+        distribution=args.distribution,
+        seed=args.seed,
+        extent=args.extent
+    )
+    print(f"Generated {args.points} points → {args.output_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,124 @@
+"""
+Command line interface exposing Logic.py functions
+"""
+import argparse
+import os
+import sys
+import Logic
+import profiling
+
+
+def build_parser():
+    """Create the argument parser with process / merge / retile subcommands"""
+    parser = argparse.ArgumentParser(
+        prog="lasgui-cli",
+        description="Process, merge and retile LAS files without the API"
+    )
+    parser.add_argument("--profile", action="store_true",
+                        help="Profile the run (cProfile + tracemalloc), saved next to the output "
+                             "as <output>.profile.zip")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    # process
+    process_parser = subparsers.add_parser("process", help="Process a single file")
+    process_parser.add_argument("input_path", help="Input file (LAS, CSV, TXT)")
+    process_parser.add_argument("output_path", help="Output file path")
+    process_parser.add_argument("--output-format", default=".las", choices=[".las", ".txt", ".csv"])
+    process_parser.add_argument("--points-to-render", type=float, default=10.0,
+                                help="Percentage of points to render (10.0-100.0)")
+    process_parser.add_argument("--exclude-classes", default="",
+                                help="Comma separated ASPRS classes to drop (e.g. 7,18)")
+    process_parser.add_argument("--include-classes", default="",
+                                help="Comma separated ASPRS classes to keep")
+    process_parser.add_argument("--return-filter", default="all",
+                                choices=["all", "first", "last", "single", "not_last"])
+    process_parser.add_argument("--intensity-min", type=int, default=None)
+    process_parser.add_argument("--intensity-max", type=int, default=None)
+    process_parser.add_argument("--drop-withheld", action="store_true")
+    process_parser.add_argument("--drop-synthetic", action="store_true")
+    process_parser.add_argument("--remove-outliers", action="store_true")
+    process_parser.add_argument("--outlier-neighbors", type=int, default=8)
+    process_parser.add_argument("--outlier-sigma", type=float, default=2.0)
+    process_parser.add_argument("--target-crs", default="",
+                                help="Reproject output to this CRS (e.g. EPSG:2180)")
+    process_parser.add_argument("--source-crs", default="",
+                                help="Input CRS when the file has no CRS VLR")
+    process_parser.add_argument("--output-point-format", default="keep",
+                                choices=["keep", "compact"] + [str(i) for i in range(11)],
+                                help="Smaller output point format, compact keeps XYZ (+ RGB)")
+    process_parser.add_argument("--drop-extra-dims", default="",
+                                help="Comma separated extra dimensions to drop, * drops all")
+
+    # merge
+    merge_parser = subparsers.add_parser("merge", help="Merge several LAS/LAZ files into one")
+    merge_parser.add_argument("output_path", help="Merged output file")
+    merge_parser.add_argument("input_paths", nargs="+", help="Input LAS/LAZ files")
+
+    # retile
+    retile_parser = subparsers.add_parser("retile", help="Split a LAS/LAZ file into a grid of tiles")
+    retile_parser.add_argument("input_path", help="Input LAS/LAZ file")
+    retile_parser.add_argument("output_dir", help="Existing folder for the tiles")
+    retile_parser.add_argument("--tile-size", type=float, required=True,
+                               help="Tile edge length in file units (e.g. meters)")
+    retile_parser.add_argument("--max-open-writers", type=int, default=Logic.MAX_OPEN_TILE_WRITERS)
+
+    return parser
+
+
+def settings_from_args(args):
+    """Convert `process` arguments into a Logic settings dict"""
+    return {
+        "output_format": args.output_format,
+        "points_to_render": args.points_to_render,
+        "exclude_classes": Logic.parse_class_list(args.exclude_classes),
+        "include_classes": Logic.parse_class_list(args.include_classes),
+        "return_filter": args.return_filter,
+        "intensity_min": args.intensity_min,
+        "intensity_max": args.intensity_max,
+        "drop_withheld": args.drop_withheld,
+        "drop_synthetic": args.drop_synthetic,
+        "remove_outliers": args.remove_outliers,
+        "outlier_neighbors": args.outlier_neighbors,
+        "outlier_sigma": args.outlier_sigma,
+        "target_crs": args.target_crs,
+        "source_crs": args.source_crs,
+        "output_point_format": args.output_point_format,
+        "drop_extra_dims": args.drop_extra_dims
+    }
+
+
+def run(args):
+    """Run the selected subcommand, returns (success, message)"""
+    if args.command == "process":
+        return Logic.process_file(args.input_path, args.output_path, settings_from_args(args))
+    if args.command == "merge":
+        return Logic.merge_files(args.input_paths, args.output_path)
+    if args.command == "retile":
+        return Logic.retile_file(args.input_path, args.output_dir, args.tile_size,
+                                 max_open_writers=args.max_open_writers)
+    return False, f"Unknown command: {args.command}"
+
+
+def profile_path_for(args):
+    """Where the --profile artifact of this run is stored (next to the output)"""
+    if args.command == "retile":
+        stem = os.path.splitext(os.path.basename(args.input_path))[0]
+        return os.path.join(args.output_dir, f"{stem}.profile.zip")
+    return f"{os.path.splitext(args.output_path)[0]}.profile.zip"
+
+
+def main(argv=None):
+    """Main entry point"""
+    args = build_parser().parse_args(argv)
+    if args.profile:
+        profile_path = profile_path_for(args)
+        success, message = profiling.profile_call(profile_path, run, args)
+        message += f"\nProfile saved → {profile_path}"
+    else:
+        success, message = run(args)
+    print(message, file=sys.stdout if success else sys.stderr)
+    return 0 if success else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
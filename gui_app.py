@@ -1,5 +1,6 @@
 import customtkinter as ctk
 import os
+import multiprocessing
 from typing import Dict, Any
 import json
 from views import (
@@ -14,10 +15,14 @@ from handlers import (
     handle_process_file,
     handle_clear_files,
     handle_open_settings,
+    handle_cancel_processing,
+    update_input_file_info,
     update_api_status_indicator,
     start_api_health_monitor
 )
 from settings_view import SettingsPage
+from ui_dispatcher import UiDispatcher, TaskManager
+import gui_config
 
 # Set appearance mode and color theme
 ctk.set_appearance_mode("dark")  # "light" or "dark"
@@ -37,11 +42,8 @@ class ModernGUIApp(ctk.CTk):
         # Center the window
         self.center_window()
         
-        # Current settings
-        self.current_settings = {
-            "output_format": ".las",
-            "points_to_render": 10.0
-        }
+        # Current settings (those of the last session, see gui_config)
+        self.current_settings = gui_config.load_settings()
         
         # API URL - defaults to localhost, can be overridden via environment variable
         self.api_url = os.environ.get('API_URL', 'http://localhost:8000')
@@ -50,6 +52,16 @@ class ModernGUIApp(ctk.CTk):
         self.input_file_path = None
         self.output_file_path = None
         
+        # Metadata of the input file returned by /api/inspect
+        self.input_file_info = None
+        
+        # Preview image of the input file (kept referenced so Tk does not drop it)
+        self.preview_image = None
+        
+        # Background work: widgets are only updated through the dispatcher
+        self.dispatcher = UiDispatcher(self)
+        self.tasks = TaskManager(self.dispatcher)
+        
         # Create UI
         self.create_widgets()
     
@@ -73,7 +85,8 @@ class ModernGUIApp(ctk.CTk):
         header_frame, self.api_status_label = create_main_app_header(main_container)
         
         # Create file selection section using views module
-        self.input_file_label, self.output_file_label = create_file_selection_section(
+        (self.input_file_label, self.output_file_label,
+         self.input_info_label, self.preview_label) = create_file_selection_section(
             main_container,
             lambda: handle_browse_input_file(self),
             lambda: handle_browse_output_file(self)
@@ -88,7 +101,10 @@ class ModernGUIApp(ctk.CTk):
         )
         
         # Create status section using views module
-        self.status_label, self.progress_bar = create_status_section(main_container)
+        self.status_label, self.progress_bar, self.cancel_button = create_status_section(
+            main_container,
+            lambda: handle_cancel_processing(self)
+        )
         
         # Check API health on startup
         self.after(100, lambda: self.check_api_on_startup())
@@ -103,6 +119,11 @@ class ModernGUIApp(ctk.CTk):
     def on_settings_saved(self, settings):
         """Callback when settings are saved"""
         self.current_settings = settings
+        try:
+            gui_config.save_settings(settings)
+        except OSError as e:
+            print(f"Could not save settings: {e}")
+        update_input_file_info(self)
         self.update_status("Settings saved successfully!")
     
     def update_status(self, message, error=False):
@@ -118,5 +139,7 @@ def main():
 
 
 if __name__ == "__main__":
+    # The local engine starts worker processes (needed in frozen builds)
+    multiprocessing.freeze_support()
     main()
 
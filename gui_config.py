@@ -0,0 +1,158 @@
+"""
+Local configuration file of the GUI: the last used settings and named
+processing presets, kept between sessions as JSON in the user's config
+directory (LASGUI_CONFIG overrides the path). A preset published to an
+API remembers its server id and version there, so jobs can reference it
+instead of sending every setting.
+"""
+import json
+import os
+import threading
+
+
+DEFAULT_SETTINGS = {
+    "output_format": ".las",
+    "points_to_render": 10.0,
+    "exclude_classes": "",
+    "return_filter": "all",
+    "drop_withheld": False,
+    "drop_synthetic": False,
+    "remove_outliers": False,
+    "target_crs": "",
+    "output_point_format": "keep",
+    "drop_extra_dims": False,
+    "engine": "auto"
+}
+
+# Settings of the GUI itself, not part of presets
+GUI_ONLY_SETTINGS = ("engine",)
+
+_lock = threading.Lock()
+
+
+def config_path() -> str:
+    """Path of the config file"""
+    if os.environ.get("LASGUI_CONFIG"):
+        return os.environ["LASGUI_CONFIG"]
+    if os.name == "nt":
+        base = os.environ.get("APPDATA") or os.path.expanduser("~")
+    else:
+        base = os.environ.get("XDG_CONFIG_HOME") or os.path.join(os.path.expanduser("~"), ".config")
+    return os.path.join(base, "lasgui", "config.json")
+
+
+def _load():
+    try:
+        with open(config_path(), encoding="utf-8") as f:
+            config = json.load(f)
+    except (OSError, ValueError):
+        config = {}
+    config.setdefault("settings", {})
+    config.setdefault("presets", {})
+    return config
+
+
+def _save(config):
+    """Write the whole file under a temporary name first, so a crash never leaves it half written"""
+    path = config_path()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    partial_path = path + ".partial"
+    with open(partial_path, "w", encoding="utf-8") as f:
+        json.dump(config, f, indent=2, sort_keys=True)
+    os.replace(partial_path, path)
+
+
+def preset_settings(settings: dict) -> dict:
+    """The part of the settings a preset stores"""
+    return {key: value for key, value in settings.items() if key not in GUI_ONLY_SETTINGS}
+
+
+def processing_settings(settings: dict) -> dict:
+    """
+    GUI settings as processing settings, the same dict for Logic.process_file
+    (local engine) and for the API form fields / server presets: defaults for
+    missing keys, no GUI-only keys, and the "drop extra dimensions" checkbox
+    as "*" (all of them).
+    """
+    result = preset_settings(dict(DEFAULT_SETTINGS, **settings))
+    result["drop_extra_dims"] = "*" if result.get("drop_extra_dims") else ""
+    return result
+
+
+def load_settings() -> dict:
+    """Settings of the last session (defaults for anything not stored)"""
+    with _lock:
+        stored = _load()["settings"]
+    return {key: stored.get(key, default) for key, default in DEFAULT_SETTINGS.items()}
+
+
+def save_settings(settings: dict):
+    with _lock:
+        config = _load()
+        config["settings"] = dict(settings)
+        _save(config)
+
+
+def list_presets() -> list:
+    """Names of the saved presets"""
+    with _lock:
+        return sorted(_load()["presets"])
+
+
+def get_preset(name: str):
+    """Settings of a preset, None if there is no such preset"""
+    with _lock:
+        preset = _load()["presets"].get(name)
+    return dict(preset["settings"]) if preset else None
+
+
+def find_preset(settings: dict):
+    """Name of a preset with exactly these settings, None if there is none"""
+    wanted = preset_settings(settings)
+    with _lock:
+        presets = _load()["presets"]
+    for name in sorted(presets):
+        if presets[name]["settings"] == wanted:
+            return name
+    return None
+
+
+def save_preset(name: str, settings: dict):
+    """
+    Save settings under a name (replacing an existing preset).
+    Server ids are kept, so publishing it again adds a new version of the same server preset.
+    """
+    with _lock:
+        config = _load()
+        previous = config["presets"].get(name, {})
+        config["presets"][name] = {
+            "settings": preset_settings(settings),
+            "server": previous.get("server", {})
+        }
+        _save(config)
+
+
+def delete_preset(name: str):
+    """Remove a preset locally (published versions stay on the server)"""
+    with _lock:
+        config = _load()
+        if config["presets"].pop(name, None) is not None:
+            _save(config)
+
+
+def server_preset_id(name: str, api_url: str):
+    """Id of the preset on this API, None if it was never published there"""
+    with _lock:
+        preset = _load()["presets"].get(name)
+    return preset["server"].get(api_url, {}).get("id") if preset else None
+
+
+def set_server_reference(name: str, api_url: str, preset_id: str, version: int):
+    """Remember the server id and version a preset was published as"""
+    with _lock:
+        config = _load()
+        preset = config["presets"].get(name)
+        if preset is None:
+            return
+        preset["server"][api_url] = {"id": preset_id, "version": version}
+        _save(config)
@@ -1,10 +1,32 @@
 import customtkinter as ctk
 import tkinter.filedialog as filedialog
 import os
-import requests
+import base64
+import hashlib
+import tkinter as tk
 from typing import Dict, Any
-import threading
-import time
+from lazy_import import LazyModule
+from api_client import abort_on_cancel, get_client
+from ui_dispatcher import TaskCancelled
+import local_engine
+import gui_config
+
+# Loaded in the background by the first API call, not before the window appears
+requests = LazyModule("requests")
+
+
+# Only the beginning of the input file is sent to /api/inspect - the header
+# and VLRs are at the start and a few MB are enough for the point sample
+INSPECT_UPLOAD_BYTES = 4 * 1024 * 1024
+
+# Preview rendering needs the whole file - larger files are not uploaded just for a preview
+PREVIEW_MAX_UPLOAD_BYTES = 2 * 1024 * 1024 * 1024
+PREVIEW_REQUEST_SIZE = 200
+
+
+def get_api_client(app_instance):
+    """Shared pooled API client of the app (one keep-alive session per API URL)"""
+    return get_client(getattr(app_instance, 'api_url', 'http://localhost:8000'))
 
 
 def handle_browse_input_file(app_instance):
@@ -28,6 +50,175 @@ def handle_browse_input_file(app_instance):
             text_color="white"
         )
         app_instance.update_status(f"Input file selected: {filename}")
+        
+        # Fetch file metadata and the preview in the background
+        # (a previously selected file's requests are cancelled)
+        app_instance.input_file_info = None
+        app_instance.input_info_label.configure(text="Reading file info...")
+        update_input_file_info(app_instance)
+        
+        clear_preview(app_instance, "Loading preview...")
+        app_instance.tasks.submit("preview", load_preview, app_instance, file_path)
+
+
+def load_preview(app_instance, file_path, task):
+    """
+    Show a top-down preview of the input file (runs in background task).
+    The file hash is computed locally first so a preview cached on the server
+    is fetched without uploading the file again.
+    """
+    api_client = get_api_client(app_instance)
+    ui = app_instance.dispatcher
+    
+    if not file_path.lower().endswith(('.las', '.laz')):
+        ui.call(clear_preview, app_instance, "No preview")
+        return
+    
+    try:
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                task.check_cancelled()
+                digest.update(block)
+        
+        params = {'mode': 'height', 'size': PREVIEW_REQUEST_SIZE}
+        response = api_client.get(
+            f'/api/preview/{digest.hexdigest()}',
+            params=params,
+            timeout=10
+        )
+        
+        if response.status_code == 404:
+            if os.path.getsize(file_path) > PREVIEW_MAX_UPLOAD_BYTES:
+                ui.call(clear_preview, app_instance, "File too large\nfor preview")
+                return
+            response = api_client.post_file(
+                '/api/preview',
+                file_path,
+                data=params,
+                progress=lambda sent, total: task.check_cancelled(),
+                timeout=300
+            )
+        
+        task.check_cancelled()
+        if response.status_code == 200:
+            png_data = base64.b64encode(response.content)
+            ui.call(show_preview, app_instance, file_path, png_data)
+        else:
+            ui.call(clear_preview, app_instance, "Preview unavailable")
+    
+    except TaskCancelled:
+        raise
+    except requests.exceptions.RequestException:
+        ui.call(clear_preview, app_instance, "Preview unavailable\n(API not reachable)")
+    except Exception:
+        ui.call(clear_preview, app_instance, "Preview unavailable")
+
+
+def show_preview(app_instance, file_path, png_data):
+    """Display a base64 PNG preview (must run on the Tk main loop)"""
+    if app_instance.input_file_path != file_path:
+        return
+    app_instance.preview_image = tk.PhotoImage(data=png_data)
+    app_instance.preview_label.configure(image=app_instance.preview_image, text="")
+
+
+def clear_preview(app_instance, text):
+    """Remove the preview image and show a placeholder text"""
+    app_instance.preview_image = None
+    app_instance.preview_label.configure(image="", text=text)
+
+
+def update_input_file_info(app_instance):
+    """
+    Fetch input file metadata and the server's output size estimate for the
+    current settings (in the background, replacing a running request)
+    """
+    file_path = getattr(app_instance, 'input_file_path', None)
+    if not file_path:
+        return
+    settings = gui_config.processing_settings(app_instance.current_settings)
+    app_instance.tasks.submit("inspect", inspect_input_file, app_instance, file_path, settings)
+
+
+def inspect_input_file(app_instance, file_path, settings, task):
+    """Fetch input file metadata from the API (runs in background task)"""
+    api_client = get_api_client(app_instance)
+    ui = app_instance.dispatcher
+    
+    try:
+        with open(file_path, 'rb') as f:
+            head = f.read(INSPECT_UPLOAD_BYTES)
+        
+        response = api_client.post(
+            '/api/inspect',
+            files={'file': (os.path.basename(file_path), head, 'application/octet-stream')},
+            data=settings,
+            timeout=30
+        )
+        
+        task.check_cancelled()
+        if response.status_code == 200:
+            info = response.json()
+            info['file_size'] = os.path.getsize(file_path)
+            ui.call(show_input_file_info, app_instance, file_path, info)
+        else:
+            ui.call(set_input_info_text, app_instance, file_path, "")
+    
+    except TaskCancelled:
+        raise
+    except requests.exceptions.RequestException:
+        ui.call(set_input_info_text, app_instance, file_path, "File info unavailable (API not reachable)")
+    except Exception as e:
+        ui.call(set_input_info_text, app_instance, file_path, f"File info unavailable: {str(e)}")
+
+
+def show_input_file_info(app_instance, file_path, info):
+    """Display /api/inspect results (main loop, ignored if another file was selected)"""
+    if app_instance.input_file_path != file_path:
+        return
+    app_instance.input_file_info = info
+    
+    crs = info.get('crs') or {}
+    crs_text = f"EPSG:{crs['epsg']}" if crs.get('epsg') else (crs.get('name') or "no CRS")
+    
+    lines = [
+        f"{info['point_count']:,} points · format {info['point_format']} · LAS {info['version']} · {crs_text}"
+    ]
+    if 'estimated_output_points' in info:
+        lines.append(
+            f"Size {format_size(info['file_size'])} → est. output {info['estimated_output_points']:,} points "
+            f"(~{format_size(info['estimated_output_bytes'])}) with current settings"
+        )
+    else:
+        lines.append(f"Size {format_size(info['file_size'])} · {info.get('estimate_error', 'no estimate')}")
+    
+    histogram = info.get('classification_histogram')
+    if histogram:
+        total = sum(histogram.values())
+        classes = ", ".join(
+            f"{c}: {count / total:.0%}"
+            for c, count in sorted(histogram.items(), key=lambda item: -item[1])[:6]
+        )
+        lines.append(f"Classes (sample): {classes}")
+    
+    app_instance.input_info_label.configure(text="\n".join(lines))
+
+
+def set_input_info_text(app_instance, file_path, text):
+    """Set the file info label (main loop, ignored if another file was selected)"""
+    if app_instance.input_file_path == file_path:
+        app_instance.input_info_label.configure(text=text)
+
+
+def format_size(num_bytes):
+    """Format a byte count for display"""
+    size = float(num_bytes)
+    for unit in ["B", "KB", "MB"]:
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
 
 
 def handle_browse_output_file(app_instance):
@@ -67,101 +258,192 @@ def handle_process_file(app_instance):
         app_instance.update_status("❌ Input file does not exist!", error=True)
         return
     
-    # Check API health before processing
-    is_connected, message = check_api_health(app_instance.api_url)
-    if not is_connected:
-        app_instance.update_status(f"❌ {message}. Please ensure API is running.", error=True)
-        update_api_status_indicator(app_instance)
+    if app_instance.tasks.running("process"):
+        app_instance.update_status("A file is already being processed", error=True)
         return
     
-    # Show progress bar
+    # Show progress bar and cancel button
     app_instance.progress_bar.pack(fill="x", padx=15, pady=(0, 15))
     app_instance.progress_bar.set(0)
+    app_instance.cancel_button.pack(anchor="e", padx=15, pady=(0, 15))
     
     app_instance.update_status("Processing file...")
     
-    # Simulate processing (replace with actual processing logic)
-    app_instance.after(100, lambda: simulate_processing(app_instance))
+    # The job works on copies so later changes in the window do not affect it
+    app_instance.tasks.submit(
+        "process",
+        process_file_locally if use_local_engine(app_instance) else process_file_via_api,
+        app_instance,
+        app_instance.input_file_path,
+        app_instance.output_file_path,
+        dict(app_instance.current_settings),
+        on_success=lambda result: finish_processing(app_instance, *result),
+        on_error=lambda e: finish_processing(app_instance, False, f"❌ Error processing file: {str(e)}"),
+        on_cancel=lambda: finish_processing(app_instance, False, "⏹️ Processing cancelled")
+    )
+
+
+def handle_cancel_processing(app_instance):
+    """Abort the running processing job"""
+    app_instance.tasks.cancel("process")
+
 
+def report_progress(app_instance, fraction, message=None):
+    """Update progress bar / status from a background task (coalesced to one update per frame)"""
+    def apply():
+        if app_instance.tasks.running("process"):
+            app_instance.progress_bar.set(fraction)
+            if message:
+                app_instance.update_status(message)
+    app_instance.dispatcher.call(apply, key="progress")
 
-def process_file_via_api(app_instance):
-    """Process file via API with progress updates"""
-    api_url = getattr(app_instance, 'api_url', 'http://localhost:8000')
+
+def finish_processing(app_instance, success, message):
+    """Hide progress widgets and show the result of a processing job (main loop)"""
+    app_instance.progress_bar.pack_forget()
+    app_instance.cancel_button.pack_forget()
+    app_instance.update_status(message, error=not success)
+    if not success:
+        update_api_status_indicator(app_instance)
+
+
+def use_local_engine(app_instance):
+    """Whether jobs run in a local worker process ("engine" setting: auto, local or api)"""
+    engine = app_instance.current_settings.get('engine', 'auto')
+    return engine != 'api' and local_engine.is_available()
+
+
+def process_file_locally(app_instance, input_path, output_path, settings, task):
+    """
+    Process file with Logic in a local worker process (runs in background task).
+    Same progress events and result as process_file_via_api, without moving
+    the file through the API. Falls back to the API if Logic cannot be loaded.
+    Returns (success, message).
+    """
+    def stage_progress(fraction, stage):
+        report_progress(app_instance, fraction, local_engine.STAGE_LABELS.get(stage, stage))
     
     try:
-        # Update progress bar
-        app_instance.progress_bar.set(0.2)
-        app_instance.update()
+        output_dir = os.path.dirname(output_path)
+        if output_dir and not os.path.exists(output_dir):
+            os.makedirs(output_dir, exist_ok=True)
         
-        # Read the input file
-        with open(app_instance.input_file_path, 'rb') as f:
-            files = {'file': (os.path.basename(app_instance.input_file_path), f, 'application/octet-stream')}
-            
-            # Prepare form data
-            data = {
-                'output_format': app_instance.current_settings.get('output_format', '.las'),
-                'points_to_render': app_instance.current_settings.get('points_to_render', 10.0)
-            }
-            
-            app_instance.progress_bar.set(0.5)
-            app_instance.update()
-            
-            # Make API request
-            response = requests.post(
-                f'{api_url}/api/process-file',
-                files=files,
+        success, message = local_engine.run_job(
+            input_path,
+            output_path,
+            gui_config.processing_settings(settings),
+            progress=stage_progress,
+            check_cancelled=task.check_cancelled
+        )
+    except local_engine.EngineUnavailable:
+        report_progress(app_instance, 0.0, "Local engine unavailable, using the API...")
+        return process_file_via_api(app_instance, input_path, output_path, settings, task)
+    except FileNotFoundError:
+        return False, "❌ Input file not found!"
+    
+    if success:
+        return True, f"✅ File processed successfully! Saved to: {os.path.basename(output_path)}"
+    return False, f"❌ {message}"
+
+
+def process_file_via_api(app_instance, input_path, output_path, settings, task):
+    """
+    Process file via API with progress updates (runs in background task).
+    The upload is streamed from disk and the result streamed to a temporary
+    file, both can be cancelled. Returns (success, message).
+    """
+    api_client = get_api_client(app_instance)
+    
+    try:
+        # Check API health before processing
+        is_connected, message = check_api_health(api_client)
+        if not is_connected:
+            return False, f"❌ {message}. Please ensure API is running."
+        
+        # Settings saved as a preset are sent as a reference to its server version
+        preset_name = gui_config.find_preset(settings)
+        reference = None
+        if preset_name:
+            try:
+                reference = publish_preset(api_client, app_instance.api_url, preset_name)
+            except (requests.exceptions.RequestException, ValueError):
+                reference = None
+        
+        # Prepare form data
+        if reference:
+            data = {'preset': reference}
+        else:
+            data = gui_config.processing_settings(settings)
+        data['delete_after_download'] = True
+        
+        def upload_progress(sent, total):
+            task.check_cancelled()
+            report_progress(app_instance, 0.5 * sent / total,
+                            f"Uploading... {format_size(sent)} / {format_size(total)}")
+        
+        # Cancel aborts the request in flight (upload, waiting for the server or download)
+        with abort_on_cancel(task):
+            # Make API request (5 minute timeout for large files)
+            response = api_client.post_file(
+                '/api/process-file',
+                input_path,
                 data=data,
-                timeout=300  # 5 minute timeout for large files
+                progress=upload_progress,
+                stream=True,
+                timeout=300
             )
             
-            app_instance.progress_bar.set(0.9)
-            app_instance.update()
-            
-            if response.status_code == 200:
-                # Save the processed file
-                output_dir = os.path.dirname(app_instance.output_file_path)
-                if not os.path.exists(output_dir):
-                    os.makedirs(output_dir, exist_ok=True)
+            with response:
+                task.check_cancelled()
                 
-                with open(app_instance.output_file_path, 'wb') as out_file:
-                    out_file.write(response.content)
+                if response.status_code != 200:
+                    error_msg = response.json().get('detail', f'API error: {response.status_code}')
+                    return False, f"❌ {error_msg}"
                 
-                app_instance.progress_bar.set(1.0)
-                app_instance.update()
-                app_instance.progress_bar.pack_forget()
-                app_instance.update_status(f"✅ File processed successfully! Saved to: {os.path.basename(app_instance.output_file_path)}")
-            else:
-                error_msg = response.json().get('detail', f'API error: {response.status_code}')
-                app_instance.progress_bar.pack_forget()
-                app_instance.update_status(f"❌ {error_msg}", error=True)
+                # Save the processed file
+                output_dir = os.path.dirname(output_path)
+                if output_dir and not os.path.exists(output_dir):
+                    os.makedirs(output_dir, exist_ok=True)
                 
+                total = int(response.headers.get('Content-Length', 0))
+                received = 0
+                partial_path = output_path + '.partial'
+                try:
+                    with open(partial_path, 'wb') as out_file:
+                        for block in response.iter_content(1024 * 1024):
+                            task.check_cancelled()
+                            out_file.write(block)
+                            received += len(block)
+                            if total:
+                                report_progress(app_instance, 0.5 + 0.5 * received / total,
+                                                f"Downloading... {format_size(received)} / {format_size(total)}")
+                    os.replace(partial_path, output_path)
+                finally:
+                    if os.path.exists(partial_path):
+                        os.remove(partial_path)
+        
+        return True, f"✅ File processed successfully! Saved to: {os.path.basename(output_path)}"
+    
+    except TaskCancelled:
+        raise
     except requests.exceptions.ConnectionError:
-        app_instance.progress_bar.pack_forget()
-        app_instance.update_status("❌ Cannot connect to API server. Is it running?", error=True)
+        return False, "❌ Cannot connect to API server. Is it running?"
     except requests.exceptions.Timeout:
-        app_instance.progress_bar.pack_forget()
-        app_instance.update_status("❌ Request timed out. File may be too large.", error=True)
+        return False, "❌ Request timed out. File may be too large."
     except FileNotFoundError:
-        app_instance.progress_bar.pack_forget()
-        app_instance.update_status("❌ Input file not found!", error=True)
+        return False, "❌ Input file not found!"
     except Exception as e:
-        app_instance.progress_bar.pack_forget()
-        app_instance.update_status(f"❌ Error processing file: {str(e)}", error=True)
-
-
-def simulate_processing(app_instance):
-    """Process file with progress updates (runs in background thread)"""
-    # Run API call in a separate thread to avoid blocking UI
-    thread = threading.Thread(target=process_file_via_api, args=(app_instance,))
-    thread.daemon = True
-    thread.start()
+        return False, f"❌ Error processing file: {str(e)}"
 
 
 def handle_clear_files(app_instance):
     """Handle clearing selected files"""
     app_instance.input_file_path = None
     app_instance.output_file_path = None
+    app_instance.input_file_info = None
     app_instance.input_file_label.configure(text="No file selected", text_color="gray")
+    app_instance.input_info_label.configure(text="")
+    clear_preview(app_instance, "No preview")
     app_instance.output_file_label.configure(text="Output will be saved here", text_color="gray")
     app_instance.update_status("Files cleared")
 
@@ -179,8 +461,8 @@ def handle_save_settings(settings_page_instance):
     for key, widget_data in settings_page_instance.settings.items():
         if key == "output_format":
             settings_page_instance.settings[key] = settings_page_instance.output_format.get()
-        elif key == "points_to_render":
-            settings_page_instance.settings[key] = settings_page_instance.settingsWidget["points_to_render"]
+        elif key in settings_page_instance.settingsWidget:
+            settings_page_instance.settings[key] = settings_page_instance.settingsWidget[key]
     
     print(settings_page_instance.settings)
     # Call callback with settings
@@ -200,19 +482,88 @@ def handle_save_settings(settings_page_instance):
 
 
 def handle_reset_settings(settings_page_instance):
-    settings_page_instance.settings_callback({
-            "output_format": ".las",
-            "points_to_render": 10.0
-        })
+    """Reset all settings to their defaults and close the settings window"""
+    settings_page_instance.settings_callback(dict(gui_config.DEFAULT_SETTINGS))
+    settings_page_instance.destroy()
 
 
-def check_api_health(api_url, timeout=2):
+def publish_preset(api_client, api_url, name):
+    """
+    Store a local preset on the API (a new server version if its settings changed)
+    and return the reference jobs use ("<id>@<version>").
+    Raises requests exceptions when the API cannot be reached.
+    """
+    settings = gui_config.get_preset(name)
+    if settings is None:
+        raise ValueError(f"No preset named {name}")
+    
+    body = {'name': name, 'settings': gui_config.processing_settings(settings)}
+    preset_id = gui_config.server_preset_id(name, api_url)
+    response = None
+    if preset_id:
+        response = api_client.request('PUT', f'/api/presets/{preset_id}', json=body, timeout=10)
+    if response is None or response.status_code == 404:
+        # Never published here, or the server no longer has it
+        response = api_client.post('/api/presets', json=body, timeout=10)
+    if response.status_code != 200:
+        raise ValueError(response.json().get('detail', f'API error: {response.status_code}'))
+    
+    preset = response.json()
+    gui_config.set_server_reference(name, api_url, preset['id'], preset['version'])
+    return f"{preset['id']}@{preset['version']}"
+
+
+def handle_apply_preset(settings_page_instance, name):
+    """Use the settings of a saved preset and close the settings window"""
+    settings = gui_config.get_preset(name)
+    if settings is None:
+        return
+    
+    app_instance = settings_page_instance.master
+    settings_page_instance.settings_callback({**app_instance.current_settings, **settings})
+    settings_page_instance.destroy()
+    app_instance.update_status(f"Preset applied: {name}")
+
+
+def handle_save_preset(settings_page_instance, name):
+    """Save the settings shown in the settings window as a named preset and publish it to the API"""
+    name = name.strip()
+    if not name:
+        return
+    
+    handle_save_settings(settings_page_instance)
+    gui_config.save_preset(name, settings_page_instance.settings)
+    settings_page_instance.preset_box.configure(values=gui_config.list_presets())
+    settings_page_instance.preset_box.set(name)
+    
+    app_instance = settings_page_instance.master
+    app_instance.tasks.submit(
+        "preset-sync",
+        lambda task: publish_preset(get_api_client(app_instance), app_instance.api_url, name),
+        on_success=lambda reference: app_instance.update_status(
+            f"✅ Preset saved: {name} (version {reference.split('@')[1]})"
+        ),
+        on_error=lambda e: app_instance.update_status(f"Preset saved locally: {name} (API not reachable)")
+    )
+
+
+def handle_delete_preset(settings_page_instance, name):
+    """Remove a saved preset"""
+    if not name:
+        return
+    gui_config.delete_preset(name)
+    names = gui_config.list_presets()
+    settings_page_instance.preset_box.configure(values=names)
+    settings_page_instance.preset_box.set(names[0] if names else "")
+
+
+def check_api_health(api_client, timeout=2):
     """
     Check if API is available and healthy.
     Returns (is_connected, message)
     """
     try:
-        response = requests.get(f'{api_url}/health', timeout=timeout)
+        response = api_client.get('/health', timeout=timeout)
         if response.status_code == 200:
             data = response.json()
             if data.get('status') == 'healthy':
@@ -230,9 +581,17 @@ def check_api_health(api_url, timeout=2):
 
 
 def update_api_status_indicator(app_instance):
-    """Update the API connection status indicator"""
-    is_connected, message = check_api_health(app_instance.api_url)
-    
+    """Check the API in the background and update the connection status indicator"""
+    if not app_instance.tasks.running("health"):
+        app_instance.tasks.submit(
+            "health",
+            lambda task: check_api_health(get_api_client(app_instance)),
+            on_success=lambda result: show_api_status(app_instance, *result)
+        )
+
+
+def show_api_status(app_instance, is_connected, message):
+    """Show the API connection status (main loop)"""
     if hasattr(app_instance, 'api_status_label'):
         if is_connected:
             app_instance.api_status_label.configure(
@@ -244,19 +603,12 @@ def update_api_status_indicator(app_instance):
                 text=f"🔴 {message}",
                 text_color="red"
             )
-    
-    return is_connected
 
 
 def start_api_health_monitor(app_instance, interval=5):
-    """Start periodic API health monitoring"""
+    """Start periodic API health monitoring (scheduled on the main loop, checked in the background)"""
     def monitor():
-        while True:
-            update_api_status_indicator(app_instance)
-            time.sleep(interval)
-    
-    thread = threading.Thread(target=monitor, daemon=True)
-    thread.start()
-    
+        update_api_status_indicator(app_instance)
+        app_instance.after(int(interval * 1000), monitor)
     
-   
+    app_instance.after(int(interval * 1000), monitor)
@@ -0,0 +1,47 @@
+"""
+Deferred imports of heavy modules (NumPy, laspy, requests, ...).
+`np = LazyModule("numpy")` costs nothing at startup; the module is imported
+on first attribute access. Imports go through importlib, whose per-module
+locks make concurrent first use from several threads safe.
+"""
+import importlib
+
+
+class LazyModule:
+    """
+    Proxy that imports the named module on first attribute access.
+    The proxy itself has no public attributes, so every name (np.load,
+    json.load, ...) resolves to the module; use load() to import it explicitly.
+    """
+
+    def __init__(self, name):
+        object.__setattr__(self, "_lazy_name", name)
+        object.__setattr__(self, "_lazy_module", None)
+
+    def __getattr__(self, attr):
+        value = getattr(load(self), attr)
+        # Later lookups of the same attribute skip __getattr__
+        object.__setattr__(self, attr, value)
+        return value
+
+    def __repr__(self):
+        state = "loaded" if object.__getattribute__(self, "_lazy_module") is not None else "not loaded"
+        return f"<lazy module '{object.__getattribute__(self, '_lazy_name')}' ({state})>"
+
+
+def load(module):
+    """Import a lazy module now, returns the real module"""
+    real = object.__getattribute__(module, "_lazy_module")
+    if real is None:
+        real = importlib.import_module(object.__getattribute__(module, "_lazy_name"))
+        object.__setattr__(module, "_lazy_module", real)
+    return real
+
+
+def preload(*modules):
+    """Import lazy modules ahead of first use (e.g. from a background thread after startup)"""
+    for module in modules:
+        if isinstance(module, LazyModule):
+            load(module)
+        else:
+            importlib.import_module(module)
@@ -0,0 +1,116 @@
+"""
+Local processing engine for the GUI.
+Runs Logic.process_file in a separate process directly on the chosen paths,
+so the file is not uploaded to the API, copied and downloaded again.
+"""
+import importlib.util
+import multiprocessing
+import os
+import queue
+from functools import lru_cache
+
+
+# Modules the engine needs in this installation
+REQUIRED_MODULES = ("Logic", "laspy", "numpy")
+
+# How often the GUI side checks for cancellation while waiting for events (seconds)
+POLL_INTERVAL = 0.1
+
+STAGE_LABELS = {
+    "read": "Reading input...",
+    "filter": "Filtering points...",
+    "transform": "Converting...",
+    "write": "Writing output...",
+    "done": "Finishing...",
+}
+
+
+class EngineUnavailable(Exception):
+    """Logic (or its dependencies) cannot be used in this installation"""
+
+
+@lru_cache(maxsize=None)
+def is_available() -> bool:
+    """Whether Logic and its dependencies are installed (checked without importing them)"""
+    try:
+        return all(importlib.util.find_spec(name) is not None for name in REQUIRED_MODULES)
+    except (ImportError, ValueError):
+        return False
+
+
+def _worker(input_path, output_path, settings, events):
+    """Worker process: run Logic.process_file and send progress / result events"""
+    try:
+        import Logic
+    except ImportError as e:
+        events.put(("unavailable", str(e)))
+        return
+
+    def progress(fraction, stage):
+        events.put(("progress", fraction, stage))
+
+    try:
+        success, message = Logic.process_file(input_path, output_path, settings, progress=progress)
+    except Exception as e:
+        success, message = False, f"Processing error: {str(e)}"
+    events.put(("done", success, message))
+
+
+def run_job(input_path, output_path, settings, progress=None, check_cancelled=None):
+    """
+    Process input_path into output_path in a worker process (blocking).
+    progress(fraction, stage) reports the Logic stages. check_cancelled() is
+    called while waiting; an exception raised by it terminates the worker and
+    propagates. The result is written under a temporary name and only moved
+    to output_path on success.
+    Returns (success, message); raises EngineUnavailable when Logic cannot be imported.
+    """
+    if not is_available():
+        raise EngineUnavailable("Logic is not installed")
+
+    # Logic replaces the extension with settings["output_format"]
+    output_ext = settings.get("output_format", ".las")
+    partial_path = f"{os.path.splitext(output_path)[0]}.partial{output_ext}"
+
+    context = multiprocessing.get_context("spawn")
+    events = context.Queue()
+    process = context.Process(
+        target=_worker,
+        args=(input_path, partial_path, settings, events),
+        daemon=True
+    )
+    process.start()
+    try:
+        while True:
+            if check_cancelled:
+                check_cancelled()
+            try:
+                event = events.get(timeout=POLL_INTERVAL)
+            except queue.Empty:
+                if process.is_alive():
+                    continue
+                try:
+                    event = events.get_nowait()
+                except queue.Empty:
+                    return False, f"Local engine stopped unexpectedly (exit code {process.exitcode})"
+
+            if event[0] == "progress":
+                if progress:
+                    progress(event[1], event[2])
+            elif event[0] == "unavailable":
+                raise EngineUnavailable(event[1])
+            else:
+                _, success, message = event
+                break
+
+        process.join()
+        if success:
+            os.replace(partial_path, output_path)
+        return success, message
+
+    finally:
+        if process.is_alive():
+            process.terminate()
+            process.join()
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
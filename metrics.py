@@ -0,0 +1,269 @@
+"""
+Minimal Prometheus-style metrics (counters, gauges, histograms) and timing helpers.
+Thread-safe, no external dependencies; rendered by the API at /metrics.
+"""
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+# Buckets for stage/response durations (seconds)
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+# Buckets for memory usage (bytes): 64 MB ... 32 GB
+MEMORY_BUCKETS = tuple(64 * 1024 * 1024 * 2 ** i for i in range(10))
+
+# How often the per-job RSS sampler reads the process memory usage (seconds)
+RSS_SAMPLE_INTERVAL = 0.05
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    escaped = ",".join(
+        '{}="{}"'.format(name, str(value).replace("\\", "\\\\").replace('"', '\\"'))
+        for name, value in pairs
+    )
+    return "{" + escaped + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    """Base class: a named metric family with optional labels"""
+
+    kind = "untyped"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+        REGISTRY.append(self)
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.extend(self._render_sample(key, value))
+        return lines
+
+    def _render_sample(self, key, value):
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"]
+
+
+class Counter(_Metric):
+    """Monotonically increasing value"""
+
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+
+class Gauge(_Metric):
+    """Value that can go up and down"""
+
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+
+class Histogram(_Metric):
+    """Distribution of observed values in cumulative buckets"""
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DURATION_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state["counts"][i] += 1
+                    break
+            state["sum"] += value
+            state["count"] += 1
+
+    def _render_sample(self, key, state):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, state["counts"]):
+            cumulative += count
+            labels = _format_labels(self.labelnames, key, ("le", _format_value(bound)))
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        labels = _format_labels(self.labelnames, key)
+        lines.append(f"{self.name}_sum{labels} {state['sum']!r}")
+        lines.append(f"{self.name}_count{labels} {state['count']}")
+        return lines
+
+
+REGISTRY = []
+
+
+STAGE_DURATION = Histogram(
+    "lasgui_stage_duration_seconds",
+    "Time spent in a processing or transfer stage",
+    ["stage"]
+)
+POINTS_PROCESSED = Counter(
+    "lasgui_points_processed_total",
+    "Points read from inputs (in) and written to outputs (out)",
+    ["direction"]
+)
+BYTES_TRANSFERRED = Counter(
+    "lasgui_bytes_total",
+    "Bytes received from clients (in) and sent to clients (out)",
+    ["direction"]
+)
+JOBS_TOTAL = Counter(
+    "lasgui_jobs_total",
+    "Finished jobs by kind and status",
+    ["kind", "status"]
+)
+JOBS_QUEUED = Gauge(
+    "lasgui_jobs_queued",
+    "Jobs waiting for a free worker"
+)
+JOBS_ACTIVE = Gauge(
+    "lasgui_jobs_active",
+    "Jobs currently running on a worker"
+)
+WORKERS = Gauge(
+    "lasgui_workers",
+    "Maximum number of concurrently running jobs"
+)
+CACHE_REQUESTS = Counter(
+    "lasgui_cache_requests_total",
+    "Cache lookups by cache and result (hit/miss)",
+    ["cache", "result"]
+)
+JOB_PEAK_RSS = Histogram(
+    "lasgui_job_peak_rss_bytes",
+    "Peak resident memory of the process while a job was running",
+    ["kind"],
+    buckets=MEMORY_BUCKETS
+)
+PROCESS_PEAK_RSS = Gauge(
+    "lasgui_process_peak_rss_bytes",
+    "Peak resident memory of the process since start"
+)
+STORAGE_BYTES = Gauge(
+    "lasgui_storage_bytes",
+    "Disk space used by the working directories at the last janitor sweep"
+)
+STORAGE_EVICTIONS = Counter(
+    "lasgui_storage_evictions_total",
+    "Working directory entries removed by reason (ttl, quota, download)",
+    ["reason"]
+)
+
+
+def render():
+    """Render all metrics in the Prometheus text exposition format"""
+    PROCESS_PEAK_RSS.set(_process_peak_rss())
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+@contextmanager
+def timed(stage):
+    """Observe the duration of the enclosed block as a stage"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_DURATION.observe(time.perf_counter() - start, stage=stage)
+
+
+def _current_rss():
+    """Current resident memory of this process in bytes (Linux), 0 if unknown"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def _process_peak_rss():
+    """Peak resident memory of this process in bytes, 0 if unknown"""
+    if resource is None:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+@contextmanager
+def track_peak_rss(kind):
+    """
+    Sample the process RSS while the enclosed job runs and record the peak.
+    With several concurrent jobs the value covers the whole process.
+    """
+    peak = [_current_rss()]
+    done = threading.Event()
+
+    def sample():
+        while not done.wait(RSS_SAMPLE_INTERVAL):
+            peak[0] = max(peak[0], _current_rss())
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+    try:
+        yield
+    finally:
+        done.set()
+        sampler.join()
+        peak[0] = max(peak[0], _current_rss())
+        if peak[0]:
+            JOB_PEAK_RSS.observe(peak[0], kind=kind)
@@ -0,0 +1,149 @@
+"""
+Opt-in profiling of a single processing job.
+Captures a cProfile profile and a tracemalloc peak snapshot and stores them
+as one ZIP artifact (profile.prof, profile.txt, memory.txt).
+"""
+import cProfile
+import io
+import multiprocessing
+import os
+import pickle
+import pstats
+import queue
+import time
+import tracemalloc
+import zipfile
+
+
+# Number of functions / allocation sites listed in the text reports
+REPORT_LIMIT = 40
+
+# Stack depth recorded by tracemalloc
+TRACEMALLOC_FRAMES = 10
+
+# How often profile_job checks the worker process while waiting for events (seconds)
+POLL_INTERVAL = 0.1
+
+
+def profile_call(artifact_path, func, *args, **kwargs):
+    """
+    Run func(*args, **kwargs) under cProfile and tracemalloc and write the
+    results to the ZIP file artifact_path. Returns whatever func returns.
+    cProfile only sees the calling thread, so call this on the thread that
+    does the work. tracemalloc counts the allocations of the whole process,
+    so use it where nothing else runs (CLI, benchmark case) and profile_job
+    in a server.
+    """
+    was_tracing = tracemalloc.is_tracing()
+    if not was_tracing:
+        tracemalloc.start(TRACEMALLOC_FRAMES)
+    tracemalloc.reset_peak()
+    start_memory, _ = tracemalloc.get_traced_memory()
+
+    profiler = cProfile.Profile()
+    started = time.perf_counter()
+    profiler.enable()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        profiler.disable()
+        elapsed = time.perf_counter() - started
+        _, peak_memory = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot()
+        if not was_tracing:
+            tracemalloc.stop()
+
+        _write_artifact(artifact_path, profiler, snapshot, elapsed, peak_memory - start_memory)
+
+
+def profile_job(artifact_path, func, *args, progress=None, **kwargs):
+    """
+    profile_call in its own worker process, so the memory peak and the
+    allocation sites are those of this job only, whatever else the calling
+    process runs at the same time (profiled jobs do not wait for each other).
+    func and the arguments must be picklable (module-level functions).
+    progress(fraction, stage), if given, is passed on to func and called in
+    this process; an exception raised by it terminates the worker and
+    propagates. Returns whatever func returns.
+    """
+    context = multiprocessing.get_context("spawn")
+    events = context.Queue()
+    process = context.Process(
+        target=_profile_worker,
+        args=(artifact_path, func, args, kwargs, progress is not None, events),
+        daemon=True
+    )
+    process.start()
+    try:
+        while True:
+            try:
+                event = events.get(timeout=POLL_INTERVAL)
+            except queue.Empty:
+                if process.is_alive():
+                    continue
+                try:
+                    event = events.get_nowait()
+                except queue.Empty:
+                    raise RuntimeError(f"Profiled job stopped unexpectedly (exit code {process.exitcode})")
+
+            if event[0] == "progress":
+                progress(event[1], event[2])
+            elif event[0] == "error":
+                raise event[1]
+            else:
+                process.join()
+                return event[1]
+
+    finally:
+        if process.is_alive():
+            process.terminate()
+            process.join()
+
+
+def _profile_worker(artifact_path, func, args, kwargs, report_progress, events):
+    """Worker process of profile_job: profile func and send progress / result events"""
+    if report_progress:
+        kwargs["progress"] = lambda fraction, stage: events.put(("progress", fraction, stage))
+
+    try:
+        result = profile_call(artifact_path, func, *args, **kwargs)
+    except Exception as e:
+        try:
+            pickle.dumps(e)
+        except Exception:
+            e = RuntimeError(f"{type(e).__name__}: {e}")
+        events.put(("error", e))
+        return
+    events.put(("done", result))
+
+
+def _write_artifact(artifact_path, profiler, snapshot, elapsed, peak_memory):
+    """Write profile.prof, profile.txt and memory.txt into a ZIP file"""
+    stats_text = io.StringIO()
+    stats = pstats.Stats(profiler, stream=stats_text)
+    stats.sort_stats("cumulative").print_stats(REPORT_LIMIT)
+    stats.sort_stats("tottime").print_stats(REPORT_LIMIT)
+
+    memory_lines = [
+        f"Wall time: {elapsed:.3f} s",
+        f"Peak traced memory during job: {peak_memory / (1024 * 1024):.1f} MB",
+        "",
+        f"Top {REPORT_LIMIT} allocation sites still alive at the end of the job:",
+    ]
+    snapshot = snapshot.filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, __file__),
+    ])
+    for stat in snapshot.statistics("traceback")[:REPORT_LIMIT]:
+        memory_lines.append(f"{stat.size / 1024:.1f} KB in {stat.count} blocks")
+        memory_lines.extend(f"    {line}" for line in stat.traceback.format())
+
+    profile_path = artifact_path + ".prof.tmp"
+    profiler.dump_stats(profile_path)
+    try:
+        with zipfile.ZipFile(artifact_path, "w", zipfile.ZIP_DEFLATED) as archive:
+            archive.write(profile_path, "profile.prof")
+            archive.writestr("profile.txt", stats_text.getvalue())
+            archive.writestr("memory.txt", "\n".join(memory_lines) + "\n")
+    finally:
+        os.remove(profile_path)
@@ -1,12 +1,17 @@
 import customtkinter as ctk
 from views import (
     create_settings_page_ui,
+    create_presets_section,
     create_settings_buttons
 )
 from handlers import (
     handle_save_settings,
-    handle_reset_settings
+    handle_reset_settings,
+    handle_apply_preset,
+    handle_save_preset,
+    handle_delete_preset
 )
+import gui_config
 
 
 class SettingsPage(ctk.CTkToplevel):
@@ -28,21 +33,27 @@ class SettingsPage(ctk.CTkToplevel):
         self.transient(parent)  # Make it a transient window (child of parent)
         
         # Create UI using views module (includes "Hello Settings" text)
-        main_frame, self.output_format, button_frame = create_settings_page_ui(
+        main_frame, self.output_format, presets_frame, button_frame = create_settings_page_ui(
             self, settings_callback, current_settings, self.settingsWidget, self.settings
         )
         
+        # Saved presets (the one matching the current settings is selected)
+        self.preset_box, _ = create_presets_section(
+            presets_frame,
+            gui_config.list_presets(),
+            gui_config.find_preset(self.settings),
+            self.apply_preset,
+            self.save_preset,
+            self.delete_preset
+        )
+        
         # Create buttons using views module
         create_settings_buttons(
             button_frame,
             self.save_settings,
-            self.destroy   # ← cancel
+            self.destroy,   # ← cancel
+            self.reset_settings
         )
-
-
-        
-        # Load default settings
-        self.reset_settings()
         
         # Center and show the window
         self.center_window()
@@ -68,4 +79,13 @@ class SettingsPage(ctk.CTkToplevel):
     def reset_settings(self):
         """Reset all settings to default values"""
         handle_reset_settings(self)
+    
+    def apply_preset(self, name):
+        handle_apply_preset(self, name)
+    
+    def save_preset(self, name):
+        handle_save_preset(self, name)
+    
+    def delete_preset(self, name):
+        handle_delete_preset(self, name)
 
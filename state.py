@@ -0,0 +1,350 @@
+"""
+State shared by all API worker processes, kept in one SQLite database (WAL mode).
+With several uvicorn/gunicorn workers any worker can answer for any job:
+the job registry, the processing slots, the janitor's in-use marks and
+leases (e.g. "only one worker sweeps at a time") live here instead of in
+process memory, next to the versioned processing presets. Workers send heartbeats; jobs and marks of a worker that
+stopped heartbeating are released by the others.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+
+
+# A worker that has not sent a heartbeat for this many seconds is considered dead
+WORKER_TIMEOUT = 30
+
+# Seconds SQLite waits for another worker's write lock
+BUSY_TIMEOUT = 30
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS workers (
+    worker_id TEXT PRIMARY KEY,
+    pid INTEGER NOT NULL,
+    started REAL NOT NULL,
+    heartbeat REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS jobs (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_id TEXT NOT NULL UNIQUE,
+    kind TEXT NOT NULL,
+    status TEXT NOT NULL,
+    worker_id TEXT,
+    created REAL NOT NULL,
+    started REAL,
+    finished REAL,
+    message TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, seq);
+CREATE TABLE IF NOT EXISTS pins (
+    path TEXT NOT NULL,
+    worker_id TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (path, worker_id)
+);
+CREATE TABLE IF NOT EXISTS leases (
+    name TEXT PRIMARY KEY,
+    worker_id TEXT NOT NULL,
+    expires REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS presets (
+    preset_id TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    settings TEXT NOT NULL,
+    digest TEXT NOT NULL,
+    created REAL NOT NULL,
+    PRIMARY KEY (preset_id, version)
+);
+"""
+
+# Job statuses; queued and running jobs are "active"
+QUEUED, RUNNING, SUCCESS, ERROR = "queued", "running", "success", "error"
+
+
+class StateStore:
+    """
+    Shared state in a SQLite file. Safe to use from several threads and processes:
+    every thread of every process gets its own connection, writes run in
+    short IMMEDIATE transactions. Nothing is opened before first use, so the
+    store can be created at import time and the process forked afterwards.
+    """
+
+    def __init__(self, path, worker_timeout: float = WORKER_TIMEOUT):
+        self.path = Path(path)
+        self.worker_timeout = worker_timeout
+        self._local = threading.local()
+        self._worker = None  # (pid, worker_id)
+        self._worker_lock = threading.Lock()
+
+    @property
+    def worker_id(self) -> str:
+        """Id of this worker process (a new one after fork)"""
+        with self._worker_lock:
+            if self._worker is None or self._worker[0] != os.getpid():
+                self._worker = (os.getpid(), uuid.uuid4().hex)
+            return self._worker[1]
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None or self._local.pid != os.getpid():
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(str(self.path), timeout=BUSY_TIMEOUT, isolation_level=None)
+            connection.row_factory = sqlite3.Row
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript(_SCHEMA)
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    @contextmanager
+    def _transaction(self):
+        """Write transaction that also refreshes this worker's heartbeat"""
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            now = time.time()
+            connection.execute(
+                "INSERT INTO workers (worker_id, pid, started, heartbeat) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (worker_id) DO UPDATE SET heartbeat = excluded.heartbeat",
+                (self.worker_id, os.getpid(), now, now)
+            )
+            yield connection
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+
+    # Workers
+
+    def heartbeat(self):
+        """Mark this worker alive and release whatever dead workers left behind"""
+        with self._transaction() as connection:
+            self._reap(connection)
+
+    def _reap(self, connection):
+        connection.execute(
+            "DELETE FROM workers WHERE heartbeat < ? AND worker_id != ?",
+            (time.time() - self.worker_timeout, self.worker_id)
+        )
+        self._release_orphans(connection, "worker stopped")
+
+    @staticmethod
+    def _release_orphans(connection, message):
+        live = "SELECT worker_id FROM workers"
+        connection.execute(
+            f"UPDATE jobs SET status = ?, finished = ?, message = ? "
+            f"WHERE status IN (?, ?) AND worker_id NOT IN ({live})",
+            (ERROR, time.time(), message, QUEUED, RUNNING)
+        )
+        connection.execute(f"DELETE FROM pins WHERE worker_id NOT IN ({live})")
+        connection.execute(f"DELETE FROM leases WHERE worker_id NOT IN ({live})")
+
+    def unregister(self):
+        """Remove this worker on shutdown (its active jobs are marked failed)"""
+        with self._transaction() as connection:
+            connection.execute("DELETE FROM workers WHERE worker_id = ?", (self.worker_id,))
+            self._release_orphans(connection, "worker shut down")
+
+    def worker_count(self) -> int:
+        row = self._connection().execute(
+            "SELECT COUNT(*) FROM workers WHERE heartbeat >= ?",
+            (time.time() - self.worker_timeout,)
+        ).fetchone()
+        return row[0]
+
+    # Jobs
+
+    def add_job(self, job_id: str, kind: str):
+        """Register a queued job of this worker"""
+        with self._transaction() as connection:
+            connection.execute(
+                "INSERT INTO jobs (job_id, kind, status, worker_id, created) VALUES (?, ?, ?, ?, ?)",
+                (job_id, kind, QUEUED, self.worker_id, time.time())
+            )
+
+    def start_jobs(self, job_ids, limit: int) -> list:
+        """
+        Start those of the given queued jobs that fit: fewer than limit jobs
+        may run across all workers, and jobs start in the order they were
+        queued (also behind other workers' jobs). One transaction for all of
+        them, so a worker polls once per tick however many jobs it queued.
+        Returns the ids of the started jobs.
+        """
+        if not job_ids:
+            return []
+        with self._transaction() as connection:
+            self._reap(connection)
+            running = connection.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status = ?", (RUNNING,)
+            ).fetchone()[0]
+            queued = [row[0] for row in connection.execute(
+                "SELECT job_id FROM jobs WHERE status = ? ORDER BY seq", (QUEUED,)
+            )]
+            position = {job_id: index for index, job_id in enumerate(queued)}
+            placeholders = ",".join("?" * len(job_ids))
+            rows = connection.execute(
+                f"SELECT job_id, status FROM jobs WHERE job_id IN ({placeholders})", list(job_ids)
+            ).fetchall()
+
+            started = []
+            now = time.time()
+            for row in rows:
+                # A job starting moves from the queue to running, so running + position
+                # stays the same for the jobs behind it
+                if row["status"] == QUEUED and running + position[row["job_id"]] >= limit:
+                    continue
+                # A job released while this worker looked dead is simply started
+                connection.execute(
+                    "UPDATE jobs SET status = ?, started = ?, worker_id = ? WHERE job_id = ?",
+                    (RUNNING, now, self.worker_id, row["job_id"])
+                )
+                started.append(row["job_id"])
+            return started
+
+    def finish_job(self, job_id: str, success: bool, message: str = None):
+        with self._transaction() as connection:
+            connection.execute(
+                "UPDATE jobs SET status = ?, finished = ?, message = ? WHERE job_id = ?",
+                (SUCCESS if success else ERROR, time.time(), message, job_id)
+            )
+
+    def get_job(self, job_id: str):
+        """Job as a dict, None if unknown"""
+        row = self._connection().execute(
+            "SELECT jobs.job_id, jobs.kind, jobs.status, jobs.created, jobs.started, jobs.finished, "
+            "jobs.message, workers.pid AS worker_pid "
+            "FROM jobs LEFT JOIN workers USING (worker_id) WHERE jobs.job_id = ?",
+            (job_id,)
+        ).fetchone()
+        return dict(row) if row else None
+
+    def job_counts(self) -> dict:
+        """Number of jobs per status"""
+        rows = self._connection().execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        counts = {QUEUED: 0, RUNNING: 0, SUCCESS: 0, ERROR: 0}
+        counts.update({status: count for status, count in rows})
+        return counts
+
+    def prune_jobs(self, older_than: float) -> int:
+        """Forget finished jobs older than this many seconds, returns how many"""
+        with self._transaction() as connection:
+            cursor = connection.execute(
+                "DELETE FROM jobs WHERE status IN (?, ?) AND finished < ?",
+                (SUCCESS, ERROR, time.time() - older_than)
+            )
+            return cursor.rowcount
+
+    # In-use marks (see storage.Janitor)
+
+    def pin(self, *paths):
+        with self._transaction() as connection:
+            connection.executemany(
+                "INSERT INTO pins (path, worker_id, count) VALUES (?, ?, 1) "
+                "ON CONFLICT (path, worker_id) DO UPDATE SET count = count + 1",
+                [(path, self.worker_id) for path in paths]
+            )
+
+    def unpin(self, *paths):
+        with self._transaction() as connection:
+            for path in paths:
+                connection.execute(
+                    "UPDATE pins SET count = count - 1 WHERE path = ? AND worker_id = ?",
+                    (path, self.worker_id)
+                )
+            connection.execute("DELETE FROM pins WHERE count <= 0")
+
+    def is_pinned(self, path: str) -> bool:
+        """Whether path or anything below it is pinned by a live worker"""
+        prefix = path + os.sep
+        row = self._connection().execute(
+            "SELECT 1 FROM pins WHERE path = ? OR substr(path, 1, ?) = ? LIMIT 1",
+            (path, len(prefix), prefix)
+        ).fetchone()
+        return row is not None
+
+    # Leases
+
+    def try_lease(self, name: str, seconds: float) -> bool:
+        """Take the named lease unless another live worker holds it"""
+        with self._transaction() as connection:
+            now = time.time()
+            holder = connection.execute(
+                "SELECT worker_id FROM leases WHERE name = ? AND expires > ?", (name, now)
+            ).fetchone()
+            if holder is not None and holder[0] != self.worker_id:
+                return False
+            connection.execute(
+                "INSERT OR REPLACE INTO leases (name, worker_id, expires) VALUES (?, ?, ?)",
+                (name, self.worker_id, now + seconds)
+            )
+            return True
+
+    def release_lease(self, name: str):
+        with self._transaction() as connection:
+            connection.execute(
+                "DELETE FROM leases WHERE name = ? AND worker_id = ?", (name, self.worker_id)
+            )
+
+    # Presets (a stored version never changes, updates add a new version)
+
+    def add_preset_version(self, preset_id: str, name: str, settings: dict, digest: str) -> dict:
+        """
+        Store settings as the next version of a preset (version 1 for a new id).
+        Returns the latest version unchanged when name and settings are the same.
+        """
+        with self._transaction() as connection:
+            latest = connection.execute(
+                "SELECT version, name, digest FROM presets WHERE preset_id = ? ORDER BY version DESC LIMIT 1",
+                (preset_id,)
+            ).fetchone()
+            if latest is not None and latest["name"] == name and latest["digest"] == digest:
+                version = latest["version"]
+            else:
+                version = latest["version"] + 1 if latest is not None else 1
+                connection.execute(
+                    "INSERT INTO presets (preset_id, version, name, settings, digest, created) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (preset_id, version, name, json.dumps(settings, sort_keys=True), digest, time.time())
+                )
+        return self.get_preset(preset_id, version)
+
+    def get_preset(self, preset_id: str, version: int = None):
+        """One version of a preset (the latest if version is None) as a dict, None if unknown"""
+        connection = self._connection()
+        latest = connection.execute(
+            "SELECT MAX(version) FROM presets WHERE preset_id = ?", (preset_id,)
+        ).fetchone()[0]
+        if latest is None:
+            return None
+        row = connection.execute(
+            "SELECT * FROM presets WHERE preset_id = ? AND version = ?",
+            (preset_id, latest if version is None else version)
+        ).fetchone()
+        return self._preset(row, latest) if row else None
+
+    def list_presets(self) -> list:
+        """Latest version of every preset, by name"""
+        rows = self._connection().execute(
+            "SELECT * FROM presets AS p WHERE version = "
+            "(SELECT MAX(version) FROM presets WHERE preset_id = p.preset_id) ORDER BY name"
+        ).fetchall()
+        return [self._preset(row, row["version"]) for row in rows]
+
+    @staticmethod
+    def _preset(row, latest_version) -> dict:
+        return {
+            "id": row["preset_id"],
+            "version": row["version"],
+            "latest_version": latest_version,
+            "name": row["name"],
+            "settings": json.loads(row["settings"]),
+            "digest": row["digest"],
+            "created": row["created"],
+        }
@@ -0,0 +1,171 @@
+"""
+Disk lifecycle of the API working directories (uploads, outputs, previews, profiles, ...).
+Each top-level entry of a managed directory (a job directory or a cached file)
+is removed by the janitor once it has not been used for longer than the TTL
+(of its directory, when set per directory),
+and the least recently used entries are evicted while the total size is over
+the quota. Entries of running jobs are marked in use and never removed;
+with a shared state store the marks are seen by every API worker process.
+"""
+import os
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import metrics
+
+
+def remove_path(path) -> int:
+    """Remove a file or directory tree, returns the number of bytes freed"""
+    path = Path(path)
+    size = path_size(path)
+    if path.is_dir() and not path.is_symlink():
+        shutil.rmtree(path, ignore_errors=True)
+    else:
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+    return size
+
+
+def path_size(path) -> int:
+    """Size of a file, or of all files below a directory"""
+    path = Path(path)
+    try:
+        if not path.is_dir() or path.is_symlink():
+            return path.lstat().st_size
+    except FileNotFoundError:
+        return 0
+
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(root, name)).st_size
+            except FileNotFoundError:
+                pass
+    return total
+
+
+class Janitor:
+    """
+    TTL and size quota for a set of directories.
+    ttls overrides the TTL of single directories ({root: seconds}).
+    sweep() is blocking (walks the directories), run it on a worker thread.
+    With store (a state.StateStore) the in-use marks are shared between
+    processes, otherwise they are kept in this process.
+    """
+
+    def __init__(self, roots, ttl: float = 0, quota_bytes: int = 0, store=None, ttls=None):
+        self.roots = [Path(root) for root in roots]
+        self.ttl = ttl
+        self.ttls = {Path(root): root_ttl for root, root_ttl in (ttls or {}).items()}
+        self.quota_bytes = quota_bytes
+        self.store = store
+        self._in_use = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, *paths):
+        """
+        Protect paths (which may not exist yet) from removal until release().
+        A path inside a managed entry protects the whole entry.
+        """
+        if self.store is not None:
+            self.store.pin(*(os.path.abspath(path) for path in paths))
+            return
+        with self._lock:
+            for path in paths:
+                key = os.path.abspath(path)
+                self._in_use[key] = self._in_use.get(key, 0) + 1
+
+    def release(self, *paths):
+        if self.store is not None:
+            self.store.unpin(*(os.path.abspath(path) for path in paths))
+            return
+        with self._lock:
+            for path in paths:
+                key = os.path.abspath(path)
+                self._in_use[key] -= 1
+                if not self._in_use[key]:
+                    del self._in_use[key]
+
+    @contextmanager
+    def in_use(self, *paths):
+        """acquire() the paths for the duration of the block"""
+        self.acquire(*paths)
+        try:
+            yield
+        finally:
+            self.release(*paths)
+
+    def is_in_use(self, path) -> bool:
+        entry = os.path.abspath(path)
+        if self.store is not None:
+            return self.store.is_pinned(entry)
+        with self._lock:
+            return any(key == entry or key.startswith(entry + os.sep) for key in self._in_use)
+
+    @staticmethod
+    def touch(path):
+        """Mark an entry as recently used (LRU order follows modification time)"""
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def _entries(self):
+        """(last_used, size, path, ttl) of every top-level entry in the managed directories"""
+        entries = []
+        for root in self.roots:
+            ttl = self.ttls.get(root, self.ttl)
+            try:
+                children = list(os.scandir(root))
+            except FileNotFoundError:
+                continue
+            for child in children:
+                try:
+                    last_used = child.stat(follow_symlinks=False).st_mtime
+                except FileNotFoundError:
+                    continue
+                entries.append((last_used, path_size(child.path), Path(child.path), ttl))
+        return entries
+
+    def sweep(self, now: float = None) -> dict:
+        """
+        Remove expired entries, then least recently used ones until the quota is met.
+        Returns {"removed": count, "freed_bytes": bytes, "total_bytes": bytes left}.
+        """
+        now = time.time() if now is None else now
+        entries = sorted(self._entries(), key=lambda entry: entry[0])
+        total = sum(size for _, size, _, _ in entries)
+        removed = 0
+        freed = 0
+
+        kept = []
+        for last_used, size, path, ttl in entries:
+            if ttl and now - last_used > ttl and not self.is_in_use(path):
+                remove_path(path)
+                metrics.STORAGE_EVICTIONS.inc(reason="ttl")
+                removed += 1
+                freed += size
+                total -= size
+            else:
+                kept.append((last_used, size, path))
+
+        if self.quota_bytes:
+            for _, size, path in kept:
+                if total <= self.quota_bytes:
+                    break
+                if self.is_in_use(path):
+                    continue
+                remove_path(path)
+                metrics.STORAGE_EVICTIONS.inc(reason="quota")
+                removed += 1
+                freed += size
+                total -= size
+
+        metrics.STORAGE_BYTES.set(total)
+        return {"removed": removed, "freed_bytes": freed, "total_bytes": total}
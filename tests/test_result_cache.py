@@ -0,0 +1,83 @@
+"""Result cache of /api/process-file for requests sent the way the GUI sends them"""
+import importlib
+import sys
+
+import laspy
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+import gui_config
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    """The API with its data directories and state database in tmp_path"""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("API_PRELOAD", "0")
+    sys.modules.pop("api", None)
+    api = importlib.import_module("api")
+    with TestClient(api.app) as test_client:
+        yield test_client
+    sys.modules.pop("api", None)
+
+
+@pytest.fixture
+def las_bytes(tmp_path):
+    """A small point cloud as uploaded by the GUI"""
+    rng = np.random.default_rng(0)
+    las = laspy.create(point_format=6, file_version="1.4")
+    las.x = rng.uniform(0, 100, 5000)
+    las.y = rng.uniform(0, 100, 5000)
+    las.z = rng.uniform(0, 50, 5000)
+    las.classification = rng.integers(1, 7, 5000)
+    path = tmp_path / "cloud.las"
+    las.write(path)
+    return path.read_bytes()
+
+
+def _gui_request(client, las_bytes, filename, data):
+    """process_file_via_api: processing fields or a preset, output deleted after download"""
+    return client.post(
+        "/api/process-file",
+        files={"file": (filename, las_bytes, "application/octet-stream")},
+        data={**data, "delete_after_download": "true"},
+    )
+
+
+def _publish(client, name, settings):
+    """publish_preset: the preset reference a GUI user sends"""
+    response = client.post(
+        "/api/presets",
+        json={"name": name, "settings": gui_config.processing_settings(settings)},
+    )
+    assert response.status_code == 200
+    preset = response.json()
+    return f"{preset['id']}@{preset['version']}"
+
+
+def test_repeated_gui_request_is_cache_hit(client, las_bytes, tmp_path):
+    settings = dict(gui_config.DEFAULT_SETTINGS, points_to_render=20.0)
+    data = gui_config.processing_settings(settings)
+
+    first = _gui_request(client, las_bytes, "cloud.las", data)
+    assert first.status_code == 200
+    assert first.headers["X-Result-Cache"] == "miss"
+    # Only the job's own output is deleted after the download
+    assert not (tmp_path / "outputs" / first.headers["X-Job-Id"]).exists()
+
+    second = _gui_request(client, las_bytes, "cloud.las", data)
+    assert second.status_code == 200
+    assert second.headers["X-Result-Cache"] == "hit"
+    assert second.content == first.content
+
+
+def test_identical_presets_of_different_users_share_results(client, las_bytes):
+    settings = dict(gui_config.DEFAULT_SETTINGS, points_to_render=30.0, drop_withheld=True)
+
+    first = _gui_request(client, las_bytes, "mine.las", {"preset": _publish(client, "Mine", settings)})
+    second = _gui_request(client, las_bytes, "theirs.las", {"preset": _publish(client, "Theirs", settings)})
+
+    assert first.headers["X-Result-Cache"] == "miss"
+    assert second.headers["X-Result-Cache"] == "hit"
+    assert second.content == first.content
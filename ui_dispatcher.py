@@ -0,0 +1,172 @@
+"""
+Thread-safe UI updates and cancellable background tasks for the GUI.
+Tk widgets may only be touched from the main loop: worker threads post
+callbacks to a UiDispatcher, which runs them from `after()` in small
+batches so the window keeps redrawing while transfers are running.
+"""
+import threading
+import time
+from collections import deque
+
+
+# How often queued callbacks are run (ms), ~60 fps
+DRAIN_INTERVAL_MS = 16
+
+# Time budget per drain (seconds), the rest of the frame is left to Tk
+DRAIN_BUDGET = 0.008
+
+
+class UiDispatcher:
+    """Queue of callbacks drained on the Tk main loop"""
+
+    def __init__(self, root, interval_ms=DRAIN_INTERVAL_MS):
+        self.root = root
+        self.interval_ms = interval_ms
+        self._queue = deque()
+        self._latest = {}
+        self._lock = threading.Lock()
+        self.root.after(self.interval_ms, self._drain)
+
+    def call(self, func, *args, key=None):
+        """
+        Run func(*args) on the main loop. Safe to call from any thread.
+        With key set, only the newest pending call for that key runs
+        (e.g. progress updates posted faster than the screen refreshes).
+        """
+        with self._lock:
+            if key is not None:
+                pending = key in self._latest
+                self._latest[key] = (func, args)
+                if pending:
+                    return
+            self._queue.append((key, func, args))
+
+    def _drain(self):
+        deadline = time.perf_counter() + DRAIN_BUDGET
+        while time.perf_counter() < deadline:
+            with self._lock:
+                if not self._queue:
+                    break
+                key, func, args = self._queue.popleft()
+                if key is not None:
+                    func, args = self._latest.pop(key)
+            try:
+                func(*args)
+            except Exception as e:
+                print(f"UI callback failed: {e}")
+        self.root.after(self.interval_ms, self._drain)
+
+
+class TaskCancelled(Exception):
+    """Raised inside a task once it has been cancelled"""
+
+
+class Task:
+    """Handle of a background task, passed to the task function as its last argument"""
+
+    def __init__(self, name):
+        self.name = name
+        self._cancel_event = threading.Event()
+        self._cancel_callbacks = []
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self):
+        return self._cancel_event.is_set()
+
+    def cancel(self):
+        with self._lock:
+            self._cancel_event.set()
+            callbacks = list(self._cancel_callbacks)
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                print(f"Cancel callback failed: {e}")
+
+    def add_cancel_callback(self, callback):
+        """
+        Call callback() from the cancelling thread when the task is cancelled
+        (right away if it already is), e.g. to abort a blocking request.
+        """
+        with self._lock:
+            if not self._cancel_event.is_set():
+                self._cancel_callbacks.append(callback)
+                return
+        callback()
+
+    def remove_cancel_callback(self, callback):
+        with self._lock:
+            if callback in self._cancel_callbacks:
+                self._cancel_callbacks.remove(callback)
+
+    def check_cancelled(self):
+        """Raise TaskCancelled if the task was cancelled (call between steps / chunks)"""
+        if self._cancel_event.is_set():
+            raise TaskCancelled(self.name)
+
+
+class TaskManager:
+    """
+    Runs functions on daemon threads and reports their outcome on the main loop.
+    A cancelled task reports on_cancel right away; whatever the worker
+    thread returns afterwards is discarded.
+    """
+
+    def __init__(self, dispatcher):
+        self.dispatcher = dispatcher
+        self._tasks = {}
+        self._lock = threading.Lock()
+
+    def submit(self, name, func, *args, on_success=None, on_error=None, on_cancel=None):
+        """
+        Start func(*args, task) on a worker thread, cancelling a running task of the same name.
+        on_success(result) / on_error(exception) / on_cancel() run on the main loop.
+        """
+        task = Task(name)
+        with self._lock:
+            previous = self._tasks.get(name)
+            self._tasks[name] = (task, on_cancel)
+        if previous:
+            self._cancel(*previous)
+
+        def run():
+            try:
+                result = func(*args, task)
+            except TaskCancelled:
+                return
+            except Exception as e:
+                if not task.cancelled and on_error:
+                    self.dispatcher.call(on_error, e)
+                return
+            finally:
+                with self._lock:
+                    if self._tasks.get(name, (None,))[0] is task:
+                        del self._tasks[name]
+            if not task.cancelled and on_success:
+                self.dispatcher.call(on_success, result)
+
+        thread = threading.Thread(target=run, name=f"task-{name}", daemon=True)
+        thread.start()
+        return task
+
+    def _cancel(self, task, on_cancel):
+        task.cancel()
+        if on_cancel:
+            self.dispatcher.call(on_cancel)
+
+    def cancel(self, name=None):
+        """Cancel the task with this name, or all tasks"""
+        with self._lock:
+            if name is None:
+                cancelled = list(self._tasks.values())
+                self._tasks.clear()
+            else:
+                entry = self._tasks.pop(name, None)
+                cancelled = [entry] if entry else []
+        for task, on_cancel in cancelled:
+            self._cancel(task, on_cancel)
+
+    def running(self, name):
+        with self._lock:
+            return name in self._tasks
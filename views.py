@@ -2,6 +2,10 @@ import customtkinter as ctk
 from typing import Dict, Any
 
 
+# Size (px) of the input file preview shown next to the file selection
+PREVIEW_DISPLAY_SIZE = 200
+
+
 def create_settings_page_ui(parent, settings_callback, current_settings, settings_widget_ref, settings_ref):
     """Create the settings page UI components"""
     # Hello Settings text
@@ -29,6 +33,10 @@ def create_settings_page_ui(parent, settings_callback, current_settings, setting
     scroll_frame = ctk.CTkScrollableFrame(main_frame)
     scroll_frame.pack(fill="both", expand=True, padx=10, pady=10)
     
+    # Presets (filled by create_presets_section)
+    presets_frame = ctk.CTkFrame(scroll_frame)
+    presets_frame.pack(fill="x", pady=10, padx=10)
+    
     # Example settings - based on your project parameters
     create_setting_widget(
         scroll_frame, 
@@ -62,14 +70,137 @@ def create_settings_page_ui(parent, settings_callback, current_settings, setting
     output_format.set(current_settings["output_format"])
     output_format.pack(anchor="w", padx=10, pady=(0, 10))
     
+    # Output size settings
+    create_setting_combobox(
+        scroll_frame,
+        "Output point format (compact = XYZ + RGB only):",
+        "output_point_format",
+        current_settings.get("output_point_format", "keep"),
+        settings_widget_ref,
+        values=["keep", "compact", "0", "1", "2", "3", "6", "7"]
+    )
+    
+    create_setting_checkbox(
+        scroll_frame,
+        "Drop extra dimensions (extra bytes)",
+        "drop_extra_dims",
+        current_settings.get("drop_extra_dims", False),
+        settings_widget_ref
+    )
+    
+    # Point filter settings
+    create_setting_entry(
+        scroll_frame,
+        "Exclude classes (comma separated, e.g. 7,18 for noise):",
+        "exclude_classes",
+        current_settings.get("exclude_classes", ""),
+        settings_widget_ref
+    )
+    
+    create_setting_entry(
+        scroll_frame,
+        "Target CRS (e.g. EPSG:2180, empty keeps input CRS):",
+        "target_crs",
+        current_settings.get("target_crs", ""),
+        settings_widget_ref
+    )
+    
+    create_setting_combobox(
+        scroll_frame,
+        "Returns to keep:",
+        "return_filter",
+        current_settings.get("return_filter", "all"),
+        settings_widget_ref,
+        values=["all", "first", "last", "single", "not_last"]
+    )
+    
     # Checkbox settings
+    create_setting_checkbox(
+        scroll_frame,
+        "Drop withheld points",
+        "drop_withheld",
+        current_settings.get("drop_withheld", False),
+        settings_widget_ref
+    )
+    
+    create_setting_checkbox(
+        scroll_frame,
+        "Drop synthetic points",
+        "drop_synthetic",
+        current_settings.get("drop_synthetic", False),
+        settings_widget_ref
+    )
+    
+    create_setting_checkbox(
+        scroll_frame,
+        "Remove outliers (isolated high/low points)",
+        "remove_outliers",
+        current_settings.get("remove_outliers", False),
+        settings_widget_ref
+    )
+    
+    create_setting_combobox(
+        scroll_frame,
+        "Processing engine (auto = local when available):",
+        "engine",
+        current_settings.get("engine", "auto"),
+        settings_widget_ref,
+        values=["auto", "local", "api"]
+    )
     
     
     # Buttons frame
     button_frame = ctk.CTkFrame(main_frame)
     button_frame.pack(fill="x", pady=(10, 10))
     
-    return main_frame, output_format, button_frame
+    return main_frame, output_format, presets_frame, button_frame
+
+
+def create_presets_section(frame, preset_names, selected_name, apply_command, save_command, delete_command):
+    """Pick, apply and delete saved presets, or save the current settings as a new one"""
+    ctk.CTkLabel(
+        frame,
+        text="Presets:",
+        font=ctk.CTkFont(size=14, weight="bold")
+    ).pack(anchor="w", padx=10, pady=(10, 5))
+    
+    pick_frame = ctk.CTkFrame(frame)
+    pick_frame.pack(fill="x", padx=10, pady=(0, 5))
+    
+    preset_box = ctk.CTkComboBox(pick_frame, values=preset_names, width=200)
+    preset_box.set(selected_name or (preset_names[0] if preset_names else ""))
+    preset_box.pack(side="left", padx=(0, 10))
+    
+    ctk.CTkButton(
+        pick_frame,
+        text="Apply",
+        command=lambda: apply_command(preset_box.get()),
+        width=80
+    ).pack(side="left", padx=5)
+    
+    ctk.CTkButton(
+        pick_frame,
+        text="Delete",
+        command=lambda: delete_command(preset_box.get()),
+        width=80,
+        fg_color="gray",
+        hover_color="darkgray"
+    ).pack(side="left", padx=5)
+    
+    save_frame = ctk.CTkFrame(frame)
+    save_frame.pack(fill="x", padx=10, pady=(0, 10))
+    
+    name_entry = ctk.CTkEntry(save_frame, width=200, placeholder_text="New preset name")
+    name_entry.pack(side="left", padx=(0, 10))
+    
+    ctk.CTkButton(
+        save_frame,
+        text="💾 Save as Preset",
+        command=lambda: save_command(name_entry.get()),
+        width=150
+    ).pack(side="left", padx=5)
+    
+    return preset_box, name_entry
 
 
 def create_setting_widget(parent, label_text, key, default_value, settings_widget_ref,
@@ -114,7 +245,71 @@ def create_setting_widget(parent, label_text, key, default_value, settings_widge
     slider.pack(side="left", fill="x", expand=True, padx=10)
 
 
-def create_settings_buttons(button_frame, save_command, cancel_command):
+def create_setting_entry(parent, label_text, key, default_value, settings_widget_ref):
+    frame = ctk.CTkFrame(parent)
+    frame.pack(fill="x", pady=10, padx=10)
+
+    settings_widget_ref[key] = default_value
+
+    ctk.CTkLabel(
+        frame,
+        text=label_text,
+        font=ctk.CTkFont(size=14, weight="bold")
+    ).pack(anchor="w", padx=10, pady=(10, 5))
+
+    entry = ctk.CTkEntry(frame, width=200)
+    entry.insert(0, default_value)
+    entry.pack(anchor="w", padx=10, pady=(0, 10))
+
+    def onChange(event=None):
+        settings_widget_ref[key] = entry.get().strip()
+
+    entry.bind("<KeyRelease>", onChange)
+
+
+def create_setting_combobox(parent, label_text, key, default_value, settings_widget_ref, values):
+    frame = ctk.CTkFrame(parent)
+    frame.pack(fill="x", pady=10, padx=10)
+
+    settings_widget_ref[key] = default_value
+
+    ctk.CTkLabel(
+        frame,
+        text=label_text,
+        font=ctk.CTkFont(size=14, weight="bold")
+    ).pack(anchor="w", padx=10, pady=(10, 5))
+
+    def onChange(value):
+        settings_widget_ref[key] = value
+
+    combobox = ctk.CTkComboBox(
+        frame,
+        values=values,
+        width=200,
+        command=onChange
+    )
+    combobox.set(default_value)
+    combobox.pack(anchor="w", padx=10, pady=(0, 10))
+
+
+def create_setting_checkbox(parent, label_text, key, default_value, settings_widget_ref):
+    settings_widget_ref[key] = bool(default_value)
+
+    def onChange():
+        settings_widget_ref[key] = bool(checkbox.get())
+
+    checkbox = ctk.CTkCheckBox(
+        parent,
+        text=label_text,
+        font=ctk.CTkFont(size=14),
+        command=onChange
+    )
+    if default_value:
+        checkbox.select()
+    checkbox.pack(anchor="w", padx=20, pady=10)
+
+
+def create_settings_buttons(button_frame, save_command, cancel_command, reset_command=None):
     """Create settings page buttons"""
     # Save button
     save_btn = ctk.CTkButton(
@@ -127,18 +322,19 @@ def create_settings_buttons(button_frame, save_command, cancel_command):
     )
     save_btn.pack(side="left", padx=10)
     
-    # # Reset button
-    # reset_btn = ctk.CTkButton(
-    #     button_frame,
-    #     text="🔄 Reset to Default",
-    #     command=reset_command,
-    #     width=150,
-    #     height=40,
-    #     font=ctk.CTkFont(size=14),
-    #     fg_color="gray",
-    #     hover_color="darkgray"
-    # )
-    # reset_btn.pack(side="left", padx=10)
+    # Reset button
+    if reset_command:
+        reset_btn = ctk.CTkButton(
+            button_frame,
+            text="🔄 Reset to Default",
+            command=reset_command,
+            width=150,
+            height=40,
+            font=ctk.CTkFont(size=14),
+            fg_color="gray",
+            hover_color="darkgray"
+        )
+        reset_btn.pack(side="left", padx=10)
     
     # Cancel button
     cancel_btn = ctk.CTkButton(
@@ -194,8 +390,25 @@ def create_file_selection_section(parent, browse_input_command, browse_output_co
     file_section = ctk.CTkFrame(parent)
     file_section.pack(fill="x", pady=20, padx=20)
     
+    # Preview of the input file (right side, filled in after selecting a file)
+    preview_frame = ctk.CTkFrame(file_section)
+    preview_frame.pack(side="right", fill="y", pady=15, padx=(0, 20))
+    
+    preview_label = ctk.CTkLabel(
+        preview_frame,
+        text="No preview",
+        font=ctk.CTkFont(size=12),
+        text_color="gray",
+        width=PREVIEW_DISPLAY_SIZE,
+        height=PREVIEW_DISPLAY_SIZE
+    )
+    preview_label.pack(padx=10, pady=10)
+    
+    files_column = ctk.CTkFrame(file_section, fg_color="transparent")
+    files_column.pack(side="left", fill="both", expand=True)
+    
     # Input file section
-    input_frame = ctk.CTkFrame(file_section)
+    input_frame = ctk.CTkFrame(files_column)
     input_frame.pack(fill="x", pady=15, padx=20)
     
     input_label = ctk.CTkLabel(
@@ -227,8 +440,19 @@ def create_file_selection_section(parent, browse_input_command, browse_output_co
     )
     browse_input_btn.pack(side="right")
     
+    # Input file metadata (filled in after inspecting the file)
+    input_info_label = ctk.CTkLabel(
+        input_frame,
+        text="",
+        font=ctk.CTkFont(size=11),
+        text_color="gray",
+        anchor="w",
+        justify="left"
+    )
+    input_info_label.pack(anchor="w", padx=15, pady=(0, 10))
+    
     # Output file section
-    output_frame = ctk.CTkFrame(file_section)
+    output_frame = ctk.CTkFrame(files_column)
     output_frame.pack(fill="x", pady=15, padx=20)
     
     output_label = ctk.CTkLabel(
@@ -260,7 +484,7 @@ def create_file_selection_section(parent, browse_input_command, browse_output_co
     )
     browse_output_btn.pack(side="right")
     
-    return input_file_label, output_file_label
+    return input_file_label, output_file_label, input_info_label, preview_label
 
 
 def create_action_buttons(parent, process_command, settings_command, clear_command):
@@ -310,8 +534,8 @@ def create_action_buttons(parent, process_command, settings_command, clear_comma
     return button_section
 
 
-def create_status_section(parent):
-    """Create status section with status label and progress bar"""
+def create_status_section(parent, cancel_command=None):
+    """Create status section with status label, progress bar and cancel button"""
     status_frame = ctk.CTkFrame(parent)
     status_frame.pack(fill="x", pady=20, padx=20)
     
@@ -335,5 +559,18 @@ def create_status_section(parent):
     progress_bar.pack(fill="x", padx=15, pady=(0, 15))
     progress_bar.pack_forget()
     
-    return status_label, progress_bar
+    # Cancel button, shown while a job is running
+    cancel_button = ctk.CTkButton(
+        status_frame,
+        text="⏹️ Cancel",
+        command=cancel_command,
+        width=120,
+        height=32,
+        fg_color="#8b2d2d",
+        hover_color="#5c1f1f"
+    )
+    cancel_button.pack(anchor="e", padx=15, pady=(0, 15))
+    cancel_button.pack_forget()
+    
+    return status_label, progress_bar, cancel_button
 